@@ -0,0 +1,178 @@
+import collections
+
+
+class Term(collections.namedtuple("Term", ["name", "args"])):
+    """Ground term of an answer set, e.g. currentlocation(agent,n5). Constants have no args."""
+
+    def __str__(self):
+        if len(self.args) == 0:
+            return self.name
+        return "{}({})".format(self.name, ",".join(str(arg) for arg in self.args))
+
+
+class Occurs(collections.namedtuple("Occurs", ["action", "args", "step"])):
+    """Action occurring at a step, e.g. Occurs('go_to', ('agent', 'n5'), 2)."""
+
+    def toOrder(self) -> str:
+        """Order string as expected by the simulator, e.g. go_to(agent,n5)."""
+        return "{}({})".format(self.action, ",".join(self.args))
+
+
+class Holds(collections.namedtuple("Holds", ["fluent", "step"])):
+    """Fluent holding at a step, fluent being the ground term as text, e.g. Holds('isfree(table1)', 0)."""
+
+
+class AnswerSet:
+    def __init__(self, atoms: list):
+        """Answer set indexed by step. Only positive literals are indexed, negated ones are kept in self.negated.
+
+        Args:
+            atoms ([(bool, Term)]): Parsed literals, as (negated, atom) pairs.
+        """
+        self.occurs = collections.defaultdict(list)
+        self.holds = collections.defaultdict(list)
+        self.goalSteps = []
+        self.others = []
+        self.negated = []
+
+        for negated, atom in atoms:
+            if negated:
+                self.negated.append(atom)
+            elif atom.name == "occurs" and len(atom.args) == 2:
+                action, step = atom.args
+                occurs = Occurs(
+                    action.name, tuple(str(arg) for arg in action.args), int(step.name)
+                )
+                self.occurs[occurs.step].append(occurs)
+            elif atom.name == "holds" and len(atom.args) == 2:
+                fluent, step = atom.args
+                holds = Holds(str(fluent), int(step.name))
+                self.holds[holds.step].append(holds)
+            elif atom.name == "goal" and len(atom.args) == 1:
+                self.goalSteps.append(int(atom.args[0].name))
+            else:
+                self.others.append(atom)
+        self.goalSteps.sort()
+
+    @classmethod
+    def fromTrajectory(cls, fluents: list, actions: list, goalSteps: list):
+        """Answer set of a plan computed outside SPARC (e.g. by NativePlanner).
+
+        Args:
+            fluents ([[str]]): Fluents (as text) holding at each step.
+            actions ([Term]): Action occurring at each step.
+            goalSteps ([int]): Steps at which a goal holds.
+        """
+        atoms = []
+        for step, stepFluents in enumerate(fluents):
+            stepTerm = Term(str(step), ())
+            for fluent in stepFluents:
+                atoms.append((False, Term("holds", (parseTerm(fluent), stepTerm))))
+        for step, action in enumerate(actions):
+            atoms.append((False, Term("occurs", (action, Term(str(step), ())))))
+        for step in goalSteps:
+            atoms.append((False, Term("goal", (Term(str(step), ()),))))
+        return cls(atoms)
+
+    def getOrders(self) -> list:
+        """Actions of the plan as order strings, sorted by step."""
+        return [
+            occurs.toOrder()
+            for step in sorted(self.occurs.keys())
+            for occurs in self.occurs[step]
+        ]
+
+    def getHolds(self, step: int) -> list:
+        """Fluents (as text) holding at step."""
+        return [holds.fluent for holds in self.holds.get(step, [])]
+
+    def getGoalStep(self) -> int:
+        """First step at which a goal holds, None if no goal holds."""
+        return self.goalSteps[0] if len(self.goalSteps) > 0 else None
+
+    def setHolds(self, step: int, fluents: list):
+        """Replace the fluents (as text) holding at step."""
+        self.holds[step] = [Holds(fluent, step) for fluent in fluents]
+
+
+class _TermParser:
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+
+    def skipSpaces(self):
+        while self.pos < len(self.text) and self.text[self.pos] in " \t\r\n":
+            self.pos += 1
+
+    def peek(self) -> str:
+        self.skipSpaces()
+        return self.text[self.pos] if self.pos < len(self.text) else ""
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(
+                "Expected '{}' at {} in answer set: {}".format(
+                    char, self.pos, self.text[self.pos : self.pos + 40]
+                )
+            )
+        self.pos += 1
+
+    def parseTerm(self) -> Term:
+        self.skipSpaces()
+        start = self.pos
+        while self.pos < len(self.text) and self.text[self.pos] not in "(),{} \t\r\n":
+            self.pos += 1
+        name = self.text[start : self.pos]
+        if not name:
+            raise ValueError("Empty term at {} in answer set.".format(start))
+
+        args = []
+        if self.peek() == "(":
+            self.pos += 1
+            if self.peek() != ")":
+                args.append(self.parseTerm())
+                while self.peek() == ",":
+                    self.pos += 1
+                    args.append(self.parseTerm())
+            self.expect(")")
+        return Term(name, tuple(args))
+
+    def parseLiterals(self) -> list:
+        """Literals of one answer set, as (negated, atom) pairs. Reads '{' ... '}'."""
+        literals = []
+        self.expect("{")
+        if self.peek() != "}":
+            while True:
+                negated = self.peek() == "-"
+                if negated:
+                    self.pos += 1
+                literals.append((negated, self.parseTerm()))
+                if self.peek() != ",":
+                    break
+                self.pos += 1
+        self.expect("}")
+        return literals
+
+
+def parseTerm(text: str) -> Term:
+    """Parse a single ground term or atom, e.g. 'isattable(c1, table2)'."""
+    return _TermParser(text).parseTerm()
+
+
+def parseAnswerSets(output: str) -> list:
+    """Parse SPARC output in a single pass.
+
+    Args:
+        output (str): Raw SPARC output, holding zero or more answer sets between braces.
+
+    Returns:
+        [AnswerSet]: Answer sets, empty if the program is inconsistent.
+    """
+    answerSets = []
+    parser = _TermParser(output)
+    start = output.find("{")
+    while start >= 0:
+        parser.pos = start
+        answerSets.append(AnswerSet(parser.parseLiterals()))
+        start = output.find("{", parser.pos)
+    return answerSets
@@ -0,0 +1,75 @@
+import heapq
+import threading
+
+
+class CustomerAllocator:
+    def __init__(self):
+        """Customer identification numbers of the planner (c1, c2...) and the simulator bodies standing for them.
+        Numbers of departed customers are given again to new ones, the smallest free number first,
+        so the customers of the program stay c1..cN with N the number of guests in the room.
+        """
+        self._free = []
+        self._next = 1
+        self._bodies = {}
+        self._customers = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._bodies)
+
+    def __contains__(self, customerID: int):
+        return customerID in self._bodies
+
+    def allocate(self, bodyID: int = None) -> int:
+        """Identification number of a new customer, represented by bodyID in the simulator."""
+        with self._lock:
+            if len(self._free) > 0:
+                customerID = heapq.heappop(self._free)
+            else:
+                customerID = self._next
+                self._next += 1
+            self._bodies[customerID] = None
+        self.bind(customerID, bodyID)
+        return customerID
+
+    def bind(self, customerID: int, bodyID: int):
+        """Represent customerID by a new body (e.g. seated model after being picked), None if not in the scene."""
+        with self._lock:
+            previousBody = self._bodies.get(customerID)
+            if previousBody is not None:
+                del self._customers[previousBody]
+            self._bodies[customerID] = bodyID
+            if bodyID is not None:
+                self._customers[bodyID] = customerID
+
+    def release(self, customerID: int) -> bool:
+        """Free the number of a departed customer.
+
+        Returns:
+            bool: False if customerID is not allocated.
+        """
+        with self._lock:
+            if customerID not in self._bodies:
+                return False
+            bodyID = self._bodies.pop(customerID)
+            if bodyID is not None:
+                del self._customers[bodyID]
+            heapq.heappush(self._free, customerID)
+            return True
+
+    def getBodyID(self, customerID: int) -> int:
+        return self._bodies.get(customerID)
+
+    def getCustomerID(self, bodyID: int) -> int:
+        return self._customers.get(bodyID)
+
+    def getCustomers(self) -> list:
+        with self._lock:
+            return sorted(self._bodies.keys())
+
+    def clear(self):
+        with self._lock:
+            self._free = []
+            self._next = 1
+            self._bodies.clear()
+            self._customers.clear()
@@ -0,0 +1,81 @@
+import collections
+import threading
+
+OBSERVATION = "observation"
+GOAL = "goal"
+
+
+class Intake(collections.namedtuple("Intake", ["sequence", "kind", "name", "value"])):
+    """Observation or goal submitted to the planner, sequence being its rank of arrival (from 1)."""
+
+
+class IntakeBatch(collections.namedtuple("IntakeBatch", ["items"])):
+    """Intakes taken at once by the planner (cf. IntakeQueue.take), in order of arrival."""
+
+    def __len__(self):
+        return len(self.items)
+
+    def getObservations(self) -> dict:
+        """Value of every observation, the last submitted one if an observation was submitted several times."""
+        observations = collections.OrderedDict()
+        for item in self.items:
+            if item.kind == OBSERVATION:
+                observations[item.name] = item.value
+        return observations
+
+    def getGoals(self) -> list:
+        return [item.name for item in self.items if item.kind == GOAL]
+
+    def getSequences(self) -> list:
+        return [item.sequence for item in self.items]
+
+    def getLastSequence(self, default: int = None) -> int:
+        return self.items[-1].sequence if len(self.items) > 0 else default
+
+
+class IntakeQueue:
+    def __init__(self):
+        """Observations and goals waiting for the planner. Producers (e.g. GUI signals) put them from any thread,
+        the planner takes all of them at once, and puts back the ones whose solve was cancelled.
+        """
+        self._items = []
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+    def put(self, kind: str, name: str, value: bool = True) -> int:
+        """Add an observation (kind OBSERVATION, value being its truth value) or a goal (kind GOAL).
+
+        Returns:
+            int: Sequence number of the intake.
+        """
+        with self._lock:
+            self._sequence += 1
+            self._items.append(Intake(self._sequence, kind, name, value))
+            return self._sequence
+
+    def take(self) -> IntakeBatch:
+        """Atomically remove and return all waiting intakes."""
+        with self._lock:
+            items = self._items
+            self._items = []
+        return IntakeBatch(tuple(items))
+
+    def requeue(self, batch: IntakeBatch):
+        """Put back intakes taken but not planned, with their sequence numbers."""
+        with self._lock:
+            self._items = sorted(
+                list(batch.items) + self._items, key=lambda item: item.sequence
+            )
+
+    def hasObservations(self) -> bool:
+        with self._lock:
+            return any(item.kind == OBSERVATION for item in self._items)
+
+    def getLastSequence(self) -> int:
+        """Sequence number of the last intake put, 0 if none."""
+        with self._lock:
+            return self._sequence
@@ -0,0 +1,98 @@
+import collections
+
+from ASP.AnswerSet import AnswerSet, parseTerm
+from ASP.RestaurantModel import RestaurantDomain, RestaurantState
+
+
+def getProgramProblem(domain: RestaurantDomain, program):
+    """Initial state (observations applied) and goals written in the dynamic sections of a ProgramASP.
+
+    Returns:
+        (RestaurantState, [Term]): Initial state and goals, None if an observation cannot be modeled.
+    """
+    fluents = []
+    for rule in program.getSection("init"):
+        atom = parseTerm(rule.rstrip("."))
+        if atom.name == "holds":
+            fluents.append(atom.args[0])
+    state = RestaurantState.fromFluents(domain, fluents)
+
+    # Observations are applied at step 0, whatever the step they are written at
+    for rule in program.getSection("obs"):
+        observable, value, step = parseTerm(rule.rstrip(".")).args
+        if not state.applyObservation(observable, value.name == "true"):
+            return None
+
+    goals = []
+    for rule in program.getSection("goal"):
+        body = rule.split(":-")[1].strip().rstrip(".")
+        goals.append(parseTerm(body).args[0])
+    return state, goals
+
+
+class NativePlanner:
+    def __init__(self, domain: RestaurantDomain):
+        """Breadth-first planner over the fluents and executability conditions of ProgramASP.sparc (cf. RestaurantModel).
+        As in the SPARC planning module, the goal is reached as soon as one of the goals holds,
+        and the plans found have the minimal number of steps."""
+        self.domain = domain
+
+    def isGoal(self, state: RestaurantState, goals: list) -> bool:
+        return any(state.satisfies(goal) for goal in goals)
+
+    def plan(self, state: RestaurantState, goals: list, maxSteps: int):
+        """Shortest sequence of actions reaching a goal.
+
+        Args:
+            state (RestaurantState): Initial state.
+            goals ([Term]): Goals, possibly with variables (e.g. isattable(c1, T)).
+            maxSteps (int): Maximum plan length.
+
+        Returns:
+            ([RestaurantState], [Term]): Visited states and actions, None if no plan exists.
+        """
+        if len(goals) == 0:
+            return None
+
+        parents = {state.key(): None}
+        frontier = collections.deque([(state, 0)])
+        while frontier:
+            current, depth = frontier.popleft()
+            if self.isGoal(current, goals):
+                states, actions = [current], []
+                parent = parents[current.key()]
+                while parent is not None:
+                    previous, action = parent
+                    states.insert(0, previous)
+                    actions.insert(0, action)
+                    parent = parents[previous.key()]
+                return states, actions
+
+            if depth >= maxSteps:
+                continue
+            for action in current.getPossibleActions():
+                successor = current.apply(action)
+                if successor.key() not in parents:
+                    parents[successor.key()] = (current, action)
+                    frontier.append((successor, depth + 1))
+        return None
+
+    def planProgram(self, program, maxSteps: int) -> AnswerSet:
+        """Plan for the problem written in a ProgramASP.
+
+        Returns:
+            AnswerSet: Plan in the same form as SPARC answer sets, None if no plan is found.
+        """
+        problem = getProgramProblem(self.domain, program)
+        if problem is None:
+            return None
+        state, goals = problem
+
+        result = self.plan(state, goals, maxSteps)
+        if result is None:
+            return None
+        states, actions = result
+        goalSteps = [i for i, s in enumerate(states) if self.isGoal(s, goals)]
+        return AnswerSet.fromTrajectory(
+            [s.getFluents() for s in states], actions, goalSteps
+        )
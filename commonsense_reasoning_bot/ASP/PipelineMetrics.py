@@ -0,0 +1,105 @@
+import collections
+import contextlib
+import threading
+import time
+
+
+class Span(collections.namedtuple("Span", ["phase", "start", "duration", "details"])):
+    """Timed phase of the ASP pipeline, start being a time.time() value and duration in seconds."""
+
+    def __str__(self):
+        details = ", ".join("{} {}".format(k, v) for k, v in self.details.items())
+        return "{}{}: {:.1f} ms".format(
+            self.phase,
+            " ({})".format(details) if details else "",
+            1000.0 * self.duration,
+        )
+
+
+class PipelineMetrics:
+    def __init__(self, maxSpans: int = 1000, logFunction=None):
+        """Timings of the phases of the ASP pipeline (cf. PlanningService.update).
+
+        Args:
+            maxSpans (int, optional): Number of spans kept per phase, older ones are dropped. Defaults to 1000.
+            logFunction (function, optional): Called with every span as text if given. Defaults to None.
+        """
+        self.maxSpans = maxSpans
+        self.logFunction = logFunction
+        self._spans = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, phase: str, **details):
+        """Time the enclosed block as phase, e.g. with metrics.span("solve", horizon=3): ..."""
+        start = time.time()
+        counter = time.perf_counter()
+        try:
+            yield details
+        finally:
+            self.record(phase, time.perf_counter() - counter, start, **details)
+
+    def record(self, phase: str, duration: float, start: float = None, **details):
+        """Add a span measured elsewhere.
+
+        Args:
+            phase (str): Phase name.
+            duration (float): Seconds spent in the phase.
+            start (float, optional): Start time (time.time()), now minus duration if not given. Defaults to None.
+        """
+        if start is None:
+            start = time.time() - duration
+        span = Span(phase, start, duration, details)
+        with self._lock:
+            if phase not in self._spans:
+                self._spans[phase] = collections.deque(maxlen=self.maxSpans)
+            self._spans[phase].append(span)
+        if self.logFunction:
+            self.logFunction(str(span))
+
+    def getPhases(self) -> list:
+        with self._lock:
+            return list(self._spans.keys())
+
+    def getSpans(self, phase: str, since: float = None) -> list:
+        """Spans of phase, only the ones started after since (time.time()) if given."""
+        with self._lock:
+            spans = list(self._spans.get(phase, []))
+        if since is not None:
+            spans = [s for s in spans if s.start >= since]
+        return spans
+
+    def getLast(self, phase: str) -> Span:
+        with self._lock:
+            spans = self._spans.get(phase)
+            return spans[-1] if spans else None
+
+    def getTotal(self, phase: str, since: float = None) -> float:
+        return sum(s.duration for s in self.getSpans(phase, since))
+
+    def getStats(self, phase: str) -> dict:
+        """Count, total, mean and max duration (seconds) of the kept spans of phase."""
+        durations = [s.duration for s in self.getSpans(phase)]
+        if len(durations) == 0:
+            return {"count": 0, "total": 0.0, "mean": 0.0, "max": 0.0}
+        return {
+            "count": len(durations),
+            "total": sum(durations),
+            "mean": sum(durations) / len(durations),
+            "max": max(durations),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+    def __str__(self):
+        lines = []
+        for phase in self.getPhases():
+            stats = self.getStats(phase)
+            lines.append(
+                "{}: {} x {:.1f} ms (max {:.1f} ms)".format(
+                    phase, stats["count"], 1000.0 * stats["mean"], 1000.0 * stats["max"]
+                )
+            )
+        return "\n".join(lines)
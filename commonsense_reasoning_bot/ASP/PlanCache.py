@@ -0,0 +1,55 @@
+import collections
+import threading
+
+
+class PlanCache:
+    def __init__(self, maxSize: int = 256):
+        """LRU cache of solver outputs, keyed by planning-problem fingerprint (cf. ProgramASP.fingerprint).
+        Unsatisfiable outputs are cached as well, so known-inconsistent horizons are not solved again.
+
+        Args:
+            maxSize (int, optional): Maximum number of entries, 0 disables the cache. Defaults to 256.
+        """
+        self.maxSize = maxSize
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: str):
+        return key in self._entries
+
+    def get(self, key: str):
+        """Cached value of key, None if absent."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value):
+        if self.maxSize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxSize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def getHitRate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def __str__(self):
+        return "Plan cache: {} entries, {:.0%} hit rate ({} hits / {} lookups)".format(
+            len(self._entries), self.getHitRate(), self.hits, self.hits + self.misses
+        )
@@ -0,0 +1,878 @@
+import asyncio
+import collections
+import os
+import time
+import threading
+import pathlib
+import re
+
+from ASP.AnswerSet import AnswerSet, parseAnswerSets, parseTerm
+from ASP.IntakeQueue import GOAL, OBSERVATION, IntakeQueue
+from ASP.NativePlanner import NativePlanner
+from ASP.PipelineMetrics import PipelineMetrics
+from ASP.PlanCache import PlanCache
+from ASP.ProgramBuilder import ProgramASP
+from ASP.RestaurantModel import RestaurantDomain, RestaurantState, isPlanValid
+from ASP.SceneLayout import SceneLayout
+from ASP.SparcSolver import (
+    SolveCancelled,
+    SolveTimeout,
+    SparcSolver,
+    TranslationError,
+    getRemainingTime,
+)
+from ASP.TravelCost import TravelCostModel
+
+FILE_PATH = pathlib.Path(__file__).parent.absolute()
+MAX_HORIZON = 15
+# Number of problems whose (un)satisfiable horizons are remembered
+HORIZON_MEMORY = 1024
+# Step of the observations: the current situation, re-based to step 0 at every replan
+OBSERVATION_STEP = 0
+
+
+class Plan(
+    collections.namedtuple("Plan", ["version", "orders", "answerSet", "sequence"])
+):
+    """Order stack published by PlanningService, version being incremented with every new or re-validated plan.
+    Observations and goals up to sequence (cf. IntakeQueue) were submitted before the plan was made and are taken into account.
+    """
+
+    def covers(self, sequence: int) -> bool:
+        return sequence <= self.sequence
+
+
+class PlanningService:
+    def __init__(
+        self,
+        logFunction=None,
+        constantOrderList=None,
+        solver: SparcSolver = None,
+        parallelHorizons: bool = False,
+        planCacheSize: int = 256,
+        debounceDelay: float = 0.1,
+        planCheck: bool = True,
+        planner: str = "sparc",
+        solveDeadline: float = 10.0,
+        cancelObsolete: bool = True,
+        logTimings: bool = False,
+        translateStatic: bool = False,
+        optimalPlan: bool = False,
+        travelCost: bool = False,
+    ):
+        """Planning with an ASP (Sparc) program, without Qt. Call the ASP program and update orders list when new observations are submitted.
+        Plans are computed by serve(), in the calling thread, or in a background thread with start().
+        Observations and goals can be submitted from any thread, and new plans awaited with next_plan().
+
+        Args:
+            logFunction (function, optional): Called with (message, log_type), e.g. the emit method of a log signal. Defaults to None.
+            constantOrderList ([], optional): Only use for testing purposes, desactivate ASP calls and initialize orders in memory. Defaults to None.
+            solver (SparcSolver, optional): Solver running the program. If not given, a single persistent worker is used,
+                or one per CPU core with parallelHorizons. Defaults to None.
+            parallelHorizons (bool, optional): Solve several horizons at once on the solver workers to find the minimal plan,
+                the ones closest to the estimated horizon first. Defaults to False.
+            planCacheSize (int, optional): Number of solver outputs kept in the plan cache, 0 disables it. Defaults to 256.
+            debounceDelay (float, optional): Seconds without new observation before solving, so that close observations are solved together. Defaults to 0.1.
+            planCheck (bool, optional): Replay the current plan with new observations and goals first, and only call the solver if it fails. Defaults to True.
+            planner (str, optional): "sparc", "native" (NativePlanner, SPARC as fallback) or "crosscheck" (both, SPARC plan used and differences logged). Defaults to "sparc".
+            solveDeadline (float, optional): Seconds allowed to the solver for one update, the best plan found so far is kept when it passes. None for no limit. Defaults to 10.0.
+            cancelObsolete (bool, optional): Abort the running solve when a new observation arrives, and solve again with it.
+                Only the current request of the worker is aborted, its JVM keeps running. Defaults to True.
+            logTimings (bool, optional): Log the duration of every phase of the pipeline (cf. self.metrics). Defaults to False.
+            translateStatic (bool, optional): Translate the static part of the program once with SPARC and only give the dynamic sections
+                to clingo on each solve (cf. SparcSolver.solveTranslated), in the sequential horizon search. Defaults to False.
+            optimalPlan (bool, optional): Solve once at the maximum horizon, minimising the step at which a goal holds (cf. get_optimal_plan),
+                instead of searching the minimal horizon with one solve per horizon. Defaults to False.
+            travelCost (bool, optional): Same single solve, minimising the estimated duration of the plan (walking and actions, cf. self.travelCosts)
+                instead of its number of steps. Defaults to False.
+        """
+        self.logFunction = logFunction
+        self.constantOrders = hasattr(constantOrderList, "__len__")
+        if self.constantOrders:
+            self.constantOrders = len(constantOrderList) != 0
+
+        if self.constantOrders:
+            self.stackOrders = constantOrderList
+            self.log("Constant order list.", "info")
+        else:
+            self.stackOrders = []
+
+        self.state = False
+        self.replanCounter = 0
+        self.currentOrderStep = 0
+        # Observations and goals submitted from any thread, taken at once by update()
+        self.intake = IntakeQueue()
+        self.intakeSequence = 0
+        self.planSequence = 0
+        # Observations and goals being planned, only used by the planning thread
+        self.currentObsDict = {}
+        self.currentAnswerSet = None
+        self.currentGoals = []
+        self.currentInitSituation = []
+        self.departedCustomers = set()
+        self.aspFilePath = FILE_PATH / "ProgramASP.sparc"
+        self.program = ProgramASP(self.aspFilePath)
+        self.domain = RestaurantDomain.fromProgram(self.program)
+        self.planCheck = planCheck
+        self.planGoals = []
+        self.planner = planner
+        self.nativePlanner = NativePlanner(self.domain)
+        self.plannerDifferences = 0
+        if not solver:
+            solver = SparcSolver(
+                poolSize=(os.cpu_count() or 1) if parallelHorizons else 1,
+                logFunction=self.log,
+            )
+        self.solver = solver
+        self.parallelHorizons = parallelHorizons
+        self.planCache = PlanCache(planCacheSize)
+        self.horizonBounds = PlanCache(HORIZON_MEMORY)
+        self.horizonEstimate = 0
+        self.solveDeadline = solveDeadline
+        self.cancelObsolete = cancelObsolete
+        self.translateStatic = translateStatic
+        self.optimalPlan = optimalPlan
+        self.travelCost = travelCost
+        self.travelCosts = TravelCostModel()
+        self._solving = False
+        self.metrics = PipelineMetrics(
+            logFunction=(lambda msg: self.log(msg, "info")) if logTimings else None
+        )
+        self._stackTime = time.time()
+        self.debounceDelay = debounceDelay
+        self._lastObservationTime = 0.0
+        self._wakeUp = threading.Condition()
+        self.planVersion = 0
+        self._planWaiters = []
+        self._serviceThread = None
+
+        self.currentGoalStep = 0
+
+        self.resetAll()
+
+    def log(self, message: str, log_type: str = "info"):
+        if self.logFunction:
+            self.logFunction(message, log_type)
+
+    def serve(self):
+        """Planning loop, never returns. A failed update (e.g. no Java runtime) is logged and the loop goes on."""
+        while True:
+            # Sleep until active with new observations (cf. submit_observation and setState)
+            with self._wakeUp:
+                self._wakeUp.wait_for(
+                    lambda: self.state and self.intake.hasObservations()
+                )
+                self.waitDebounce()
+            try:
+                self.update()
+            except Exception as e:
+                self.log(
+                    "Planning update failed ({}: {})".format(type(e).__name__, e),
+                    "error",
+                )
+
+    def start(self):
+        """Run serve() in a background (daemon) thread."""
+        if self._serviceThread is None:
+            self._serviceThread = threading.Thread(target=self.serve, daemon=True)
+            self._serviceThread.start()
+
+    def waitDebounce(self):
+        """Wait until no observation has been received for debounceDelay seconds.
+        Must be called with _wakeUp acquired."""
+        while True:
+            remaining = self._lastObservationTime + self.debounceDelay - time.time()
+            if remaining <= 0.0:
+                return
+            self._wakeUp.wait(remaining)
+
+    def setState(self, b: bool):
+        """Activate or deactivate ASP computation.
+
+        Args:
+            b (bool): True -> Activate | False -> Deactivate
+        """
+        with self._wakeUp:
+            self.state = b
+            self._wakeUp.notify_all()
+
+    def setLayout(self, graph, objects, prune: bool = False):
+        """Plan on the layout of the scene (nodes, tables, capacities) instead of the one of the template.
+
+        Args:
+            graph (SpatialGraph): Navigation graph of the scene.
+            objects (ObjectSet): Furniture of the scene.
+            prune (bool, optional): Leave out the tables and nodes that cannot affect the current goals,
+                the full layout being solved again if the pruned one has no plan. Defaults to False.
+        """
+        self.program.setLayout(SceneLayout(graph, objects), prune)
+        self.travelCosts.setLengths(self.program.layout.lengths)
+        self.travelCosts.setDistanceFunction(graph.getDistance)
+        self.domain = RestaurantDomain.fromProgram(self.program)
+        self.nativePlanner.domain = self.domain
+        self.log(
+            "Scene layout: {} nodes, {} tables, entrance {}.".format(
+                len(self.program.layout.nodes),
+                len(self.program.layout.tables),
+                self.program.layout.entrance,
+            ),
+            "info",
+        )
+
+    def resetMaxSteps(self):
+        self.replanCounter = 0
+        # self.clearObservations()
+        self.writeStepsLimit(0)
+
+    def getCurrentOrderStep(self):
+        return self.currentOrderStep
+
+    def update(self):
+        """Call the ASP program (built from aspFilePath) and update orders stack."""
+        if not self.constantOrders:
+            with self.metrics.span("update"):
+                # self.log("Update ASP", 'update_asp')
+                batch = self.intake.take()
+                self.currentObsDict = batch.getObservations()
+                self.currentGoals = batch.getGoals()
+                self.intakeSequence = batch.getLastSequence(self.intakeSequence)
+
+                if self.planCheck:
+                    with self.metrics.span("plan_check"):
+                        if self.isCurrentPlanValid():
+                            self.planSequence = self.intakeSequence
+                            self.publishPlan()
+                            return
+
+                # Update initial situation accordingly to orders achieved by the robot
+                with self.metrics.span("init_situation"):
+                    self.updateInitSituation(self.currentGoalStep)
+                with self.metrics.span("write_init"):
+                    if self.currentGoalStep > 0:
+                        self.clearInitSituation()
+                    self.writeInitSituation()
+                    self.forgetDepartedCustomers()
+
+                # Kept to put the update back in the queue if the solve is cancelled
+                pendingSections = {
+                    name: self.program.getSection(name)
+                    for name in self.program.SECTIONS
+                }
+                pendingPlanGoals = self.planGoals
+                pendingReplanCounter = self.replanCounter
+
+                tmpStackOrder = self.stackOrders
+                self.horizonEstimate = self.estimateHorizon(len(self.currentGoals))
+                self.stackOrders = []
+                with self.metrics.span("write_obs"):
+                    self.clearObservations()
+                    self.writeObservations()
+
+                with self.metrics.span("write_goal"):
+                    self.clearGoals()
+                    self.writeGoals()  # Add goals linked to new observations to the Sparc file
+
+                # Steps are re-based at every replan: the bound only depends on the problem
+                self.replanCounter += 1
+                self.writeStepsLimit(MAX_HORIZON)
+                self.planGoals = self.currentGoals
+                self.currentObsDict = {}
+                self.currentGoals = []
+                self.currentInitSituation = []
+
+                try:
+                    consistent = self.callASP()
+                except SolveCancelled:
+                    # Obsolete solve: the update is done again with the newer observations
+                    for name, rules in pendingSections.items():
+                        self.program.clearSection(name)
+                        self.program.addToSection(name, rules)
+                    self.planGoals = pendingPlanGoals
+                    self.replanCounter = pendingReplanCounter
+                    self.stackOrders = tmpStackOrder
+                    self.intake.requeue(batch)
+                    self.log(
+                        "Solve cancelled by new observations ({})".format(self.solver),
+                        "update_asp",
+                    )
+                    return
+
+                if not consistent:  # If ASP inconsistent or deadline passed
+                    self.stackOrders = tmpStackOrder
+                    if len(batch) > 0:
+                        self.log(
+                            "Observations and goals {} dropped".format(
+                                batch.getSequences()
+                            ),
+                            "error",
+                        )
+
+    def isCurrentPlanValid(self) -> bool:
+        """Replay the remaining orders against the causal laws (cf. RestaurantModel) with the new observations and goals.
+        If they still reach every goal, the plan is kept and the new observations and goals are consumed.
+
+        Returns:
+            bool: True if the current plan is still valid.
+        """
+        if not self.currentAnswerSet or len(self.stackOrders) == 0:
+            return False
+
+        state = RestaurantState.fromFluents(
+            self.domain, self.currentAnswerSet.getHolds(self.currentOrderStep)
+        )
+        goals = self.planGoals + self.currentGoals
+        states = isPlanValid(
+            state,
+            self.stackOrders[self.currentOrderStep :],
+            self.currentObsDict,
+            goals,
+        )
+        if states is None:
+            return False
+
+        # Replayed states replace the planned ones, the last one being the next initial situation
+        for i, s in enumerate(states):
+            self.currentAnswerSet.setHolds(self.currentOrderStep + i, s.getFluents())
+        self.planGoals = goals
+        self.currentObsDict = {}
+        self.currentGoals = []
+        self.log("Current plan still valid, solver not called.", "update_asp")
+        return True
+
+    def writeStepsLimit(self, n: int):
+        """Change step limit of the program.
+
+        Args:
+            n (int>0): New step limit
+        """
+        self.program.nstep = n
+
+    def updateInitSituation(self, stepNbr: int):
+        """Finds what holds true at step stepNbr in the last answer set
+        and stores the result as the new initial situation."""
+        if self.currentAnswerSet:
+            self.currentInitSituation += self.currentAnswerSet.getHolds(stepNbr)
+        return True
+
+    def writeInitSituation(self, initSituation=None):
+        """Add the new initial situation to the program."""
+        if not hasattr(initSituation, "__len__"):
+            initSituation = self.currentInitSituation
+        else:
+            # Customers given in the situation are in the room, even if their ID number belonged to a departed one
+            present = set(re.findall(r"\bc\d+\b", " ".join(initSituation)))
+            with self._wakeUp:
+                self.departedCustomers -= present
+
+        self.program.addToSection(
+            "init", ["holds(" + initSit + ", 0)." for initSit in initSituation]
+        )
+
+    def removeCustomers(self, customers: list):
+        """Customers who left the restaurant (e.g. ['c3', 'c4']), forgotten at the next update."""
+        with self._wakeUp:
+            self.departedCustomers.update(customers)
+
+    def forgetDepartedCustomers(self):
+        """Remove the fluents of departed customers from the initial situation of the program.
+        Table occupancy is removed as well, being a defined fluent it is computed again from the remaining customers.
+        """
+        with self._wakeUp:
+            departed = self.departedCustomers
+            self.departedCustomers = set()
+        if len(departed) == 0:
+            return
+
+        initSituation = []
+        for rule in self.program.getSection("init"):
+            fluent = parseTerm(rule.rstrip(".")).args[0]
+            if fluent.name in ("hasoccupancy", "isfree"):
+                continue
+            if any(str(arg) in departed for arg in fluent.args):
+                continue
+            initSituation.append(rule)
+        self.clearInitSituation()
+        self.program.addToSection("init", initSituation)
+
+    def writeGoals(self):
+        newGoals = []
+
+        for goal in self.currentGoals:
+            newGoals.append("goal(I):- holds(" + goal + ",I).")
+
+        self.program.addToSection("goal", newGoals)
+
+    def writeObservations(self):
+        """Write observations stored in currentObsDict in the program."""
+        newObs = []
+        for obs in self.currentObsDict.keys():
+            newObs.append(
+                "obs({},{},{}).".format(
+                    obs,
+                    "true" if self.currentObsDict[obs] else "false",
+                    OBSERVATION_STEP,
+                )
+            )
+
+        self.program.addToSection("obs", newObs)
+
+    def resetAll(self):
+        with self._wakeUp:
+            self.departedCustomers = set()
+        self.resetMaxSteps()
+        self.clearGoals()
+        self.clearInitSituation()
+        self.clearObservations()
+
+    def clearInitSituation(self):
+        """Erase initial situations in the program."""
+        self.program.clearSection("init")
+
+    def clearGoals(self):
+        """Erase all goals in the program."""
+        self.program.clearSection("goal")
+
+    def clearObservations(self):
+        """Erase all observations in the program."""
+        self.program.clearSection("obs")
+
+    def getDeadline(self) -> float:
+        """Time (as time.time()) at which the solver must give up the current update, None if there is no limit."""
+        if self.solveDeadline is None:
+            return None
+        return time.time() + self.solveDeadline
+
+    def estimateHorizon(self, newGoals: int) -> int:
+        """First horizon tried by the search: one step per new goal.
+        The orders left in the previous plan are not counted, the initial situation being taken at its goal step.
+        """
+        return min(max(newGoals, 0), MAX_HORIZON)
+
+    def get_minimial_plan(self, deadline: float = None) -> AnswerSet:
+        """Smallest horizon with a plan, searched downward from the estimate if it is satisfiable, upward otherwise.
+        Horizons proven (un)satisfiable for the same problem are not solved again (cf. horizonBounds).
+        If the deadline (as time.time()) passes, the shortest plan found so far is used.
+        """
+        if self.parallelHorizons:
+            return self.get_minimial_plan_parallel(deadline)
+
+        # Largest unsatisfiable and smallest satisfiable horizons known for this problem
+        key = self.program.problemFingerprint()
+        unsat, sat = self.horizonBounds.get(key) or (-1, None)
+        ceiling = max(MAX_HORIZON, self.program.nstep)
+        n = max(self.horizonEstimate, unsat + 1)
+        if sat is not None:
+            n = min(n, sat)
+
+        answerSets = {}
+        while True:
+            try:
+                while unsat + 1 != sat and n <= ceiling:
+                    try:
+                        output = self.solveHorizon(n, getRemainingTime(deadline))
+                    except SolveTimeout:
+                        self.log(
+                            "Solver deadline passed at horizon {} ({})".format(
+                                n, self.solver
+                            ),
+                            "error",
+                        )
+                        break
+                    with self.metrics.span("parse", horizon=n):
+                        parsed = parseAnswerSets(output)
+
+                    if len(parsed) > 0:
+                        answerSets[n] = parsed[0]
+                        sat = n
+                        n -= 1
+                    else:
+                        unsat = n
+                        n += 1
+            finally:
+                self.horizonBounds.put(key, (unsat, sat))
+
+            if sat is None or sat in answerSets:
+                break
+            if getRemainingTime(deadline) == 0.0:
+                return None
+
+            # Known from a previous search, solved again within the time left
+            try:
+                output = self.solveHorizon(sat, getRemainingTime(deadline))
+            except SolveTimeout:
+                self.log(
+                    "Solver deadline passed at horizon {} ({})".format(
+                        sat, self.solver
+                    ),
+                    "error",
+                )
+                return None
+            with self.metrics.span("parse", horizon=sat):
+                parsed = parseAnswerSets(output)
+            if len(parsed) > 0:
+                answerSets[sat] = parsed[0]
+                break
+            # No plan at the remembered horizon any more: the search goes on above it
+            unsat, sat = sat, None
+            n = unsat + 1
+
+        if sat is None:
+            return None
+        self.writeStepsLimit(sat)
+        return answerSets[sat]
+
+    def isSatisfiable(self, output: str) -> bool:
+        return "{" in output
+
+    def solveHorizon(self, n: int, timeout: float = None) -> str:
+        """Solve the program with step limit n, reusing the plan cache when possible.
+
+        Raises:
+            SolveCancelled: The solve was made obsolete by a new observation.
+            SolveTimeout: The solve lasted more than timeout seconds.
+        """
+        key = self.program.fingerprint(n)
+        output = self.planCache.get(key)
+        if output is None:
+            self._solving = True
+            try:
+                if self.translateStatic:
+                    output = self.solveHorizonTranslated(n, timeout)
+                if output is None:
+                    with self.metrics.span("render", horizon=n):
+                        program = self.program.render(n)
+                    with self.metrics.span(
+                        "solve", horizon=n, cold=not self.solver.isWarm()
+                    ):
+                        output = self.solver.solve(program, timeout)
+            finally:
+                self._solving = False
+            self.planCache.put(key, output)
+        return output
+
+    def solveHorizonTranslated(self, n: int, timeout: float = None) -> str:
+        """Solve with step limit n on the translated static part (cf. SparcSolver.solveTranslated).
+
+        Returns:
+            str: Answer sets, None if the dynamic rules do not fit the static part (the full program must be solved).
+        """
+        with self.metrics.span("render", horizon=n):
+            program = self.program.renderStatic()
+            dynamicRules = self.program.renderDynamic()
+        try:
+            with self.metrics.span("solve", horizon=n, translated=True):
+                return self.solver.solveTranslated(
+                    program,
+                    dynamicRules,
+                    timeout,
+                    nstep=n,
+                    constants=self.program.getDynamicConstants(),
+                )
+        except TranslationError as e:
+            self.log("{}, solving the full program.".format(e), "info")
+            return None
+
+    def get_minimial_plan_parallel(self, deadline: float = None) -> AnswerSet:
+        """Same search as get_minimial_plan, with horizons solved concurrently by the solver workers.
+        If the deadline passes, the shortest plan found so far is used."""
+        key = self.program.problemFingerprint()
+        unsat, sat = self.horizonBounds.get(key) or (-1, None)
+        ceiling = MAX_HORIZON if sat is None else sat
+        horizons = []
+        cached = None
+        for n in range(unsat + 1, ceiling + 1):
+            output = self.planCache.get(self.program.fingerprint(n))
+            if output is None:
+                horizons.append(n)
+            elif self.isSatisfiable(output):
+                cached = (n, output)
+                break
+        horizons = self.prioritizeHorizons(
+            horizons, max(self.horizonEstimate, unsat + 1)
+        )
+
+        results = {}
+        result = None
+        if len(horizons) > 0:
+            self._solving = True
+            try:
+                with self.metrics.span("solve", horizons=len(horizons)):
+                    result = self.solver.findMinimalHorizon(
+                        self.program.render,
+                        horizons,
+                        self.isSatisfiable,
+                        results,
+                        getRemainingTime(deadline),
+                    )
+            finally:
+                self._solving = False
+                for m, output in results.items():
+                    self.planCache.put(self.program.fingerprint(m), output)
+
+        if not result:
+            result = cached
+        if not result:
+            return None
+
+        n, output = result
+        unsat = max(
+            [unsat]
+            + [m for m, o in results.items() if m < n and not self.isSatisfiable(o)]
+        )
+        self.horizonBounds.put(key, (unsat, n if sat is None else min(n, sat)))
+        self.writeStepsLimit(n)
+        with self.metrics.span("parse", horizon=n):
+            return parseAnswerSets(output)[0]
+
+    def prioritizeHorizons(self, horizons: list, estimate: int) -> list:
+        """Horizons in the order they are given to the solver workers: the estimate first, then the closest ones,
+        the shorter one first on ties, so that the workers start where the minimal plan most likely is.
+        """
+        return sorted(horizons, key=lambda n: (abs(n - estimate), n))
+
+    def get_optimal_plan(self, deadline: float = None) -> AnswerSet:
+        """Minimal plan from a single solve at the maximum horizon, clingo minimising the step at which a goal holds,
+        or the estimated duration of the plan if travelCost. An inconsistent problem is proven by this one solve.
+        The static part is translated once (cf. SparcSolver.solveTranslated) and the optimization statements
+        are given to clingo with the dynamic rules."""
+        n = max(MAX_HORIZON, self.program.nstep)
+        if self.travelCost:
+            objective = self.travelCosts.render()
+            key = self.program.fingerprint(n) + ":" + self.travelCosts.fingerprint()
+        else:
+            objective = self.program.MINIMIZE_GOAL_STEP
+            key = self.program.fingerprint(n) + ":optimal"
+        output = self.planCache.get(key)
+        if output is None:
+            with self.metrics.span("render", horizon=n):
+                program = self.program.renderStatic()
+                dynamicRules = self.program.renderDynamic() + objective
+            self._solving = True
+            try:
+                with self.metrics.span("solve", horizon=n, optimal=True):
+                    output = self.solver.solveTranslated(
+                        program,
+                        dynamicRules,
+                        getRemainingTime(deadline),
+                        optimize=True,
+                        nstep=n,
+                        constants=self.program.getDynamicConstants(),
+                        predicates=self.program.OPTIMIZATION_PREDICATES,
+                    )
+            except SolveTimeout:
+                self.log("Solver deadline passed ({})".format(self.solver), "error")
+                return None
+            except TranslationError as e:
+                self.log("{}, searching the minimal horizon.".format(e), "info")
+                return self.get_minimial_plan(deadline)
+            finally:
+                self._solving = False
+            self.planCache.put(key, output)
+
+        with self.metrics.span("parse", horizon=n):
+            parsed = parseAnswerSets(output)
+        if len(parsed) == 0:
+            return None
+        goalStep = parsed[0].getGoalStep()
+        if not self.travelCost:
+            # A shorter walk can take more steps than the minimal horizon
+            self.horizonBounds.put(
+                self.program.problemFingerprint(), (goalStep - 1, goalStep)
+            )
+        self.writeStepsLimit(goalStep)
+        return parsed[0]
+
+    def findMinimalPlan(self) -> AnswerSet:
+        deadline = self.getDeadline()
+        answerSet = self.findMinimalPlanOnLayout(deadline)
+        if (
+            answerSet is None
+            and self.program.prune
+            and getRemainingTime(deadline) != 0.0
+        ):
+            # The pruned layout may lack a detour around a waiter: the problem is only inconsistent if the full one is
+            self.log(
+                "No plan on the pruned layout, solving on the full layout.", "info"
+            )
+            self.program.prune = False
+            try:
+                answerSet = self.findMinimalPlanOnLayout(deadline)
+            finally:
+                self.program.prune = True
+        return answerSet
+
+    def findMinimalPlanOnLayout(self, deadline: float = None) -> AnswerSet:
+        if self.optimalPlan or self.travelCost:
+            return self.get_optimal_plan(deadline)
+        return self.get_minimial_plan(deadline)
+
+    def findPlan(self) -> AnswerSet:
+        """Minimal plan from the backend selected by self.planner."""
+        if self.planner == "sparc":
+            return self.findMinimalPlan()
+
+        with self.metrics.span("native_plan"):
+            nativeAnswerSet = self.nativePlanner.planProgram(self.program, MAX_HORIZON)
+        if self.planner == "native" and nativeAnswerSet:
+            return nativeAnswerSet
+
+        answerSet = self.findMinimalPlan()
+        if self.planner == "crosscheck":
+            self.comparePlans(nativeAnswerSet, answerSet)
+        return answerSet
+
+    def comparePlans(self, nativeAnswerSet: AnswerSet, answerSet: AnswerSet):
+        """Log differences between the native and the SPARC plans."""
+        nativeOrders = nativeAnswerSet.getOrders() if nativeAnswerSet else None
+        orders = answerSet.getOrders() if answerSet else None
+        if nativeOrders == orders:
+            return
+
+        self.plannerDifferences += 1
+        if nativeOrders is None or orders is None or len(nativeOrders) != len(orders):
+            log_type = "error"
+        else:
+            log_type = "info"  # Same length, both plans are minimal
+        self.log(
+            "Planners differ:\nNative: {}\nSPARC: {}".format(nativeOrders, orders),
+            log_type,
+        )
+
+    def callASP(self):
+        ## Formatting, running the command and retrieving, formatting the output
+        self.log(
+            "Run ASP solver ({}, {})".format(self.planCache, self.solver), "system"
+        )
+        answerSet = self.findPlan()
+        if answerSet:
+            self.currentAnswerSet = answerSet
+            self.planSequence = self.intakeSequence
+            self.stackOrders = answerSet.getOrders()
+            self.currentOrderStep = 0
+            self._stackTime = time.time()
+
+            # Step at which the goal is archieved, corresponding to the new initial situation
+            self.currentGoalStep = answerSet.getGoalStep()
+
+            self.log(
+                "New order stack:\n{}\n({})".format(
+                    self.stackOrders, self.describePlanCost(answerSet)
+                ),
+                "system",
+            )
+            self.publishPlan()
+
+            return True
+
+        else:
+            self.stackOrders = []
+            self.currentOrderStep = 0
+            self.log("The ASP program is inconsistent", "error")
+            return False
+
+    def describePlanCost(self, answerSet: AnswerSet) -> str:
+        start = None
+        for fluent in answerSet.getHolds(0):
+            term = parseTerm(fluent)
+            if term.name == "currentlocation" and str(term.args[0]) == "agent":
+                start = str(term.args[1])
+        orders = answerSet.getOrders()
+        return "{:.1f} m, about {:.0f} s".format(
+            self.travelCosts.getDistance(orders, start),
+            self.travelCosts.getDuration(orders, start),
+        )
+
+    def reportTraversal(self, fromNode: str, toNode: str, duration: float):
+        """Time (s) the robot took to walk along an edge, calibrating the travel cost model."""
+        if self.travelCosts.addTraversal(fromNode, toNode, duration):
+            self.metrics.record(
+                "traversal", duration, edge="{}-{}".format(fromNode, toNode)
+            )
+
+    def submit_goal(self, name: str) -> int:
+        """Add a goal, planned with the next observations.
+
+        Returns:
+            int: Sequence number of the goal (cf. Plan.covers).
+        """
+        self.log("Update ASP: add goal " + name, "update_asp")
+        sequence = self.intake.put(GOAL, name)
+        with self._wakeUp:
+            self._wakeUp.notify_all()
+        return sequence
+
+    def submit_observation(self, name: str, state: bool = True) -> int:
+        """Add an observation, triggering a new plan.
+
+        Returns:
+            int: Sequence number of the observation (cf. Plan.covers).
+        """
+        self.log("Update ASP: add observation " + name, "update_asp")
+        sequence = self.intake.put(OBSERVATION, name, state)
+        with self._wakeUp:
+            self._lastObservationTime = time.time()
+            self._wakeUp.notify_all()
+        if self.cancelObsolete and self._solving:
+            self.solver.cancel()
+        return sequence
+
+    def getCurrentOrder(self) -> str:
+        if len(self.stackOrders) > self.currentOrderStep:
+            return self.stackOrders[self.currentOrderStep]
+        else:
+            return None
+
+    def currentOrderCompleted(self) -> str:
+        """Update orders list.
+
+        Returns:
+            str: New order in the list.
+        """
+        if len(self.stackOrders) > self.currentOrderStep:
+            # Time spent by the order in the stack, from the plan computation to its completion
+            self.metrics.record(
+                "order",
+                time.time() - self._stackTime,
+                self._stackTime,
+                order=self.stackOrders[self.currentOrderStep],
+            )
+        self.currentOrderStep += 1
+        if len(self.stackOrders) > self.currentOrderStep:
+            return self.stackOrders[self.currentOrderStep]
+        else:
+            return None
+
+    def getCurrentPlan(self) -> Plan:
+        return Plan(
+            self.planVersion,
+            list(self.stackOrders),
+            self.currentAnswerSet,
+            self.planSequence,
+        )
+
+    def publishPlan(self):
+        """Hand the new order stack to the coroutines waiting in next_plan."""
+        with self._wakeUp:
+            self.planVersion += 1
+            plan = self.getCurrentPlan()
+            waiters = self._planWaiters
+            self._planWaiters = []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(setFutureResult, future, plan)
+
+    async def next_plan(self) -> Plan:
+        """Wait for the next plan computed by the service (cf. start).
+
+        Returns:
+            Plan: New order stack, with the answer set it comes from.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._wakeUp:
+            self._planWaiters.append((loop, future))
+        return await future
+
+
+def setFutureResult(future: asyncio.Future, result):
+    if not future.done():
+        future.set_result(result)
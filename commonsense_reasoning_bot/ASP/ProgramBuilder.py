@@ -0,0 +1,258 @@
+import hashlib
+import pathlib
+import re
+
+FILE_PATH = pathlib.Path(__file__).parent.absolute()
+# Smallest customer sort of the static part (cf. ProgramASP.getCustomerPool)
+CUSTOMER_POOL = 8
+
+
+class ProgramASP:
+    SECTIONS = ("init", "obs", "goal")
+    NSTEP = "nstep"
+    # Template lines describing the restaurant layout, replaced when a SceneLayout is set
+    LAYOUT_LINES = {
+        "cnum": "#const cnum =",
+        "tnum": "#const tnum =",
+        "maxcap": "#const maxcap =",
+        "nnum": "#const nnum =",
+        "node": "#node =",
+        "table": "#table =",
+        "customer": "#customer =",
+        "pick": "-occurs(pick(agent, Cu), I):- holds(currentlocation(agent, N), I), N !=",
+    }
+    LAYOUT_FACTS = ("hascapacity", "edge", "areassociated")
+    # Clingo statement minimising the steps with an action, that is the step at which a goal holds
+    # (cf. the planning module of the template), given to clingo with the translated program
+    MINIMIZE_GOAL_STEP = "#minimize { 1,I : something_happened(I) }.\n"
+    # Predicates of the template referred to by the optimization statements (cf. TravelCostModel.render),
+    # checked against the translation as SPARC could rename them
+    OPTIMIZATION_PREDICATES = ("holds", "occurs", "something_happened", "goal")
+
+    def __init__(self, templatePath=FILE_PATH / "ProgramASP.sparc"):
+        """In-memory SPARC program. The static domain rules are read once from templatePath,
+        the dynamic sections (between the %b_init/%e_init, %b_obs/%e_obs and %b_goal/%e_goal markers)
+        and the step limit are kept as Python structures and only rendered when the program is solved.
+
+        Args:
+            templatePath (pathlib.Path, optional): SPARC file used as template. Defaults to ASP/ProgramASP.sparc.
+        """
+        self.templatePath = pathlib.Path(templatePath)
+        self.nstep = 0
+        self._sections = {name: [] for name in self.SECTIONS}
+        self._segments = []
+        self._layoutDefaults = {}
+        self.layout = None
+        self.prune = False
+        self.loadTemplate()
+
+    def loadTemplate(self):
+        """Split the template in static text segments and dynamic section slots.
+        The rules already written in the dynamic sections are loaded as their initial content.
+        Layout lines (cf. LAYOUT_LINES and LAYOUT_FACTS) get their own slots, ("layout", key),
+        holding the template text as default.
+        """
+        self._segments = []
+        self._layoutDefaults = {}
+        static = []
+        zone = None
+
+        for line in self.templatePath.read_text().splitlines(keepends=True):
+            if "#const nstep =" in line:
+                self.nstep = int(line.split("=")[1].strip(" .\n"))
+                self._segments += ["".join(static), self.NSTEP]
+                static = []
+                continue
+
+            key = self.getLayoutKey(line)
+            if key is not None and zone is None:
+                # Facts of a predicate are gathered in the slot of the first one
+                if key not in self._layoutDefaults:
+                    self._layoutDefaults[key] = ""
+                    self._segments += ["".join(static), ("layout", key)]
+                    static = []
+                self._layoutDefaults[key] += line
+                continue
+
+            marker = line.strip()
+            if marker[:3] == "%b_" and marker[3:] in self.SECTIONS:
+                static.append(line)
+                zone = marker[3:]
+                self._segments += ["".join(static), zone]
+                static = []
+                continue
+            if marker[:3] == "%e_" and marker[3:] == zone:
+                zone = None
+
+            if zone and line[0] != "%":
+                self._sections[zone].append(line.strip())
+            else:
+                static.append(line)
+
+        self._segments.append("".join(static))
+
+    def getLayoutKey(self, line: str):
+        """Layout key of a template line, None if the line does not describe the layout."""
+        for key, start in self.LAYOUT_LINES.items():
+            if line.startswith(start):
+                return key
+        code = line.split("%")[0].strip()
+        for predicate in self.LAYOUT_FACTS:
+            if (
+                code.startswith(predicate + "(")
+                and ":-" not in code
+                and "#" not in code
+            ):
+                return predicate
+        return None
+
+    def setLayout(self, layout, prune: bool = False):
+        """Use the layout of the scene instead of the one hard-coded in the template.
+
+        Args:
+            layout (SceneLayout): Layout of the scene, None to go back to the template.
+            prune (bool, optional): Leave out the tables and nodes that cannot affect the current goals. Defaults to False.
+        """
+        self.layout = layout
+        self.prune = prune
+
+    def getStaticFacts(self, predicate: str) -> list:
+        """Ground facts of predicate written in the static rules, e.g. 'edge(n1, n2).' for 'edge'.
+
+        Returns:
+            [str]: Facts without the final dot.
+        """
+        if self.layout is not None and predicate in self.LAYOUT_FACTS:
+            return self.layout.getFacts(predicate)
+
+        facts = []
+        for segment in self._segments:
+            if isinstance(segment, tuple):
+                segment = self._layoutDefaults[segment[1]]
+            elif segment == self.NSTEP or segment in self._sections:
+                continue
+            for line in segment.splitlines():
+                line = line.split("%")[0].strip()
+                if (
+                    line.startswith(predicate + "(")
+                    and ":-" not in line
+                    and "#" not in line
+                ):
+                    facts.append(line.rstrip("."))
+        return facts
+
+    def getSection(self, name: str) -> list:
+        return list(self._sections[name])
+
+    def addToSection(self, name: str, rules: list):
+        """Append rules (without line break) to a dynamic section."""
+        self._sections[name].extend(rules)
+
+    def clearSection(self, name: str):
+        self._sections[name] = []
+
+    def clearAll(self):
+        for name in self.SECTIONS:
+            self.clearSection(name)
+
+    def render(self, nstep: int = None, dynamic: bool = True) -> str:
+        """Full SPARC program text.
+
+        Args:
+            nstep (int, optional): Step limit, self.nstep if not given. Defaults to None.
+            dynamic (bool, optional): Write the rules of the dynamic sections, otherwise only the static part (cf. renderStatic),
+                whose sorts cover the whole layout and a pool of customers instead of the elements of the dynamic sections.
+                Defaults to True.
+
+        Returns:
+            str: Program ready to be sent to the solver.
+        """
+        layoutLines = {}
+        if self.layout is not None and dynamic:
+            layoutLines = self.layout.renderLines(self._sections, self.prune)
+        elif self.layout is not None:
+            layoutLines = self.layout.renderLines({}, customers=self.getCustomerPool())
+
+        out = []
+        for segment in self._segments:
+            if isinstance(segment, tuple):
+                key = segment[1]
+                out.append(layoutLines.get(key, self._layoutDefaults[key]))
+            elif segment == self.NSTEP:
+                out.append(
+                    "#const nstep = {}.\n".format(
+                        self.nstep if nstep is None else nstep
+                    )
+                )
+            elif segment in self._sections:
+                if dynamic:
+                    out += [rule + "\n" for rule in self._sections[segment]]
+            else:
+                out.append(segment)
+        return "".join(out)
+
+    def renderStatic(self) -> str:
+        """Static part of the program, with step limit 0: it does not depend on the dynamic sections nor on the horizon,
+        so that SPARC translates it once (cf. SparcSolver.solveTranslated, setting the horizon on the translation).
+        """
+        return self.render(0, dynamic=False)
+
+    def getCustomerPool(self) -> list:
+        """Customer sort of the static part: c1 to cN, N being the highest customer number of the dynamic sections
+        rounded up to a power of two (CUSTOMER_POOL at least), so that the sort does not change with every new customer.
+        """
+        numbers = [int(n) for n in re.findall(r"\bc(\d+)\b", self.renderDynamic())]
+        size = CUSTOMER_POOL
+        while size < max(numbers, default=0):
+            size *= 2
+        return ["c{}".format(i) for i in range(1, size + 1)]
+
+    def getDynamicConstants(self) -> list:
+        """Customers, tables, nodes and waiters named in the dynamic sections, which must belong to the sorts of the program."""
+        return sorted(set(re.findall(r"\b(?:c|table|n|w)\d+\b", self.renderDynamic())))
+
+    def renderDynamic(self) -> str:
+        """Rules of the dynamic sections only, to be added to the static part (cf. render)."""
+        return "".join(
+            rule + "\n" for name in self.SECTIONS for rule in self._sections[name]
+        )
+
+    def fingerprint(self, nstep: int = None) -> str:
+        """Canonical hash of the planning problem: dynamic sections, step limit and layout.
+        Rules are compared without whitespace and regardless of their order.
+
+        Args:
+            nstep (int, optional): Step limit, self.nstep if not given. Defaults to None.
+
+        Returns:
+            str: Hexadecimal digest.
+        """
+        digest = self.getProblemDigest()
+        digest.update(
+            "#const nstep = {}.".format(self.nstep if nstep is None else nstep).encode(
+                "utf-8"
+            )
+        )
+        return digest.hexdigest()
+
+    def problemFingerprint(self) -> str:
+        """Same as fingerprint, whatever the step limit."""
+        return self.getProblemDigest().hexdigest()
+
+    def getProblemDigest(self):
+        digest = hashlib.sha1()
+        for name in self.SECTIONS:
+            rules = sorted(set("".join(rule.split()) for rule in self._sections[name]))
+            digest.update("%{}\n{}\n".format(name, "\n".join(rules)).encode("utf-8"))
+        if self.layout is not None:
+            digest.update(
+                "%layout {} {}".format(self.layout.fingerprint(), self.prune).encode(
+                    "utf-8"
+                )
+            )
+        return digest
+
+    def write(self, url, nstep: int = None):
+        """Write the rendered program to a file, to run it by hand (cf. runSparc.bat)."""
+        with open(url, "w") as fileAsp:
+            fileAsp.write(self.render(nstep))
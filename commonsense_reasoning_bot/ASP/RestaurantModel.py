@@ -0,0 +1,339 @@
+import re
+
+from ASP.AnswerSet import Term, parseTerm
+
+AGENT = "agent"
+
+
+class RestaurantDomain:
+    def __init__(self, edges=(), associations=(), capacities=None, entrance="n5"):
+        """Static layout of the restaurant domain of ProgramASP.sparc.
+
+        Args:
+            edges ([(str, str)], optional): Pathways between nodes (symmetric). Defaults to ().
+            associations ([(str, str)], optional): (node, table) pairs from which a table is served. Defaults to ().
+            capacities ({str:int}, optional): Capacity of each table. Defaults to None.
+            entrance (str, optional): Node where waiting customers are picked. Defaults to "n5".
+        """
+        self.neighbors = {}
+        for n1, n2 in edges:
+            self.neighbors.setdefault(n1, set()).add(n2)
+            self.neighbors.setdefault(n2, set()).add(n1)
+        self.associations = set(associations)
+        self.capacities = dict(capacities) if capacities else {}
+        self.entrance = entrance
+
+    @classmethod
+    def fromProgram(cls, program):
+        """Read the layout facts (edge, areassociated, hascapacity) of a ProgramASP."""
+        edges = [
+            tuple(str(a) for a in parseTerm(f).args)
+            for f in program.getStaticFacts("edge")
+        ]
+        associations = [
+            tuple(str(a) for a in parseTerm(f).args)
+            for f in program.getStaticFacts("areassociated")
+        ]
+        capacities = {}
+        for fact in program.getStaticFacts("hascapacity"):
+            table, capacity = parseTerm(fact).args
+            capacities[table.name] = int(capacity.name)
+
+        # Entrance node hard-coded in the executability condition of pick
+        match = re.search(
+            r"-occurs\(pick\(agent, *Cu\), *I\) *:- *holds\(currentlocation\(agent, *N\), *I\), *N *!= *(\w+)",
+            program.render(),
+        )
+        entrance = match.group(1) if match else "n5"
+        return cls(edges, associations, capacities, entrance)
+
+    def getTables(self) -> list:
+        return sorted(self.capacities.keys())
+
+    def getNodes(self) -> list:
+        return sorted(self.neighbors.keys())
+
+    def isAssociated(self, node: str, table: str) -> bool:
+        return (node, table) in self.associations
+
+
+class RestaurantState:
+    def __init__(self, domain: RestaurantDomain):
+        """Values of the inertial fluents of ProgramASP.sparc at one step.
+        Defined fluents (hasoccupancy, isfree) are computed from them."""
+        self.domain = domain
+        self.locations = {}
+        self.waiting = set()
+        self.withAgent = set()
+        self.atTable = {}
+        self.paid = set()
+        self.wantsBill = set()
+        self.groups = {}
+
+    @classmethod
+    def fromFluents(cls, domain: RestaurantDomain, fluents: list):
+        """Build a state from fluents as text, e.g. the holds of an answer set at a step."""
+        state = cls(domain)
+        for fluent in fluents:
+            state.setFluent(parseTerm(fluent) if isinstance(fluent, str) else fluent)
+        return state
+
+    def copy(self):
+        state = RestaurantState(self.domain)
+        state.locations = dict(self.locations)
+        state.waiting = set(self.waiting)
+        state.withAgent = set(self.withAgent)
+        state.atTable = dict(self.atTable)
+        state.paid = set(self.paid)
+        state.wantsBill = set(self.wantsBill)
+        state.groups = dict(self.groups)
+        return state
+
+    def key(self):
+        """Hashable summary of the state."""
+        return (
+            frozenset(self.locations.items()),
+            frozenset(self.waiting),
+            frozenset(self.withAgent),
+            frozenset(self.atTable.items()),
+            frozenset(self.paid),
+            frozenset(self.wantsBill),
+            frozenset(self.groups.values()),
+        )
+
+    def setFluent(self, fluent: Term):
+        args = [str(arg) for arg in fluent.args]
+        if fluent.name == "currentlocation":
+            self.locations[args[0]] = args[1]
+        elif fluent.name == "iswaiting":
+            self.waiting.add(args[0])
+        elif fluent.name == "iswith":
+            self.withAgent.add(args[1])
+        elif fluent.name == "isattable":
+            self.atTable[args[0]] = args[1]
+        elif fluent.name == "haspaid":
+            self.paid.add(args[0])
+        elif fluent.name == "wantsbill":
+            self.wantsBill.add(args[0])
+        elif fluent.name == "aretogether":
+            self.joinGroups(args[0], args[1])
+
+    def joinGroups(self, customer1: str, customer2: str):
+        group = self.getGroup(customer1) | self.getGroup(customer2)
+        for customer in group:
+            self.groups[customer] = group
+
+    def getGroup(self, customer: str) -> frozenset:
+        return self.groups.get(customer, frozenset([customer]))
+
+    def getOccupancy(self, table: str) -> int:
+        return sum(1 for t in self.atTable.values() if t == table)
+
+    def isFree(self, table: str) -> bool:
+        return self.getOccupancy(table) == 0
+
+    def getCustomers(self) -> set:
+        return (
+            set(self.groups.keys())
+            | self.waiting
+            | self.withAgent
+            | set(self.atTable.keys())
+            | self.paid
+        )
+
+    def getFluents(self) -> list:
+        """Fluents holding in this state, as text (same format as AnswerSet.getHolds)."""
+        fluents = [
+            "currentlocation({},{})".format(e, n) for e, n in self.locations.items()
+        ]
+        fluents += ["iswaiting({})".format(c) for c in sorted(self.waiting)]
+        fluents += ["iswith({},{})".format(AGENT, c) for c in sorted(self.withAgent)]
+        fluents += ["isattable({},{})".format(c, t) for c, t in self.atTable.items()]
+        fluents += ["haspaid({})".format(c) for c in sorted(self.paid)]
+        fluents += ["wantsbill({})".format(t) for t in sorted(self.wantsBill)]
+        for customer in sorted(self.getCustomers()):
+            for other in sorted(self.getGroup(customer)):
+                fluents.append("aretogether({},{})".format(customer, other))
+        for table in self.domain.getTables():
+            fluents.append(
+                "hasoccupancy({},{})".format(table, self.getOccupancy(table))
+            )
+            if self.isFree(table):
+                fluents.append("isfree({})".format(table))
+        return fluents
+
+    ## Observations ##
+
+    def applyObservation(self, observation: Term, value: bool = True) -> bool:
+        """Apply an observable (has_entered, bill_wave, group).
+
+        Returns:
+            bool: False if the observation cannot be modeled here.
+        """
+        args = [str(arg) for arg in observation.args]
+        if not value:
+            return False
+        if observation.name == "has_entered":
+            # A seated customer or one with the agent cannot be waiting
+            if args[0] in self.withAgent or args[0] in self.atTable:
+                return False
+            self.waiting.add(args[0])
+            return True
+        if observation.name == "bill_wave":
+            self.wantsBill.add(args[0])
+            return True
+        if observation.name == "group":
+            self.joinGroups(args[0], args[1])
+            return True
+        return False
+
+    ## Actions ##
+
+    def isExecutable(self, action: Term) -> bool:
+        """Executability conditions of the actions of ProgramASP.sparc."""
+        args = [str(arg) for arg in action.args]
+        if len(args) == 0 or args[0] != AGENT:
+            return False
+        location = self.locations.get(AGENT)
+
+        if action.name == "go_to":
+            node = args[1]
+            if node == location or node not in self.domain.neighbors.get(location, ()):
+                return False
+            return not any(n == node for e, n in self.locations.items() if e != AGENT)
+
+        if action.name == "pick":
+            customer = args[1]
+            if location != self.domain.entrance or customer not in self.waiting:
+                return False
+            if not any(self.isFree(t) for t in self.domain.getTables()):
+                return False
+            # The agent cannot manage two groups at once
+            group = self.getGroup(customer)
+            return all(c in group for c in self.withAgent)
+
+        if action.name == "seat":
+            customer, table = args[1], args[2]
+            if customer not in self.withAgent:
+                return False
+            if not self.domain.isAssociated(location, table) or not self.isFree(table):
+                return False
+            return len(self.getGroup(customer)) <= self.domain.capacities.get(table, 0)
+
+        if action.name == "give_bill":
+            table = args[1]
+            return (
+                table in self.wantsBill
+                and not self.isFree(table)
+                and self.domain.isAssociated(location, table)
+            )
+
+        return False
+
+    def apply(self, action: Term):
+        """Causal laws: new state after action (executability is not checked)."""
+        state = self.copy()
+        args = [str(arg) for arg in action.args]
+
+        if action.name == "go_to":
+            state.locations[AGENT] = args[1]
+        elif action.name == "pick":
+            for customer in self.getGroup(args[1]):
+                state.waiting.discard(customer)
+                state.withAgent.add(customer)
+        elif action.name == "seat":
+            for customer in self.getGroup(args[1]):
+                state.atTable[customer] = args[2]
+                state.withAgent.discard(customer)
+                state.waiting.discard(customer)
+        elif action.name == "give_bill":
+            for customer, table in self.atTable.items():
+                if table == args[1]:
+                    state.paid.add(customer)
+            state.wantsBill.discard(args[1])
+        return state
+
+    def getPossibleActions(self) -> list:
+        """All executable actions of the agent in this state."""
+        location = self.locations.get(AGENT)
+        actions = [
+            Term("go_to", (Term(AGENT, ()), Term(node, ())))
+            for node in sorted(self.domain.neighbors.get(location, ()))
+        ]
+        for customer in sorted(self.waiting):
+            actions.append(Term("pick", (Term(AGENT, ()), Term(customer, ()))))
+        for customer in sorted(self.withAgent):
+            for table in self.domain.getTables():
+                actions.append(
+                    Term("seat", (Term(AGENT, ()), Term(customer, ()), Term(table, ())))
+                )
+        for table in sorted(self.wantsBill):
+            actions.append(Term("give_bill", (Term(AGENT, ()), Term(table, ()))))
+        return [action for action in actions if self.isExecutable(action)]
+
+    ## Goals ##
+
+    def satisfies(self, goal: Term) -> bool:
+        """True if a fluent of the state matches goal. Arguments starting with
+        an uppercase letter are variables, e.g. isattable(c1, T)."""
+        for fluent in self.getFluents():
+            if fluent.startswith(goal.name + "(") and matchTerm(
+                goal, parseTerm(fluent), {}
+            ):
+                return True
+        return False
+
+
+def matchTerm(pattern: Term, term: Term, bindings: dict) -> bool:
+    if len(pattern.args) == 0 and pattern.name[:1].isupper():
+        if pattern.name in bindings:
+            return bindings[pattern.name] == term
+        bindings[pattern.name] = term
+        return True
+    if pattern.name != term.name or len(pattern.args) != len(term.args):
+        return False
+    return all(matchTerm(p, t, bindings) for p, t in zip(pattern.args, term.args))
+
+
+def replayPlan(state: RestaurantState, orders: list):
+    """Replay orders from state with the causal laws.
+
+    Args:
+        state (RestaurantState): Starting state.
+        orders ([str]): Orders, e.g. ['go_to(agent,n5)', 'pick(agent,c1)'].
+
+    Returns:
+        [RestaurantState]: States after each order (starting state first), None if an order is not executable.
+    """
+    states = [state]
+    for order in orders:
+        action = parseTerm(order)
+        if not states[-1].isExecutable(action):
+            return None
+        states.append(states[-1].apply(action))
+    return states
+
+
+def isPlanValid(state: RestaurantState, orders: list, observations: dict, goals: list):
+    """Check if orders still reach every goal once the new observations are taken into account.
+
+    Args:
+        state (RestaurantState): State in which the first order is executed.
+        orders ([str]): Remaining orders.
+        observations ({str:bool}): New observations, applied to state.
+        goals ([str]): Goals that must all hold at the end of the plan.
+
+    Returns:
+        [RestaurantState]: Replayed states if the plan is valid, None otherwise.
+    """
+    state = state.copy()
+    for observation, value in observations.items():
+        if not state.applyObservation(parseTerm(observation), value):
+            return None
+
+    states = replayPlan(state, orders)
+    if states is None:
+        return None
+    if not all(states[-1].satisfies(parseTerm(goal)) for goal in goals):
+        return None
+    return states
@@ -0,0 +1,238 @@
+import collections
+import hashlib
+import re
+
+
+class SceneLayout:
+    def __init__(self, graph, objects, associationRadius: float = 1.5):
+        """Restaurant layout of the SPARC program derived from the live scene.
+
+        Nodes are the positions of the SpatialGraph (client spots, named '<node>_<i>', excluded), with the length of the edges between them,
+        tables are the tables of the ObjectSet with as much capacity as chairs, and a node
+        is associated with every table closer than associationRadius.
+
+        Args:
+            graph (SpatialGraph): Navigation graph of the scene.
+            objects (ObjectSet): Furniture of the scene.
+            associationRadius (float, optional): Maximum node/table distance to serve a table (meters). Defaults to 1.5.
+        """
+        self.nodes = [n for n in graph.getNodes() if "_" not in n]
+        self.positions = {n: graph.getCoordinate(n)[:2] for n in self.nodes}
+        self.neighbors = {
+            n: [m for m in graph.getNeighbors(n) if m in self.positions]
+            for n in self.nodes
+        }
+        self.edges = []
+        for n1 in self.nodes:
+            for n2 in self.neighbors[n1]:
+                if (n2, n1) not in self.edges and (n1, n2) not in self.edges:
+                    self.edges.append((n1, n2))
+        self.lengths = {
+            (n1, n2): graph.getEdgeLength(n1, n2)
+            for n1 in self.nodes
+            for n2 in self.neighbors[n1]
+        }
+
+        self.capacities = {}
+        tablePositions = {}
+        for name in objects.getObjects():
+            if objects.isTable(name):
+                self.capacities[name] = objects.getCapacity(name)
+                tablePositions[name] = objects.getCoordinate(name)[:2]
+        self.tables = sorted(self.capacities.keys(), key=_numericKey)
+
+        self.associations = []
+        for table in self.tables:
+            tX, tY = tablePositions[table]
+            for node in self.nodes:
+                nX, nY = self.positions[node]
+                if (nX - tX) ** 2 + (nY - tY) ** 2 <= associationRadius**2:
+                    self.associations.append((node, table))
+
+        self.entrance = self.findEntrance(graph)
+
+    def findEntrance(self, graph) -> str:
+        """Node where customers are picked: the entrance position itself, or the node
+        linked to the entrance spots ('<entrance>_<i>') where new customers stand."""
+        entrance = graph.getEntrancePosition()
+        if entrance in self.positions:
+            return entrance
+
+        spots = [n for n in graph.getNodes() if n.startswith("{}_".format(entrance))]
+        for spot in spots:
+            for node in graph.getNeighbors(spot):
+                if node in self.positions:
+                    return node
+
+        # Nearest node to the spots
+        if len(spots) > 0:
+            x = sum(graph.getCoordinate(s)[0] for s in spots) / len(spots)
+            y = sum(graph.getCoordinate(s)[1] for s in spots) / len(spots)
+            return min(
+                self.nodes,
+                key=lambda n: (self.positions[n][0] - x) ** 2
+                + (self.positions[n][1] - y) ** 2,
+            )
+        return graph.getStartingPosition()
+
+    def fingerprint(self) -> str:
+        digest = hashlib.sha1()
+        for item in (
+            self.nodes,
+            self.edges,
+            sorted(self.capacities.items()),
+            self.associations,
+            self.entrance,
+        ):
+            digest.update(repr(item).encode("utf-8"))
+        return digest.hexdigest()
+
+    def getFacts(self, predicate: str, nodes=None, tables=None) -> list:
+        """Layout facts (without final dot), restricted to the given nodes and tables if any."""
+        nodes = set(self.nodes if nodes is None else nodes)
+        tables = set(self.tables if tables is None else tables)
+        if predicate == "edge":
+            return [
+                "edge({}, {})".format(n1, n2)
+                for n1, n2 in self.edges
+                if n1 in nodes and n2 in nodes
+            ]
+        if predicate == "areassociated":
+            return [
+                "areassociated({}, {})".format(n, t)
+                for n, t in self.associations
+                if n in nodes and t in tables
+            ]
+        if predicate == "hascapacity":
+            return [
+                "hascapacity({}, {})".format(t, self.capacities[t])
+                for t in self.tables
+                if t in tables
+            ]
+        return []
+
+    ## Pruning ##
+
+    def getShortestPath(self, start: str, end: str, blocked=()) -> list:
+        """Path with the fewest edges from start to end, not going through the blocked nodes (end excepted).
+
+        Returns:
+            [str]: Nodes of the path, empty if there is none.
+        """
+        parents = {start: None}
+        frontier = collections.deque([start])
+        while frontier:
+            node = frontier.popleft()
+            if node == end:
+                path = []
+                while node is not None:
+                    path.insert(0, node)
+                    node = parents[node]
+                return path
+            for neighbor in self.neighbors.get(node, []):
+                if neighbor in blocked and neighbor != end:
+                    continue
+                if neighbor not in parents:
+                    parents[neighbor] = node
+                    frontier.append(neighbor)
+        return []
+
+    def getRelevantElements(self, sections: dict, prune: bool = False):
+        """Customers, tables and nodes the problem written in sections can depend on.
+
+        Customers are the ones appearing in the sections. If prune, tables are the ones appearing in the sections
+        (plus the free ones if a goal seats customers) and nodes the ones on shortest paths between the agent,
+        waiters, entrance and relevant tables. The agent cannot go to a node where a waiter stands,
+        so paths go around the waiters when possible.
+
+        Args:
+            sections ({str:[str]}): Dynamic sections of the program (cf. ProgramASP).
+            prune (bool, optional): Leave out tables and nodes that cannot affect the goals. Defaults to False.
+
+        Returns:
+            ([str], [str], [str]): Customers, tables and nodes.
+        """
+        text = "\n".join(rule for rules in sections.values() for rule in rules)
+        customers = sorted(set(re.findall(r"\bc\d+\b", text)), key=_numericKey)
+        if not prune:
+            return customers, self.tables, self.nodes
+
+        tables = set(re.findall(r"\btable\d+\b", text)) & set(self.tables)
+        seatingGoal = any(
+            re.search(r"isattable\(\s*\w+\s*,\s*[A-Z]", goal)
+            for goal in sections.get("goal", [])
+        )
+        if seatingGoal:
+            occupied = set(
+                re.findall(r"isattable\(\s*\w+\s*,\s*(table\d+)", text)
+            ) - set(
+                re.findall(
+                    r"isattable\(\s*\w+\s*,\s*(table\d+)",
+                    "\n".join(sections.get("goal", [])),
+                )
+            )
+            tables |= set(self.tables) - occupied
+        if len(tables) == 0:
+            tables = set(self.tables)
+
+        keyNodes = set(re.findall(r"\bn\d+\b", text)) & set(self.nodes)
+        keyNodes.add(self.entrance)
+        keyNodes |= set(n for n, t in self.associations if t in tables)
+
+        blocked = set(
+            re.findall(r"currentlocation\(\s*(?!agent\b)\w+\s*,\s*(n\d+)\s*\)", text)
+        )
+        nodes = set(keyNodes)
+        keyNodes = sorted(keyNodes)
+        for i, start in enumerate(keyNodes):
+            for end in keyNodes[i + 1 :]:
+                nodes.update(
+                    self.getShortestPath(start, end, blocked)
+                    or self.getShortestPath(start, end)
+                )
+
+        return (
+            customers,
+            [t for t in self.tables if t in tables],
+            [n for n in self.nodes if n in nodes],
+        )
+
+    def renderLines(self, sections: dict, prune: bool = False, customers=None) -> dict:
+        """Program lines replacing the hard-coded layout of the template (cf. ProgramASP.LAYOUT_LINES).
+
+        Args:
+            sections ({str:[str]}): Dynamic sections of the program (cf. getRelevantElements).
+            prune (bool, optional): Leave out tables and nodes that cannot affect the goals. Defaults to False.
+            customers ([str], optional): Customer sort, the customers of the sections if None. Defaults to None.
+
+        Returns:
+            {str:str}: Line (or facts block) for each layout key.
+        """
+        relevantCustomers, tables, nodes = self.getRelevantElements(sections, prune)
+        if customers is None:
+            customers = relevantCustomers
+        lines = {
+            "tnum": "#const tnum = {}.\n".format(len(tables)),
+            "nnum": "#const nnum = {}.\n".format(len(nodes)),
+            "maxcap": "#const maxcap = {}.\n".format(
+                max([self.capacities[t] for t in tables] + [1])
+            ),
+            "node": "#node = {{{}}}.\n".format(", ".join(nodes)),
+            "table": "#table = {{{}}}.\n".format(", ".join(tables)),
+            "pick": "-occurs(pick(agent, Cu), I):- holds(currentlocation(agent, N), I), N != {}.\n".format(
+                self.entrance
+            ),
+        }
+        if len(customers) > 0:
+            lines["cnum"] = "#const cnum = {}.\n".format(len(customers))
+            lines["customer"] = "#customer = {{{}}}.\n".format(", ".join(customers))
+        for predicate in ("hascapacity", "edge", "areassociated"):
+            lines[predicate] = "".join(
+                fact + ".\n" for fact in self.getFacts(predicate, nodes, tables)
+            )
+        return lines
+
+
+def _numericKey(name: str):
+    digits = re.findall(r"\d+", name)
+    return (int(digits[0]) if digits else 0, name)
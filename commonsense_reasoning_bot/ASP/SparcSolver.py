@@ -0,0 +1,730 @@
+import atexit
+import concurrent.futures
+import hashlib
+import os
+import pathlib
+import queue
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+from ASP.PlanCache import PlanCache
+
+FILE_PATH = pathlib.Path(__file__).parent.absolute()
+SPARC_JAR = FILE_PATH / "sparc.jar"
+WORKER_SOURCE = FILE_PATH / "SparcWorker.java"
+# Compiled worker shipped with its source (cf. getWorkerClassPath)
+WORKER_CLASS = FILE_PATH / "SparcWorker.class"
+SPARC_OPTIONS = ["-A", "-n", "1"]
+# Seconds a worker has to answer an abort request before its JVM is killed
+ABORT_GRACE = 2.0
+CLINGO_OPTIONS = ["1"]
+# Improving models are printed until the optimum is proven, the last one is optimal
+CLINGO_OPTIMIZE_OPTIONS = ["0", "--opt-mode=opt"]
+# Lines of a translated program depending on the step limit
+TRANSLATION_HORIZON = re.compile(r"^(?:#const nstep=\d+|step\(\d+\))\.\n", re.MULTILINE)
+# Facts of a translated program: members of basic sorts (e.g. customer(c1)), and any ground fact (e.g. fluent(iswaiting(c1)))
+SORT_FACT = re.compile(r"^\w+\((\w+)\)\.$", re.MULTILINE)
+GROUND_FACT = re.compile(r"^(\w+)\([^:\n]*\)\.$", re.MULTILINE)
+# Rules added by SPARC for every declared predicate, e.g. holds_(X1,X2):-holds(X1,X2).
+HELPER_RULE = re.compile(r"^(\w+)_\([\w,]*\):-\1\(", re.MULTILINE)
+
+
+class SolveCancelled(Exception):
+    """Raised by a solve aborted through SparcWorker.cancel or SparcSolver.cancel."""
+
+
+class SolveTimeout(SolveCancelled):
+    """Raised by a solve aborted because its deadline passed."""
+
+
+class TranslationError(Exception):
+    """Raised when dynamic rules cannot be solved with a translated static part (cf. SparcSolver.solveTranslated)."""
+
+
+class SolveHandle:
+    def __init__(self):
+        """Cancellation of one solve, whatever process runs it (persistent worker or one-shot launch).
+        A solve cancelled before its process starts is aborted as soon as it starts (cf. bind).
+        """
+        self.reason = None
+        self._abort = None
+        self._lock = threading.Lock()
+
+    def bind(self, abort):
+        """Process now running the solve, aborted by calling abort(reason)."""
+        with self._lock:
+            self._abort = abort
+            reason = self.reason
+        if reason is not None:
+            abort(reason)
+
+    def cancel(self, reason=SolveCancelled):
+        """Abort the solve, which raises reason."""
+        with self._lock:
+            if self.reason is None:
+                self.reason = reason
+            abort = self._abort
+        if abort is not None:
+            abort(reason)
+
+
+class SparcWorker:
+    def __init__(self, javaPath: str = "java", sparcOptions=None, maxSolves: int = 500):
+        """Long-lived JVM with sparc.jar loaded once (cf. SparcWorker.java).
+        Programs are sent over stdin and SPARC's output is streamed back over stdout.
+        If the JVM cannot start (e.g. no compiled worker), the reason is kept in self.failure and it is not launched again.
+        A solve is cancelled by an abort request (cf. cancel), the JVM goes on with the next program.
+
+        Args:
+            javaPath (str, optional): Java executable. Defaults to "java".
+            sparcOptions ([str], optional): Options given to SPARC for every solve. Defaults to SPARC_OPTIONS.
+            maxSolves (int, optional): The JVM is recycled after this many solves. Defaults to 500.
+        """
+        self.javaPath = javaPath
+        self.sparcOptions = sparcOptions if sparcOptions else SPARC_OPTIONS
+        self.maxSolves = maxSolves
+        self.nbrSolves = 0
+        self.failure = None
+        self._process = None
+        self._stderr = None
+        self._abortReason = None
+        self._busy = False
+        self._killTimer = None
+        self._lock = threading.Lock()
+        # Taken to write to the JVM, so that an abort request never interleaves with a program
+        self._writeLock = threading.Lock()
+
+    def getCommand(self):
+        return [
+            self.javaPath,
+            "-cp",
+            os.pathsep.join([str(SPARC_JAR), getWorkerClassPath()]),
+            "SparcWorker",
+        ] + self.sparcOptions
+
+    def isAlive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self):
+        """Launch the JVM if it is not running.
+
+        Raises:
+            OSError: The worker cannot run (cf. self.failure).
+        """
+        if self.failure is not None:
+            raise OSError(self.failure)
+        if not self.isAlive():
+            try:
+                command = self.getCommand()
+                # Kept to tell why the JVM died, without a pipe that could fill up
+                self._stderr = tempfile.TemporaryFile()
+                self._process = subprocess.Popen(
+                    command,
+                    cwd=str(FILE_PATH),
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=self._stderr,
+                )
+            except OSError as e:
+                self.failure = "SPARC worker cannot start: {}".format(e)
+                raise OSError(self.failure)
+            self.nbrSolves = 0
+
+    def stop(self):
+        if self._process is not None:
+            try:
+                self._process.stdin.close()
+                self._process.wait(timeout=2.0)
+            except (OSError, subprocess.TimeoutExpired):
+                self._process.kill()
+            self._process = None
+        if self._stderr is not None:
+            self._stderr.close()
+            self._stderr = None
+
+    def getErrorOutput(self) -> str:
+        """What the JVM printed on stderr (e.g. why it could not start)."""
+        if self._stderr is None:
+            return ""
+        self._stderr.seek(0)
+        return self._stderr.read().decode("utf-8", errors="replace").strip()
+
+    def cancel(self, reason=SolveCancelled):
+        """Abort the running solve: the worker kills the processes started by SPARC and answers "aborted".
+        If it does not answer within ABORT_GRACE seconds, the JVM is killed and restarted.
+        Does nothing if no solve is running.
+
+        Args:
+            reason (type, optional): Exception raised by the aborted solve. Defaults to SolveCancelled.
+        """
+        with self._writeLock:
+            if not self._busy or self._abortReason is not None:
+                return
+            self._abortReason = reason
+            try:
+                self._process.stdin.write(b"abort\n")
+                self._process.stdin.flush()
+            except (OSError, ValueError):
+                # Already dead: the solving thread sees it
+                return
+            self._killTimer = threading.Timer(ABORT_GRACE, self._process.kill)
+            self._killTimer.daemon = True
+            self._killTimer.start()
+
+    def solve(
+        self, program: str, timeout: float = None, handle: SolveHandle = None
+    ) -> str:
+        """Solve a SPARC program in the running JVM.
+
+        Args:
+            program (str): Full SPARC program text.
+            timeout (float, optional): Seconds before the solve is aborted, no limit if None. Defaults to None.
+            handle (SolveHandle, optional): Cancels this solve. Defaults to None.
+
+        Raises:
+            OSError: The worker died or could not be started (cf. self.failure).
+            SolveCancelled: The solve was aborted with cancel().
+            SolveTimeout: The solve lasted more than timeout seconds.
+
+        Returns:
+            str: SPARC output (answer sets or inconsistency message).
+        """
+        with self._lock:
+            self._abortReason = None
+            if self.nbrSolves >= self.maxSolves:
+                self.stop()
+            self.start()
+
+            data = program.encode("utf-8")
+            timer = None
+            try:
+                with self._writeLock:
+                    self._process.stdin.write("{}\n".format(len(data)).encode("ascii"))
+                    self._process.stdin.write(data)
+                    self._process.stdin.flush()
+                    self._busy = True
+                if timeout is not None:
+                    timer = threading.Timer(
+                        max(timeout, 0.0), self.cancel, (SolveTimeout,)
+                    )
+                    timer.daemon = True
+                    timer.start()
+                if handle is not None:
+                    handle.bind(self.cancel)
+
+                header = self._process.stdout.readline()
+                if not header:
+                    raise OSError("SPARC worker terminated.")
+                if header.strip() == b"aborted":
+                    raise self._abortReason()
+                output = self._process.stdout.read(int(header))
+            except (OSError, ValueError) as e:
+                if self._abortReason is not None:
+                    # Killed as it did not answer the abort request
+                    self.stop()
+                    self.start()
+                    raise self._abortReason()
+                message = "{} {}".format(e, self.getErrorOutput()).strip()
+                if self.nbrSolves == 0:
+                    # Died before answering its first program: launching it again would fail the same way
+                    self.failure = message
+                self.stop()
+                raise OSError(message)
+            finally:
+                with self._writeLock:
+                    self._busy = False
+                    if self._killTimer is not None:
+                        self._killTimer.cancel()
+                        self._killTimer = None
+                if timer is not None:
+                    timer.cancel()
+
+            self.nbrSolves += 1
+            return output.decode("utf-8", errors="replace")
+
+
+class SparcSolver:
+    def __init__(
+        self,
+        poolSize: int = 1,
+        persistent: bool = True,
+        javaPath: str = "java",
+        clingoPath: str = "clingo",
+        translationCacheSize: int = 64,
+        logFunction=None,
+    ):
+        """Run SPARC programs, either on a pool of persistent workers or with one JVM launch per solve.
+        A solve falls back to a one-shot launch if its worker cannot run, which is logged.
+        Solves can be given a deadline and be cancelled (cf. cancel), timeouts and cancellations are counted.
+        Programs can also be split in a static part, translated once by SPARC, and dynamic rules (cf. solveTranslated).
+
+        Args:
+            poolSize (int, optional): Number of persistent workers. Defaults to 1.
+            persistent (bool, optional): Use persistent workers. Defaults to True.
+            javaPath (str, optional): Java executable. Defaults to "java".
+            clingoPath (str, optional): Clingo executable, used on translated programs. Defaults to "clingo".
+            translationCacheSize (int, optional): Number of translated static parts kept. Defaults to 64.
+            logFunction (function, optional): Called with (message, log_type), e.g. PlanningService.log. Defaults to None.
+        """
+        self.logFunction = logFunction
+        self.javaPath = javaPath
+        self.clingoPath = clingoPath
+        self.translations = PlanCache(translationCacheSize)
+        self.persistent = persistent
+        self.workers = [SparcWorker(javaPath) for _ in range(poolSize)]
+        self._freeWorkers = queue.Queue()
+        for worker in self.workers:
+            self._freeWorkers.put(worker)
+        self.nbrTimeouts = 0
+        self.nbrCancellations = 0
+        self._running = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def __str__(self):
+        return "Solver: {} timeouts, {} cancellations".format(
+            self.nbrTimeouts, self.nbrCancellations
+        )
+
+    def log(self, message: str, log_type: str = "info"):
+        if self.logFunction:
+            self.logFunction(message, log_type)
+
+    def isWarm(self) -> bool:
+        """True if every persistent worker already runs its JVM (the next solve has no start-up cost)."""
+        return self.persistent and all(worker.isAlive() for worker in self.workers)
+
+    def getOneShotCommand(self, programPath) -> list:
+        return [self.javaPath, "-jar", str(SPARC_JAR), str(programPath)] + SPARC_OPTIONS
+
+    def runProcess(
+        self,
+        command: list,
+        inputData: str = None,
+        timeout: float = None,
+        handle: SolveHandle = None,
+    ) -> str:
+        """Run a solver process, that can be aborted with cancel() or with handle.
+
+        Raises:
+            SolveCancelled: The process was killed by cancel().
+            SolveTimeout: The process lasted more than timeout seconds.
+
+        Returns:
+            str: Output of the process (stdout and stderr).
+        """
+        handle = handle or SolveHandle()
+        if handle.reason is not None:
+            raise handle.reason()
+        process = subprocess.Popen(
+            command,
+            cwd=str(FILE_PATH),
+            stdin=subprocess.PIPE if inputData is not None else None,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        with self._lock:
+            self._running[handle] = handle.cancel
+        handle.bind(lambda reason: process.kill())
+        try:
+            try:
+                output = process.communicate(
+                    inputData.encode("utf-8") if inputData is not None else None,
+                    timeout=timeout,
+                )[0]
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+                raise SolveTimeout()
+            if process.returncode < 0:
+                raise (handle.reason or SolveCancelled)()
+        finally:
+            with self._lock:
+                self._running.pop(handle, None)
+        return output.decode("utf-8", errors="replace")
+
+    def solveOneShot(
+        self, program: str, timeout: float = None, handle: SolveHandle = None
+    ) -> str:
+        """Launch a new JVM to solve program (former behavior).
+
+        Raises:
+            SolveCancelled: The JVM was killed by cancel() or handle.
+            SolveTimeout: The solve lasted more than timeout seconds.
+        """
+        fd, programPath = tempfile.mkstemp(suffix=".sparc")
+        try:
+            with os.fdopen(fd, "w") as programFile:
+                programFile.write(program)
+            return self.runProcess(
+                self.getOneShotCommand(programPath), timeout=timeout, handle=handle
+            )
+        finally:
+            os.remove(programPath)
+
+    def getTranslateCommand(self, programPath, outputPath) -> list:
+        return self.getOneShotCommand(programPath) + ["-o", str(outputPath)]
+
+    def translate(self, program: str, timeout: float = None) -> str:
+        """ASP translation of a SPARC program (sorts instantiated, cf. SPARC -o option), cached by content hash.
+
+        Raises:
+            OSError: SPARC did not write the translation.
+
+        Returns:
+            str: Program in clingo syntax.
+        """
+        key = hashlib.sha1(program.encode("utf-8")).hexdigest()
+        translation = self.translations.get(key)
+        if translation is None:
+            directory = tempfile.mkdtemp()
+            programPath = os.path.join(directory, "static.sparc")
+            outputPath = os.path.join(directory, "static.lp")
+            try:
+                with open(programPath, "w") as programFile:
+                    programFile.write(program)
+                output = self.runProcess(
+                    self.getTranslateCommand(programPath, outputPath), timeout=timeout
+                )
+                if not os.path.exists(outputPath):
+                    raise OSError("SPARC translation failed:\n" + output)
+                with open(outputPath) as translationFile:
+                    translation = translationFile.read()
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+            self.translations.put(key, translation)
+        return translation
+
+    def solveTranslated(
+        self,
+        staticProgram: str,
+        dynamicRules: str,
+        timeout: float = None,
+        optimize: bool = False,
+        nstep: int = None,
+        constants=(),
+        predicates=(),
+    ) -> str:
+        """Solve a program made of a static SPARC part, translated once (cf. translate),
+        and of dynamic rules (init, obs and goal sections) given as they are to clingo with the translation.
+        As clingo does not check sorts, the constants of the dynamic rules are checked against the sorts of the translation.
+
+        Args:
+            staticProgram (str): SPARC program without the dynamic rules.
+            dynamicRules (str): Facts and rules added to the translation.
+            timeout (float, optional): Seconds before the solve is aborted, no limit if None. Defaults to None.
+            optimize (bool, optional): dynamicRules contain optimization statements, only the optimal answer set is returned. Defaults to False.
+            nstep (int, optional): Step limit replacing the one of staticProgram, so that one translation serves every horizon.
+                The one of staticProgram is kept if None. Defaults to None.
+            constants ([str], optional): Constants of dynamicRules (e.g. customers) that must belong to a sort of the static part.
+                Defaults to ().
+            predicates ([str], optional): Predicates of the static part referred to by dynamicRules
+                (e.g. something_happened in an optimization statement), that must keep their name in the translation.
+                Defaults to ().
+
+        Raises:
+            SolveCancelled: The solve was aborted with cancel().
+            SolveTimeout: The solve lasted more than timeout seconds.
+            TranslationError: A constant is in no sort of the static part (SPARC would reject the program),
+                or a predicate is not declared in the translation.
+
+        Returns:
+            str: Answer sets, in SPARC output format.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        try:
+            translation = self.translate(staticProgram, timeout)
+            undefined = sorted(set(constants) - getSortConstants(translation))
+            if len(undefined) > 0:
+                raise TranslationError(
+                    "Constants in no sort of the translated program: {}".format(
+                        ", ".join(undefined)
+                    )
+                )
+            missing = sorted(set(predicates) - set(HELPER_RULE.findall(translation)))
+            if len(missing) > 0:
+                raise TranslationError(
+                    "Predicates not declared in the translated program: {}".format(
+                        ", ".join(missing)
+                    )
+                )
+            if nstep is not None:
+                translation = setTranslationHorizon(translation, nstep)
+            output = self.runProcess(
+                [self.clingoPath]
+                + (CLINGO_OPTIMIZE_OPTIONS if optimize else CLINGO_OPTIONS),
+                translation + "\n" + dynamicRules,
+                getRemainingTime(deadline),
+            )
+        except SolveTimeout:
+            self.countAbort(SolveTimeout)
+            raise
+        except SolveCancelled:
+            self.countAbort(SolveCancelled)
+            raise
+        answerSets = formatClingoOutput(output, getAuxiliaryPredicates(translation))
+        if optimize:
+            return answerSets.splitlines()[-1] if answerSets else answerSets
+        return answerSets
+
+    def solve(self, program: str, timeout: float = None) -> str:
+        """Solve a SPARC program and return its raw output.
+
+        Args:
+            program (str): Full SPARC program text.
+            timeout (float, optional): Seconds before the solve is aborted, no limit if None. Defaults to None.
+
+        Raises:
+            SolveCancelled: The solve was aborted with cancel().
+            SolveTimeout: The solve lasted more than timeout seconds.
+
+        Returns:
+            str: SPARC output.
+        """
+        try:
+            if not self.persistent:
+                return self.solveOneShot(program, timeout)
+
+            generation = self._generation
+            worker = self._freeWorkers.get()
+            handle = SolveHandle()
+            try:
+                with self._lock:
+                    if generation != self._generation:
+                        raise SolveCancelled()
+                    self._running[handle] = handle.cancel
+                return self.solveOnWorker(worker, program, timeout, handle)
+            finally:
+                with self._lock:
+                    self._running.pop(handle, None)
+                self._freeWorkers.put(worker)
+        except SolveTimeout:
+            self.countAbort(SolveTimeout)
+            raise
+        except SolveCancelled:
+            self.countAbort(SolveCancelled)
+            raise
+
+    def solveOnWorker(
+        self,
+        worker: SparcWorker,
+        program: str,
+        timeout: float = None,
+        handle: SolveHandle = None,
+    ) -> str:
+        """Solve program on worker, or with a one-shot JVM launch if the worker cannot run (the failure is logged)."""
+        deadline = None if timeout is None else time.time() + timeout
+        if worker.failure is None:
+            try:
+                return worker.solve(program, timeout, handle)
+            except OSError as e:
+                self.log(
+                    "SPARC worker failed, solving with a new JVM ({})".format(e),
+                    "error",
+                )
+        return self.solveOneShot(program, getRemainingTime(deadline), handle)
+
+    def cancel(self):
+        """Abort every running solve (e.g. made obsolete by new observations).
+        They raise SolveCancelled, the workers go on with the next programs."""
+        with self._lock:
+            self._generation += 1
+            running = list(self._running.values())
+        for cancelSolve in running:
+            cancelSolve()
+
+    def countAbort(self, reason):
+        with self._lock:
+            if reason is SolveTimeout:
+                self.nbrTimeouts += 1
+            else:
+                self.nbrCancellations += 1
+
+    def findMinimalHorizon(
+        self, renderProgram, horizons, isSatisfiable, results=None, timeout=None
+    ):
+        """Solve several horizons at once, one per worker, and return the smallest satisfiable one.
+        Horizons longer than a satisfiable one are cancelled as soon as it is found.
+        When timeout expires, the best plan found so far is returned, even if shorter horizons were not solved.
+
+        Args:
+            renderProgram (function): Returns the program text for a given horizon.
+            horizons ([int]): Horizons to try, in order of priority (the first ones are given to the workers first).
+            isSatisfiable (function): Tells from SPARC output if the program is consistent.
+            results (dict, optional): If given, filled with the output of every horizon solved to completion. Defaults to None.
+            timeout (float, optional): Seconds allowed to the whole search, no limit if None. Defaults to None.
+
+        Raises:
+            SolveCancelled: The search was aborted with cancel().
+
+        Returns:
+            (int, str): Smallest satisfiable horizon and its SPARC output, None if there is none.
+        """
+        horizons = list(horizons)
+        best = None
+        results = {} if results is None else results
+        running = {}
+        lock = threading.Lock()
+        deadline = None if timeout is None else time.time() + timeout
+        generation = self._generation
+
+        def solveHorizon(n: int) -> str:
+            worker = self._freeWorkers.get()
+            # Aborts the worker or the one-shot JVM solving n once a shorter horizon is satisfiable
+            handle = SolveHandle()
+            try:
+                with lock:
+                    if best is not None and n > best[0]:
+                        raise SolveCancelled()
+                    running[n] = handle
+                with self._lock:
+                    if generation != self._generation:
+                        raise SolveCancelled()
+                    self._running[handle] = handle.cancel
+                if not self.persistent:
+                    return self.solveOneShot(
+                        renderProgram(n), getRemainingTime(deadline), handle
+                    )
+                return self.solveOnWorker(
+                    worker, renderProgram(n), getRemainingTime(deadline), handle
+                )
+            finally:
+                with lock:
+                    running.pop(n, None)
+                with self._lock:
+                    self._running.pop(handle, None)
+                self._freeWorkers.put(worker)
+
+        with concurrent.futures.ThreadPoolExecutor(len(self.workers)) as executor:
+            futures = {executor.submit(solveHorizon, n): n for n in horizons}
+            try:
+                for future in concurrent.futures.as_completed(
+                    futures, getRemainingTime(deadline)
+                ):
+                    n = futures[future]
+                    try:
+                        results[n] = future.result()
+                    except (SolveCancelled, concurrent.futures.CancelledError):
+                        if generation != self._generation:
+                            break
+                        continue
+
+                    if isSatisfiable(results[n]) and (best is None or n < best[0]):
+                        with lock:
+                            best = (n, results[n])
+                            for other, handle in running.items():
+                                if other > n:
+                                    handle.cancel()
+                        for otherFuture, other in futures.items():
+                            if other > n:
+                                otherFuture.cancel()
+
+                    # Stop once every shorter horizon is proven unsatisfiable
+                    if best is not None and all(
+                        m in results for m in horizons if m < best[0]
+                    ):
+                        break
+            except concurrent.futures.TimeoutError:
+                self.countAbort(SolveTimeout)
+
+            # Deadline passed or search aborted: stop the remaining horizons
+            for otherFuture in futures:
+                otherFuture.cancel()
+            with lock:
+                for handle in running.values():
+                    handle.cancel()
+
+        if generation != self._generation:
+            self.countAbort(SolveCancelled)
+            raise SolveCancelled()
+        return best
+
+    def close(self):
+        for worker in self.workers:
+            worker.stop()
+
+
+def getWorkerClassPath(javacPath: str = "javac") -> str:
+    """Directory of the compiled SparcWorker: the one of its source if the class is shipped,
+    otherwise a cache directory where the source is compiled once with javac.
+
+    Raises:
+        OSError: The class is missing and cannot be compiled.
+    """
+    if WORKER_CLASS.exists():
+        return str(FILE_PATH)
+    with open(WORKER_SOURCE, "rb") as sourceFile:
+        digest = hashlib.sha1(sourceFile.read()).hexdigest()[:12]
+    directory = os.path.join(tempfile.gettempdir(), "sparc_worker_" + digest)
+    if os.path.exists(os.path.join(directory, "SparcWorker.class")):
+        return directory
+    if shutil.which(javacPath) is None:
+        raise OSError("SparcWorker.class is missing and javac is not available")
+
+    # Compiled aside and moved at once, so that concurrent workers never load a partial class
+    build = tempfile.mkdtemp(prefix="sparc_worker_")
+    result = subprocess.run(
+        [javacPath, "-cp", str(SPARC_JAR), "-d", build, str(WORKER_SOURCE)],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    if result.returncode != 0:
+        shutil.rmtree(build, ignore_errors=True)
+        raise OSError(
+            "SparcWorker compilation failed:\n"
+            + result.stdout.decode("utf-8", errors="replace")
+        )
+    try:
+        os.rename(build, directory)
+    except OSError:
+        shutil.rmtree(build, ignore_errors=True)
+    return directory
+
+
+def getRemainingTime(deadline: float):
+    """Seconds left before deadline (a time.time() value), None if there is no deadline."""
+    if deadline is None:
+        return None
+    return max(deadline - time.time(), 0.0)
+
+
+def setTranslationHorizon(translation: str, nstep: int) -> str:
+    """Translated program (cf. SparcSolver.translate) with its step sort and nstep constant set to 0..nstep."""
+    translation = TRANSLATION_HORIZON.sub("", translation)
+    return "#const nstep={}.\nstep(0..{}).\n{}".format(nstep, nstep, translation)
+
+
+def getSortConstants(translation: str) -> set:
+    """Constants belonging to a basic sort of a translated program (e.g. customer(c1))."""
+    return set(SORT_FACT.findall(translation))
+
+
+def getAuxiliaryPredicates(translation: str) -> set:
+    """Predicates added by SPARC to a translated program: sorts (e.g. customer, fluent) and helpers (e.g. holds_),
+    left out of its answer sets."""
+    declared = set(HELPER_RULE.findall(translation))
+    sorts = set(GROUND_FACT.findall(translation)) - declared
+    return (
+        sorts | {name + "_" for name in declared} | {name + "__" for name in declared}
+    )
+
+
+def formatClingoOutput(output: str, hiddenPredicates=()) -> str:
+    """Answer sets printed by clingo ('Answer: 1' followed by the atoms), in SPARC output format ({atom, atom}).
+    Atoms of hiddenPredicates are left out."""
+    answerSets = []
+    lines = output.splitlines()
+    for i, line in enumerate(lines):
+        if line.startswith("Answer:") and i + 1 < len(lines):
+            atoms = [
+                atom
+                for atom in lines[i + 1].split()
+                if atom.lstrip("-").split("(")[0] not in hiddenPredicates
+            ]
+            answerSets.append("{" + ", ".join(atoms) + "}")
+    return "\n".join(answerSets)
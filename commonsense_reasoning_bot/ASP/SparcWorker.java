@@ -0,0 +1,181 @@
+import java.io.BufferedInputStream;
+import java.io.ByteArrayInputStream;
+import java.io.ByteArrayOutputStream;
+import java.io.DataInputStream;
+import java.io.FileDescriptor;
+import java.io.FileOutputStream;
+import java.io.IOException;
+import java.io.InputStream;
+import java.io.PrintStream;
+import java.io.UnsupportedEncodingException;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.nio.file.Path;
+import java.security.Permission;
+
+/**
+ * Long-lived SPARC solver worker.
+ *
+ * Loads sparc.jar once and answers solve requests read on stdin, so the JVM
+ * start-up is paid once instead of once per solver call.
+ *
+ * Protocol (both directions): a line holding the payload length in bytes,
+ * followed by the UTF-8 payload. Requests carry the SPARC program text,
+ * replies carry everything SPARC printed while solving it.
+ *
+ * A line "abort" sent while a program is solved aborts this solve only: the
+ * processes started by SPARC (clingo) are killed, and the reply is the line
+ * "aborted" without payload. The JVM goes on with the next request.
+ *
+ * Shipped compiled as SparcWorker*.class, as running a source file needs a JDK
+ * (jdk.compiler module). After a change, compile it again with:
+ *   javac -cp sparc.jar SparcWorker.java
+ *
+ * Launched by SparcSolver.py with: java -cp sparc.jar:. SparcWorker [sparc options]
+ */
+public class SparcWorker {
+
+    static class ExitTrappedException extends SecurityException {
+        ExitTrappedException(int status) {
+            super("SPARC called System.exit(" + status + ")");
+        }
+    }
+
+    /** SPARC calls System.exit on some errors, which must not kill the worker. */
+    @SuppressWarnings("removal")
+    static void installExitTrap() {
+        try {
+            System.setSecurityManager(new SecurityManager() {
+                @Override
+                public void checkExit(int status) {
+                    throw new ExitTrappedException(status);
+                }
+
+                @Override
+                public void checkPermission(Permission perm) {
+                }
+
+                @Override
+                public void checkPermission(Permission perm, Object context) {
+                }
+            });
+        } catch (UnsupportedOperationException e) {
+            // Recent JVMs refuse security managers: an exit then ends the worker
+            // and the Python side restarts it.
+        }
+    }
+
+    static String readHeader(InputStream in) throws IOException {
+        StringBuilder header = new StringBuilder();
+        int c;
+        while ((c = in.read()) != '\n') {
+            if (c < 0) {
+                return null;
+            }
+            header.append((char) c);
+        }
+        return header.toString().trim();
+    }
+
+    /** Solves one program, so that the main thread can still read an abort request. */
+    static class Solve extends Thread {
+        private final String[] sparcArgs;
+        private final PrintStream out;
+        private final PrintStream err;
+        volatile boolean aborted = false;
+
+        Solve(String[] sparcArgs, PrintStream out, PrintStream err) {
+            this.sparcArgs = sparcArgs;
+            this.out = out;
+            this.err = err;
+        }
+
+        public void run() {
+            ByteArrayOutputStream buffer = new ByteArrayOutputStream();
+            PrintStream capture;
+            try {
+                capture = new PrintStream(buffer, true, "UTF-8");
+            } catch (UnsupportedEncodingException e) {
+                throw new IllegalStateException(e);
+            }
+            System.setIn(new ByteArrayInputStream(new byte[0]));
+            System.setOut(capture);
+            System.setErr(capture);
+            try {
+                parser.SparcTranslator.main(sparcArgs);
+            } catch (ExitTrappedException e) {
+                // Output printed before the exit is still the answer.
+            } catch (Throwable t) {
+                capture.println("WORKER ERROR: " + t);
+            } finally {
+                capture.flush();
+                System.setOut(out);
+                System.setErr(err);
+            }
+
+            synchronized (out) {
+                if (aborted) {
+                    out.print("aborted\n");
+                } else {
+                    byte[] reply = buffer.toByteArray();
+                    out.write((reply.length + "\n").getBytes(StandardCharsets.US_ASCII), 0,
+                            (reply.length + "\n").length());
+                    out.write(reply, 0, reply.length);
+                }
+                out.flush();
+            }
+        }
+    }
+
+    /** Kill the processes started by SPARC until the solve ends (clingo may start after the abort). */
+    static void abort(Solve solve) throws InterruptedException {
+        solve.aborted = true;
+        while (solve.isAlive()) {
+            Object[] children = ProcessHandle.current().descendants().toArray();
+            for (int i = 0; i < children.length; i++) {
+                ((ProcessHandle) children[i]).destroyForcibly();
+            }
+            solve.join(10);
+        }
+    }
+
+    public static void main(String[] args) throws Exception {
+        DataInputStream in = new DataInputStream(new BufferedInputStream(System.in));
+        PrintStream out = new PrintStream(new FileOutputStream(FileDescriptor.out), true);
+        PrintStream err = System.err;
+        Path programFile = Files.createTempFile("sparc_worker_", ".sparc");
+        programFile.toFile().deleteOnExit();
+
+        String[] sparcArgs = new String[args.length + 1];
+        sparcArgs[0] = programFile.toString();
+        System.arraycopy(args, 0, sparcArgs, 1, args.length);
+
+        installExitTrap();
+
+        Solve solve = null;
+        String header;
+        while ((header = readHeader(in)) != null) {
+            if (header.isEmpty()) {
+                continue;
+            }
+            if (header.equals("abort")) {
+                // Ignored if the solve it was meant for has already answered.
+                if (solve != null) {
+                    abort(solve);
+                }
+                continue;
+            }
+            byte[] program = new byte[Integer.parseInt(header)];
+            in.readFully(program);
+            if (solve != null) {
+                solve.join();
+            }
+            Files.write(programFile, program);
+            solve = new Solve(sparcArgs, out, err);
+            solve.start();
+        }
+        if (solve != null) {
+            solve.join();
+        }
+    }
+}
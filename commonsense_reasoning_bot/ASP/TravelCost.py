@@ -0,0 +1,118 @@
+import collections
+import hashlib
+import threading
+
+from ASP.AnswerSet import parseTerm
+
+# Durations are given to clingo as integers, in hundredths of a second
+COST_UNIT = 0.01
+
+
+class TravelCostModel:
+    def __init__(
+        self,
+        speed: float = 0.5,
+        actionDuration: float = 1.0,
+        maxTraversals: int = 100,
+    ):
+        """Estimated duration of the orders of a plan: edge length over walking speed for go_to,
+        a fixed duration for every action. The speed is calibrated with the traversal times reported by the robot.
+
+        Args:
+            speed (float, optional): Walking speed (m/s) used until traversals are reported. Defaults to 0.5.
+            actionDuration (float, optional): Duration of every action, moves included (s). Defaults to 1.0.
+            maxTraversals (int, optional): Number of reported traversals kept for calibration. Defaults to 100.
+        """
+        self.defaultSpeed = speed
+        self.actionDuration = actionDuration
+        self.lengths = {}
+        self.distanceFunction = None
+        self._traversals = collections.deque(maxlen=maxTraversals)
+        self._lock = threading.Lock()
+
+    def setLengths(self, lengths: dict):
+        """Length (meters) of the edges, {(fromNode, toNode): length} (cf. SceneLayout.lengths)."""
+        self.lengths = dict(lengths)
+
+    def setDistanceFunction(self, distanceFunction):
+        """Length (meters) of the shortest path between any two nodes, e.g. SpatialGraph.getDistance."""
+        self.distanceFunction = distanceFunction
+
+    def getNodeDistance(self, fromNode: str, toNode: str) -> float:
+        """Meters between two nodes: edge length, or shortest path length if they are not linked. None if unknown."""
+        length = self.lengths.get((fromNode, toNode))
+        if length is None and self.distanceFunction is not None:
+            length = self.distanceFunction(fromNode, toNode)
+        if length is None or length == float("inf"):
+            return None
+        return length
+
+    def addTraversal(self, fromNode: str, toNode: str, duration: float) -> bool:
+        """Time (s) the robot took to walk from fromNode to toNode.
+
+        Returns:
+            bool: False if the distance between the nodes is unknown.
+        """
+        length = self.getNodeDistance(fromNode, toNode)
+        if length is None or duration <= 0.0:
+            return False
+        with self._lock:
+            self._traversals.append((length, duration))
+        return True
+
+    def getSpeed(self) -> float:
+        """Walking speed (m/s) calibrated on the reported traversals."""
+        with self._lock:
+            distance = sum(length for length, duration in self._traversals)
+            duration = sum(duration for length, duration in self._traversals)
+        if duration <= 0.0 or distance <= 0.0:
+            return self.defaultSpeed
+        return distance / duration
+
+    def getDistance(self, orders: list, start: str) -> float:
+        """Meters walked by the agent following orders from the start node."""
+        distance = 0.0
+        location = start
+        for order in orders:
+            action = parseTerm(order)
+            if action.name == "go_to":
+                node = str(action.args[1])
+                distance += self.getNodeDistance(location, node) or 0.0
+                location = node
+        return distance
+
+    def getDuration(self, orders: list, start: str) -> float:
+        """Estimated seconds to carry out orders from the start node."""
+        return (
+            self.getDistance(orders, start) / self.getSpeed()
+            + len(orders) * self.actionDuration
+        )
+
+    def fingerprint(self) -> str:
+        return hashlib.sha1(self.render().encode("utf-8")).hexdigest()
+
+    def render(self) -> str:
+        """Clingo facts and statements minimising the estimated duration of the plan,
+        to be given with the translated program (cf. SparcSolver.solveTranslated)."""
+        speed = self.getSpeed()
+        lines = [
+            "travelcost({},{},{}).\n".format(n1, n2, int(round(l / speed / COST_UNIT)))
+            for (n1, n2), l in sorted(self.lengths.items())
+        ]
+        lines.append(
+            "actioncost({}).\n".format(int(round(self.actionDuration / COST_UNIT)))
+        )
+        lines.append(
+            "#minimize { C,I,travel : occurs(go_to(agent,N),I), holds(currentlocation(agent,M),I), travelcost(M,N,C) }.\n"
+        )
+        lines.append(
+            "#minimize { C,I,action : something_happened(I), actioncost(C) }.\n"
+        )
+        return "".join(lines)
+
+    def __str__(self):
+        with self._lock:
+            nbrTraversals = len(self._traversals)
+        return "Travel cost: {:.2f} m/s ({} traversals)".format(
+            self.getSpeed(), nbrTraversals
+        )
@@ -0,0 +1,410 @@
+"""Headless benchmark of the ASP replanning pipeline (PlanningService.update -> callASP).
+
+Restaurants of increasing size are generated, with seated groups, arriving groups
+(has_entered/group observations, isattable goals) and bill waves (bill_wave observations, haspaid goals).
+Each scenario goes through one update of the planning service, with a stub log signal and the plan cache disabled.
+
+The soak mode runs a single planning service through a long shift instead: groups keep arriving,
+being seated, paying and leaving (their ID numbers being recycled), and the update latency is reported per window of replans.
+
+Usage:
+    python commonsense_reasoning_bot/Benchmark.py --save baseline.json
+    python commonsense_reasoning_bot/Benchmark.py --compare baseline.json
+    python commonsense_reasoning_bot/Benchmark.py --soak 500
+    python commonsense_reasoning_bot/Benchmark.py --compare-modes
+"""
+
+import argparse
+import collections
+import json
+import statistics
+import sys
+
+from SpatialGraph import FurnitureType, ObjectSet, SpatialGraph
+from ASP.CustomerAllocator import CustomerAllocator
+from ASP.PlanningService import PlanningService
+from ASP.SparcSolver import SparcSolver
+
+# Benchmark phases and the pipeline phases they sum (cf. PlanningService.metrics)
+PHASES = collections.OrderedDict(
+    [
+        ("write", ("init_situation", "write_init", "write_obs", "write_goal")),
+        ("render", ("render",)),
+        ("solve", ("solve",)),
+        ("parse", ("parse",)),
+        ("native", ("native_plan",)),
+        ("total", ("update",)),
+    ]
+)
+
+Scenario = collections.namedtuple(
+    "Scenario", ["name", "nbrTables", "seatedGroups", "arrivals", "billWaves"]
+)
+Scenario.__doc__ = """Restaurant with nbrTables tables, seatedGroups groups of 2 already seated (one per table from table1),
+arriving groups of the given sizes, and bill waves from the given tables (numbers)."""
+
+
+class StubLogSignal:
+    """Stands for the pyqtSignal of the log widget, messages are kept in memory."""
+
+    def __init__(self, verbose: bool = False):
+        self.verbose = verbose
+        self.messages = []
+
+    def emit(self, message: str, log_type: str = "info"):
+        self.messages.append((log_type, message))
+        if self.verbose:
+            print("[{}] {}".format(log_type, message))
+
+
+def generateRestaurant(nbrTables: int):
+    """Restaurant along a corridor: entrance at one end, one node in front of each table.
+    Tables alternatively have 2 and 4 chairs.
+
+    Returns:
+        (SpatialGraph, ObjectSet): Navigation graph and furniture.
+    """
+    graph = SpatialGraph(directed=False)
+    graph.addPosition("n0_0", 0.0, -1.0, 0.0)
+    graph.addPosition("n1", 0.0, 0.0, 0.0)
+    graph.addEdge("n0_0", "n1")
+    graph.setStartingPosition("n1")
+    graph.setEntrancePosition("n0")
+
+    objects = ObjectSet()
+    for i in range(1, nbrTables + 1):
+        node = "n{}".format(i + 1)
+        graph.addPosition(node, 2.0 * i, 0.0, 0.0)
+        graph.addEdge("n{}".format(i), node)
+
+        table = "table{}".format(i)
+        objects.addObject(name=table, objType=FurnitureType.Table, x=2.0 * i, y=1.0)
+        for c in range(1, (2 if i % 2 else 4) + 1):
+            objects.addObject(
+                name="chair{}t{}".format(c, i),
+                table=table,
+                objType=FurnitureType.Chair,
+                x=2.0 * i + (0.5 if c % 2 else -0.5),
+                y=1.0 + 0.5 * ((c - 1) // 2),
+            )
+    return graph, objects
+
+
+def generateScenarios(maxTables: int = 10) -> list:
+    """Scenarios of increasing size: arrivals, bill waves, and both, for 2 to maxTables tables."""
+    scenarios = []
+    for nbrTables in range(2, maxTables + 1, 2):
+        seated = nbrTables // 2
+        scenarios += [
+            Scenario("arrival_t{}".format(nbrTables), nbrTables, seated, [2], []),
+            Scenario("bill_t{}".format(nbrTables), nbrTables, seated, [], [seated]),
+            Scenario(
+                "mixed_t{}".format(nbrTables), nbrTables, seated, [2, 1], [1, seated]
+            ),
+        ]
+    return scenarios
+
+
+def runScenario(scenario: Scenario, solver: SparcSolver, **options):
+    """Run one update of the planning service on scenario.
+
+    Args:
+        options: Options of PlanningService (planner, solveDeadline...).
+
+    Returns:
+        {str:float}: Phase timings (seconds), plan length and horizon.
+    """
+    graph, objects = generateRestaurant(scenario.nbrTables)
+    service = PlanningService(
+        StubLogSignal().emit,
+        solver=solver,
+        planCacheSize=0,
+        planCheck=False,
+        debounceDelay=0.0,
+        **options,
+    )
+    service.setLayout(graph, objects)
+
+    # Seated groups
+    initSituation = ["currentlocation(agent, {})".format(graph.getStartingPosition())]
+    customer = 0
+    tableCustomers = {}
+    for table in range(1, scenario.seatedGroups + 1):
+        group = [customer + 1, customer + 2]
+        customer += 2
+        tableCustomers[table] = group
+        for c in group:
+            initSituation.append("isattable(c{}, table{})".format(c, table))
+        initSituation.append("aretogether(c{}, c{})".format(*group))
+    service.writeInitSituation(initSituation)
+
+    # Arriving groups (cf. MainWindow.clientEnter)
+    for size in scenario.arrivals:
+        group = list(range(customer + 1, customer + size + 1))
+        customer += size
+        service.submit_goal("isattable(c{}, T)".format(group[0]))
+        for c in group:
+            service.submit_observation("has_entered(c{})".format(c), True)
+        for c in group[1:]:
+            service.submit_observation("group(c{}, c{})".format(group[0], c), True)
+
+    # Bill waves (cf. MainWindow.tableCallBill)
+    for table in scenario.billWaves:
+        service.submit_observation("bill_wave(table{})".format(table), True)
+        for c in tableCustomers.get(table, []):
+            service.submit_goal("haspaid(c{})".format(c))
+
+    service.update()
+    result = {
+        phase: sum(service.metrics.getTotal(p) for p in pipelinePhases)
+        for phase, pipelinePhases in PHASES.items()
+    }
+    result["planLength"] = len(service.stackOrders)
+    result["horizon"] = service.currentGoalStep
+    return result
+
+
+def runBenchmark(scenarios: list, repeats: int, **options) -> dict:
+    """Median timings of every scenario over repeats runs (options given to PlanningService)."""
+    solver = SparcSolver()
+    results = {}
+    for scenario in scenarios:
+        runs = [runScenario(scenario, solver, **options) for _ in range(repeats)]
+        results[scenario.name] = {
+            key: statistics.median(run[key] for run in runs) for key in PHASES
+        }
+        results[scenario.name]["planLength"] = runs[-1]["planLength"]
+        results[scenario.name]["horizon"] = runs[-1]["horizon"]
+        print(formatResult(scenario.name, results[scenario.name]))
+    solver.close()
+    return {"options": options, "repeats": repeats, "scenarios": results}
+
+
+def completeOrders(service: PlanningService):
+    """Simulate the robot achieving every order of the current plan."""
+    while service.getCurrentOrder() is not None:
+        service.currentOrderCompleted()
+
+
+def runSoak(replans: int, nbrTables: int = 4, **options) -> list:
+    """Run one planning service through replans updates: groups of 2 arrive, are seated,
+    ask for the bill, pay and leave, over and over.
+
+    Args:
+        replans (int): Number of updates.
+        nbrTables (int, optional): Tables of the restaurant. Defaults to 4.
+        options: Options of PlanningService (planner, solveDeadline...).
+
+    Returns:
+        [{str:float}]: For every update, its latency (seconds), the plan length, the horizon, the step limit
+            of the program (nstep), the number of rules of its dynamic sections and the intakes left in the queue
+            (cf. reportWindows).
+    """
+    solver = SparcSolver()
+    graph, objects = generateRestaurant(nbrTables)
+    service = PlanningService(
+        StubLogSignal().emit,
+        solver=solver,
+        planCacheSize=0,
+        planCheck=False,
+        debounceDelay=0.0,
+        **options,
+    )
+    service.setLayout(graph, objects)
+    service.writeInitSituation(
+        ["currentlocation(agent, {})".format(graph.getStartingPosition())]
+    )
+
+    def replan() -> dict:
+        service.update()
+        run = {
+            "latency": service.metrics.getLast("update").duration,
+            "planLength": len(service.stackOrders),
+            "horizon": service.currentGoalStep,
+            "nstep": service.program.nstep,
+            "programSize": sum(
+                len(service.program.getSection(name))
+                for name in service.program.SECTIONS
+            ),
+            "queueLength": len(service.intake),
+        }
+        completeOrders(service)
+        return run
+
+    runs = []
+    customers = CustomerAllocator()
+    while len(runs) < replans:
+        groupIDs = [customers.allocate(), customers.allocate()]
+        group = ["c{}".format(c) for c in groupIDs]
+
+        # Arrival (cf. MainWindow.clientEnter)
+        service.submit_goal("isattable({}, T)".format(group[0]))
+        for c in group:
+            service.submit_observation("has_entered({})".format(c), True)
+        service.submit_observation("group({}, {})".format(*group), True)
+        runs.append(replan())
+
+        table = None
+        for fluent in service.currentAnswerSet.getHolds(service.currentGoalStep):
+            if fluent.startswith("isattable({},".format(group[0])):
+                table = fluent.split(",")[1].rstrip(")").strip()
+        if table is None:
+            raise RuntimeError("Group {} not seated".format(group))
+
+        # Bill wave (cf. MainWindow.tableCallBill), then the group leaves
+        service.submit_observation("bill_wave({})".format(table), True)
+        for c in group:
+            service.submit_goal("haspaid({})".format(c))
+        runs.append(replan())
+        for c in groupIDs:
+            customers.release(c)
+        service.removeCustomers(group)
+
+    solver.close()
+    return runs[:replans]
+
+
+def reportWindows(runs: list, window: int = 50) -> list:
+    """Average the updates of runSoak per window of window updates, and print every window.
+
+    Returns:
+        [{str:float}]: Mean of every quantity of the updates (latency, planLength...) for each window.
+    """
+    windows = []
+    for start in range(0, len(runs), window):
+        chunk = runs[start : start + window]
+        windows.append(
+            {key: statistics.mean(run[key] for run in chunk) for key in chunk[0]}
+        )
+        print(
+            "replans {:>5}-{:<5} update {:>8.1f} ms | plan {:.1f} orders, horizon {:.1f}, nstep {:.1f}, "
+            "program {:.1f} rules, queue {:.1f}".format(
+                start + 1,
+                start + len(chunk),
+                1000.0 * windows[-1]["latency"],
+                windows[-1]["planLength"],
+                windows[-1]["horizon"],
+                windows[-1]["nstep"],
+                windows[-1]["programSize"],
+                windows[-1]["queueLength"],
+            )
+        )
+    return windows
+
+
+def formatResult(name: str, result: dict) -> str:
+    return "{:<14} {} | plan {:>2} orders, horizon {}".format(
+        name,
+        " ".join(
+            "{} {:>8.1f} ms".format(phase, 1000.0 * result[phase]) for phase in PHASES
+        ),
+        result["planLength"],
+        result["horizon"],
+    )
+
+
+def compareResults(results: dict, baseline: dict, tolerance: float) -> bool:
+    """Print the total time of each scenario against the baseline.
+
+    Returns:
+        bool: False if a scenario is slower than the baseline by more than tolerance (ratio), or if its plan changed.
+    """
+    ok = True
+    for name, result in results["scenarios"].items():
+        reference = baseline["scenarios"].get(name)
+        if reference is None:
+            print("{:<14} not in baseline".format(name))
+            continue
+        ratio = result["total"] / reference["total"] if reference["total"] else 1.0
+        status = "ok"
+        if ratio > 1.0 + tolerance:
+            status = "SLOWER"
+            ok = False
+        if result["planLength"] != reference["planLength"]:
+            status += " PLAN CHANGED ({} -> {})".format(
+                reference["planLength"], result["planLength"]
+            )
+            ok = False
+        print(
+            "{:<14} {:>8.1f} ms -> {:>8.1f} ms (x{:.2f}) {}".format(
+                name,
+                1000.0 * reference["total"],
+                1000.0 * result["total"],
+                ratio,
+                status,
+            )
+        )
+    return ok
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--planner", default="sparc", help="sparc, native or crosscheck"
+    )
+    parser.add_argument("--max-tables", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument(
+        "--deadline", type=float, default=None, help="Solve deadline (s)"
+    )
+    parser.add_argument(
+        "--translate-static",
+        action="store_true",
+        help="Translate the static part of the program once (cf. PlanningService)",
+    )
+    parser.add_argument(
+        "--optimal",
+        action="store_true",
+        help="Single solve minimising the goal step instead of the horizon search",
+    )
+    parser.add_argument(
+        "--compare-modes",
+        action="store_true",
+        help="Run the scenarios with the horizon search, then with the single optimal solve, and compare them",
+    )
+    parser.add_argument("--save", help="Write the results as JSON baseline")
+    parser.add_argument("--compare", help="JSON baseline to compare the results with")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument(
+        "--soak",
+        type=int,
+        default=0,
+        help="Run a single service through this number of replans instead of the scenarios",
+    )
+    args = parser.parse_args(argv)
+
+    options = {
+        "planner": args.planner,
+        "solveDeadline": args.deadline,
+        "translateStatic": args.translate_static,
+        "optimalPlan": args.optimal,
+    }
+    if args.soak > 0:
+        reportWindows(runSoak(args.soak, **options))
+        return 0
+
+    scenarios = generateScenarios(args.max_tables)
+    if args.compare_modes:
+        options["optimalPlan"] = False
+        print("Horizon search:")
+        iterative = runBenchmark(scenarios, args.repeats, **options)
+        options["optimalPlan"] = True
+        print("Single optimal solve:")
+        optimal = runBenchmark(scenarios, args.repeats, **options)
+        print("Single optimal solve against horizon search:")
+        compareResults(optimal, iterative, args.tolerance)
+        return 0
+
+    results = runBenchmark(scenarios, args.repeats, **options)
+    if args.save:
+        with open(args.save, "w") as baselineFile:
+            json.dump(results, baselineFile, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as baselineFile:
+            if not compareResults(results, json.load(baselineFile), args.tolerance):
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,7 @@ import pathlib
 from SpatialGraph import SpatialGraph, GraphPlotWidget, MyScene, ObjectSet
 from Util import printHeadLine, SwitchButton, euler_to_quaternion
 from ASP.CommunicationASP import CommunicationAspThread
+from ASP.CustomerAllocator import CustomerAllocator
 
 from PyQt5.QtCore import QThread, pyqtSignal, pyqtSlot, Qt
 from PyQt5 import QtWidgets as Qtw
@@ -25,12 +26,18 @@ QLineEdit, QLabel, QTabWidget {
 """
 
 class MyBot(PepperVirtual):
-    def __init__(self, physicsClientID, sceneGraph: SpatialGraph):
+    def __init__(
+        self, physicsClientID, sceneGraph: SpatialGraph, traversalCallback=None
+    ):
         super().__init__()
         self.goalPosition = sceneGraph.getStartingPosition()
         self.goalOrientation = 0.0
         self.pathToGoalPosition = []
         self.sceneGraph = sceneGraph
+        # Called with (fromPosition, toPosition, duration) each time an edge of the graph is traversed
+        self.traversalCallback = traversalCallback
+        self.lastPosition = None
+        self.lastPositionTime = time.time()
         self.loadRobot(
             translation=sceneGraph.getCoordinate(self.goalPosition),
             quaternion=[0, 0, 0, 1],
@@ -49,6 +56,7 @@ class MyBot(PepperVirtual):
         if len(self.pathToGoalPosition) > 0:
             # If we have reached next position in queue
             if self.isInPosition(self.pathToGoalPosition[0], delta=0.3):
+                self.reachPosition(self.pathToGoalPosition[0])
                 self.pathToGoalPosition = self.pathToGoalPosition[1:]
                 if len(self.pathToGoalPosition) > 0:
                     pos = self.sceneGraph.getCoordinate(self.pathToGoalPosition[0])
@@ -62,6 +70,16 @@ class MyBot(PepperVirtual):
                         speed=4.0,
                     )
 
+    def reachPosition(self, positionName: str):
+        now = time.time()
+        if self.lastPosition is not None and self.lastPosition != positionName:
+            if self.traversalCallback:
+                self.traversalCallback(
+                    self.lastPosition, positionName, now - self.lastPositionTime
+                )
+        self.lastPosition = positionName
+        self.lastPositionTime = now
+
     def isInPosition(self, x, y, delta=0.01):
         xP, yP, tP = self.getPosition()
         return (xP - x) ** 2 + (yP - y) ** 2 < delta ** 2
@@ -71,13 +89,23 @@ class MyBot(PepperVirtual):
         pos = self.sceneGraph.getCoordinate(namePosition)
         return (xP - pos[0]) ** 2 + (yP - pos[1]) ** 2 < delta ** 2
 
+    def getCurrentPosition(self, delta=0.3):
+        """Position of the graph Pepper stands at, None if it is more than delta away from every position."""
+        xP, yP, tP = self.getPosition()
+        name, dist = self.sceneGraph.getNearestPosition(xP, yP)
+        return name if dist < delta else None
+
     def moveToPosition(self, positionName: str, orientation: float = None):
         self.goalOrientation = orientation
         if self.sceneGraph.isPosition(positionName):
+            # Start from where Pepper stands if it stopped on a position on its way
+            start = self.getCurrentPosition() or self.goalPosition
             self.pathToGoalPosition = self.sceneGraph.findShortestPath(
-                self.goalPosition, positionName
+                start, positionName
             )
             self.goalPosition = positionName
+            # Traversal times are measured from the start of the move
+            self.lastPosition = None
         else:
             print(positionName + ": Unknown position.")
 
@@ -131,7 +159,8 @@ class SimulationThread(QThread):
         self.group_clients = []
         # Stores client ID number which have been picked by Pepper
         self.clientIDWithPepper = []
-        self.clientCounter = 0
+        # Client ID numbers (recycled when clients leave) and their bodies in the simulation
+        self.customers = CustomerAllocator()
 
         ## SIMULATION INITIALISATION ##
         ###############################
@@ -145,7 +174,7 @@ class SimulationThread(QThread):
 
         worldID = p.loadSDF(sceneName + ".sdf", globalScaling=1.0)
 
-        self.pepper = MyBot(physicsClientID, self.graph)
+        self.pepper = MyBot(physicsClientID, self.graph, self.aspThread.reportTraversal)
         p.setRealTimeSimulation(1)
 
         self.logOutput_signal.emit("Simulation environment ready", 'info')
@@ -159,11 +188,7 @@ class SimulationThread(QThread):
         z: float,
         theta: float,
         rotationOffset: float = 0.0,
-        newClient: bool = True,
     ):
-        if newClient:
-            self.clientCounter += 1
-
         scale = [0.165] * 3
         visShapeId = p.createVisualShape(
             shapeType=p.GEOM_MESH,
@@ -186,11 +211,8 @@ class SimulationThread(QThread):
         return bodyId
 
     def getClientsAtTable(self, tableNumber: int):
-        clients = []
-        for chairName, clientID in self.clientIDs.items():
-            if "t{}".format(tableNumber) in chairName:
-                clients.append(clientID)
-        return clients
+        chairs = self.objects.getChairsOfTable("table{}".format(tableNumber))
+        return [self.clientIDs[c] for c in chairs if c in self.clientIDs]
 
     def getAllClients(self):
         """Returns identification numbers and positions of all clients in the scene.
@@ -206,10 +228,10 @@ class SimulationThread(QThread):
             x, y, theta = self.objects.getCoordinate(chairName)
 
             if self.objects.isOccupied(chairName):
-                self.removeSeatedClient(chairName)
+                self.clientLeaves(chairName)
 
             newID = self.addClient(url, x, y, -0.3, theta, 0.15)
-            self.clientIDs[chairName] = self.clientCounter
+            self.clientIDs[chairName] = self.customers.allocate(newID)
             self.objects.setChairClientID(newID, chairName)
 
             return self.clientIDs[chairName]
@@ -235,9 +257,9 @@ class SimulationThread(QThread):
             if not orientation:
                 orientation = theta
             if positionName in self.standingClients.keys():
-                self.removeStandingClient(positionName)
+                self.clientLeaves(positionName)
             objectId = self.addClient(url, x, y, 0.0, orientation, 0.0)
-            self.clientIDs[positionName] = self.clientCounter
+            self.clientIDs[positionName] = self.customers.allocate(objectId)
             self.standingClients[positionName] = objectId
             return self.clientIDs[positionName]
         else:
@@ -257,6 +279,37 @@ class SimulationThread(QThread):
         else:
             return False
 
+    def clientLeaves(self, name: str):
+        """Remove the client at name (chair or position) from the scene and free its ID number for new clients.
+        The ASP program forgets the client at its next update."""
+        if name not in self.clientIDs:
+            return False
+        clientID = self.clientIDs[name]
+        if self.objects.isChair(name):
+            self.removeSeatedClient(name)
+        else:
+            self.removeStandingClient(name)
+        self.forgetClients([clientID])
+        return True
+
+    def forgetClients(self, clientIDs: list):
+        """Free the ID numbers of clients no longer in the scene (departed, or picked but never seated).
+        The ASP program forgets them at its next update."""
+        if len(clientIDs) == 0:
+            return
+        for clientID in clientIDs:
+            self.customers.release(clientID)
+        self.group_clients = [
+            [c for c in group if c not in clientIDs] for group in self.group_clients
+        ]
+        self.group_clients = [group for group in self.group_clients if group]
+        self.aspThread.removeCustomers(["c{}".format(c) for c in clientIDs])
+
+    def releasePickedClients(self):
+        """Forget the clients picked by Pepper and not seated yet (e.g. when the planner is reset)."""
+        self.forgetClients(self.clientIDWithPepper)
+        self.clientIDWithPepper = []
+
     @pyqtSlot(bool)
     def setState(self, b: bool):
         self.logOutput_signal.emit("Simulator " + "started" if b else "stopped", 'info')
@@ -291,23 +344,26 @@ class SimulationThread(QThread):
                             # Pepper pick a seated client
                             if self.objects.isChair(pos):
                                 self.removeSeatedClient(pos)
+                            self.customers.bind(client, None)
                             break
 
     def pepperSeatClient(self, clientID: int, idTable: int):
+        table = "table" + str(idTable)
         # If the table exists
-        if self.objects.isTable("table" + str(idTable)):
+        if self.objects.isTable(table):
             # If the table is empty
-            if len(self.getClientsAtTable(idTable)) == 0:
-                for i, cid in enumerate(self.clientIDWithPepper):
-                    chairName = "chair" + str(i + 1) + "t" + str(idTable)
+            if self.objects.getNbrFreeSeats(table) == self.objects.getCapacity(table):
+                freeChairs = self.objects.getFreeChairs(table)
+                for chairName, cid in zip(freeChairs, self.clientIDWithPepper):
                     x, y, theta = self.objects.getCoordinate(chairName)
                     url = self.dataPath / "alfred" / "seated" / "alfred.obj"
-                    newID = self.addClient(
-                        str(url), x, y, -0.3, theta, 0.15, newClient=False
-                    )
+                    newID = self.addClient(str(url), x, y, -0.3, theta, 0.15)
                     self.clientIDs[chairName] = cid
+                    self.customers.bind(cid, newID)
                     self.objects.setChairClientID(newID, chairName)
-                self.clientIDWithPepper = []
+                # Clients of the group left without a chair are no longer in the scene
+                self.clientIDWithPepper = self.clientIDWithPepper[len(freeChairs) :]
+                self.releasePickedClients()
 
     def pepperOrdersManager(self):
         if not bool(self.currentOrder):
@@ -1,5 +1,10 @@
+import array
+import collections
+import heapq
 import os
+import re
 import sys
+import threading
 import numpy as np
 from enum import Enum
 from PyQt5 import QtGui
@@ -75,9 +80,131 @@ class Table(Furniture):
         super(Table, self).__init__(heigth=heigth, width=width, x=x, y=y, theta=theta)
 
 
+class SpatialIndex:
+    def __init__(self, names: list, points: np.ndarray, cellSize: float = None):
+        """Uniform grid over 2D points, answering nearest and within-radius queries
+        without scanning every point (cf. SpatialGraph.getSpatialIndex, ObjectSet.getSpatialIndex).
+
+        Args:
+            names ([str]): Name of each point.
+            points (np.ndarray): (N,2) x, y coordinates, row i being the point of names[i].
+            cellSize (float, optional): Side of the grid cells (meters). Defaults to about one point per cell.
+        """
+        self.names = list(names)
+        self.points = np.asarray(points, dtype=float).reshape(-1, 2)
+        nbrPoints = len(self.points)
+        if nbrPoints > 0:
+            self.origin = self.points.min(axis=0)
+            spanX, spanY = self.points.max(axis=0) - self.origin
+        else:
+            self.origin = np.zeros(2)
+            spanX, spanY = 0.0, 0.0
+        if cellSize is None:
+            cellSize = max(
+                np.sqrt(spanX * spanY / max(nbrPoints, 1)),
+                max(spanX, spanY) / max(nbrPoints, 1),
+                1e-6,
+            )
+        self.cellSize = cellSize
+        self.shape = (int(spanX // cellSize) + 1, int(spanY // cellSize) + 1)
+
+        # Points sorted by cell (row-major), the points of a row of cells being contiguous
+        cells = ((self.points - self.origin) // cellSize).astype(np.int64)
+        keys = cells[:, 0] * self.shape[1] + cells[:, 1]
+        self._order = np.argsort(keys, kind="stable")
+        self._keys = keys[self._order]
+
+    def __len__(self):
+        return len(self.names)
+
+    def _getCell(self, x: float, y: float):
+        return (
+            int((x - self.origin[0]) // self.cellSize),
+            int((y - self.origin[1]) // self.cellSize),
+        )
+
+    def _getCandidates(self, minCell: tuple, maxCell: tuple) -> np.ndarray:
+        """Indexes of the points in the cells from minCell to maxCell (included), in order of the points."""
+        minX, minY = max(minCell[0], 0), max(minCell[1], 0)
+        maxX = min(maxCell[0], self.shape[0] - 1)
+        maxY = min(maxCell[1], self.shape[1] - 1)
+        if minX > maxX or minY > maxY:
+            return np.zeros(0, dtype=np.int64)
+        rows = np.arange(minX, maxX + 1) * self.shape[1]
+        starts = np.searchsorted(self._keys, rows + minY, side="left")
+        ends = np.searchsorted(self._keys, rows + maxY, side="right")
+        return np.sort(np.concatenate([self._order[s:e] for s, e in zip(starts, ends)]))
+
+    def nearest(self, x: float, y: float):
+        """Point closest to (x, y), the first added one between equally close points.
+
+        Returns:
+            (str, float): Name of the point and its distance, (None, inf) if there is no point.
+        """
+        if len(self.names) == 0:
+            return None, float("inf")
+        cellX, cellY = self._getCell(x, y)
+        # Smallest ring of cells around (x, y) reaching the grid
+        radius = max(
+            0, -cellX, -cellY, cellX - self.shape[0] + 1, cellY - self.shape[1] + 1
+        )
+        while True:
+            candidates = self._getCandidates(
+                (cellX - radius, cellY - radius), (cellX + radius, cellY + radius)
+            )
+            coversGrid = (
+                cellX - radius <= 0
+                and cellY - radius <= 0
+                and cellX + radius >= self.shape[0] - 1
+                and cellY + radius >= self.shape[1] - 1
+            )
+            if len(candidates) > 0:
+                distances = np.hypot(
+                    self.points[candidates, 0] - x, self.points[candidates, 1] - y
+                )
+                best = int(np.argmin(distances))
+                # Points out of the searched cells are at least radius cells away
+                if distances[best] < radius * self.cellSize or coversGrid:
+                    return self.names[candidates[best]], float(distances[best])
+            elif coversGrid:
+                return None, float("inf")
+            radius += 1
+
+    def withinRadius(self, x: float, y: float, radius: float) -> list:
+        """Points at most radius (meters) away from (x, y).
+
+        Returns:
+            [(str, float)]: Name and distance of the points, closest first.
+        """
+        candidates = self._getCandidates(
+            self._getCell(x - radius, y - radius), self._getCell(x + radius, y + radius)
+        )
+        distances = np.hypot(
+            self.points[candidates, 0] - x, self.points[candidates, 1] - y
+        )
+        inside = distances <= radius
+        candidates, distances = candidates[inside], distances[inside]
+        order = np.argsort(distances, kind="stable")
+        return [(self.names[candidates[i]], float(distances[i])) for i in order]
+
+
 class ObjectSet:
     def __init__(self):
-        self._objects = {}
+        """Furniture of the scene, stored by columns: object i has type code _types[i] (cf. FurnitureType),
+        pose _poses[i] (x, y, theta), size _sizes[i] (heigth, width) and, for a chair, the ID of its seated
+        client _occupants[i] (-1 if free). Chairs and tables are linked by explicit indexes (cf. addObject).
+        """
+        self._names = []
+        self._ids = {}
+        self._types = np.zeros(16, dtype=np.int8)
+        self._poses = np.zeros((16, 3))
+        self._sizes = np.zeros((16, 2))
+        self._occupants = np.full(16, -1, dtype=np.int64)
+        self._tableChairs = {}
+        self._chairTable = {}
+        self._freeSeats = {}
+        # SpatialIndex of each object type (None for all objects), built when needed and dropped when objects are added
+        self._spatialIndexes = {}
 
     def addObject(
         self,
@@ -88,97 +215,420 @@ class ObjectSet:
         width: float = 0.0,
         theta: float = 0.0,
         objType: FurnitureType = None,
+        table: str = None,
     ):
+        """Add a piece of furniture.
+
+        Args:
+            table (str, optional): For a chair, name of its table (which may be added later).
+                Defaults to the table named after the chair ('chair<i>t<j>' being around 'table<j>').
+        """
         if not self.isObject(name):
-            if not objType:
-                self._objects[name] = Furniture(
-                    heigth=heigth, width=width, x=x, y=y, theta=theta
+            objectID = len(self._names)
+            if objectID == len(self._types):
+                self._types = np.concatenate((self._types, np.zeros_like(self._types)))
+                self._poses = np.concatenate((self._poses, np.zeros_like(self._poses)))
+                self._sizes = np.concatenate((self._sizes, np.zeros_like(self._sizes)))
+                self._occupants = np.concatenate(
+                    (self._occupants, np.full_like(self._occupants, -1))
                 )
+            self._types[objectID] = (objType or FurnitureType.Null).value
+            self._poses[objectID] = (x, y, theta)
+            self._sizes[objectID] = (heigth, width)
+            self._ids[name] = objectID
+            self._names.append(name)
+
             if objType == FurnitureType.Table:
-                self._objects[name] = Table(
-                    heigth=heigth, width=width, x=x, y=y, theta=theta
-                )
+                self._tableChairs.setdefault(name, [])
+                self._freeSeats.setdefault(name, 0)
             if objType == FurnitureType.Chair:
-                self._objects[name] = Chair(
-                    heigth=heigth, width=width, x=x, y=y, theta=theta
-                )
+                if table is None:
+                    match = re.fullmatch(r"chair\d+t(\d+)", name)
+                    table = "table" + match.group(1) if match else None
+                if table is not None:
+                    self._chairTable[name] = table
+                    self._tableChairs.setdefault(table, []).append(name)
+                    self._freeSeats[table] = self._freeSeats.get(table, 0) + 1
+            self._spatialIndexes.clear()
             return True
         else:
             return False
 
+    def _getTypeCode(self, name: str) -> int:
+        return int(self._types[self._ids[name]]) if name in self._ids else None
+
     def isObject(self, name: str) -> bool:
-        return name in self._objects.keys()
+        return name in self._ids
 
     def isChair(self, name: str) -> bool:
-        return self.isObject(name) and isinstance(self._objects[name], Chair)
+        return self._getTypeCode(name) == FurnitureType.Chair.value
 
     def isTable(self, name: str) -> bool:
-        return self.isObject(name) and isinstance(self._objects[name], Table)
+        return self._getTypeCode(name) == FurnitureType.Table.value
 
     def getObjects(self, objType=None):
-        if not objType:
-            return self._objects.keys()
-        else:
-            out = []
-            for o in self._objects.keys():
-                if isinstance(self._objects[o], objType):
-                    out.append(o)
-            return out
+        """Names of the objects of type objType (Chair, Table, or a FurnitureType), of all objects if None or Furniture."""
+        if not objType or objType is Furniture:
+            return list(self._names)
+        code = _TYPE_CODES[objType] if objType in _TYPE_CODES else objType.value
+        return [
+            self._names[i]
+            for i in np.flatnonzero(self._types[: len(self._names)] == code)
+        ]
 
     def getCoordinate(self, name: str):
         if self.isObject(name):
-            return [
-                self._objects[name].x,
-                self._objects[name].y,
-                self._objects[name].theta,
-            ]
+            return self._poses[self._ids[name]].tolist()
+        else:
+            return None
+
+    def getSize(self, name: str):
+        """(heigth, width) of the object, None if unknown."""
+        if self.isObject(name):
+            return tuple(self._sizes[self._ids[name]].tolist())
         else:
             return None
 
+    ## Tables and chairs ##
+
+    def getTableOfChair(self, name: str) -> str:
+        return self._chairTable.get(name)
+
+    def getChairsOfTable(self, name: str) -> list:
+        """Chairs around the table, in order of addition."""
+        return list(self._tableChairs.get(name, []))
+
+    def getCapacity(self, name: str) -> int:
+        """Number of chairs around the table."""
+        return len(self._tableChairs.get(name, []))
+
+    def getNbrFreeSeats(self, name: str) -> int:
+        """Number of chairs without client around the table."""
+        return self._freeSeats.get(name, 0)
+
+    def getFreeChairs(self, name: str) -> list:
+        """Chairs without client around the table, in order of addition."""
+        return [
+            c
+            for c in self._tableChairs.get(name, [])
+            if self._occupants[self._ids[c]] < 0
+        ]
+
+    ## Spatial queries ##
+
+    def getSpatialIndex(self, objType=None) -> SpatialIndex:
+        """Spatial index of the objects of type objType (e.g. Chair), of all objects if None."""
+        if objType not in self._spatialIndexes:
+            names = self.getObjects(objType)
+            points = self._poses[[self._ids[o] for o in names], :2]
+            self._spatialIndexes[objType] = SpatialIndex(names, points)
+        return self._spatialIndexes[objType]
+
+    def getNearestObject(self, x: float, y: float, objType=None):
+        """Object (of type objType if given) closest to (x, y).
+
+        Returns:
+            (str, float): Name of the object and its distance, (None, inf) if there is none.
+        """
+        return self.getSpatialIndex(objType).nearest(x, y)
+
+    def getObjectsWithin(self, x: float, y: float, radius: float, objType=None):
+        """Objects (of type objType if given) at most radius away from (x, y), as (name, distance), closest first."""
+        return self.getSpatialIndex(objType).withinRadius(x, y, radius)
+
+    ## Occupancy ##
+
     def setChairClientID(self, idClient: int, name: str):
         if self.isChair(name):
-            self._objects[name].setClientID(idClient)
+            objectID = self._ids[name]
+            wasFree = self._occupants[objectID] < 0
+            self._occupants[objectID] = -1 if idClient is None else idClient
+            table = self._chairTable.get(name)
+            if table is not None:
+                self._freeSeats[table] += int(idClient is None) - int(wasFree)
             return True
         else:
             return False
 
     def getChairClientID(self, name: str):
         if self.isChair(name):
-            return self._objects[name].getClientID()
+            clientID = int(self._occupants[self._ids[name]])
+            return clientID if clientID >= 0 else None
         else:
             return None
 
     def isOccupied(self, name: str):
         if self.isChair(name):
-            print(self._objects[name].getClientID())
-            return not self._objects[name].getClientID() == None
-        if self.isTable(name):
-            return False
+            return bool(self._occupants[self._ids[name]] >= 0)
         else:
             return False
 
 
+# Type code of the furniture classes accepted by ObjectSet.getObjects
+_TYPE_CODES = {Chair: FurnitureType.Chair.value, Table: FurnitureType.Table.value}
+
+
+class PathTable:
+    def __init__(
+        self,
+        names: list,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        lengths: np.ndarray,
+        maxSources: int = 64,
+    ):
+        """Shortest paths of a SpatialGraph (cf. SpatialGraph.getPathTable), searched with Dijkstra from each start position
+        when it is first looked up. The shortest path trees of the maxSources most recently used starts are kept.
+
+        Args:
+            names ([str]): Positions, in ID order.
+            indptr (np.ndarray): CSR edges (cf. SpatialGraph.getAdjacency).
+            indices (np.ndarray): CSR edges (cf. SpatialGraph.getAdjacency).
+            lengths (np.ndarray): Cost of every edge.
+            maxSources (int, optional): Maximum number of shortest path trees kept. Defaults to 64.
+        """
+        self.names = names
+        self.indexes = {name: i for i, name in enumerate(names)}
+        self.indptr = indptr
+        self.indices = indices
+        self.lengths = lengths
+        self.maxSources = maxSources
+        self._trees = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, graph, weighted: bool = True, maxSources: int = 64):
+        """Path table over the edges of graph, weighted by their length or counting them."""
+        indptr, indices, lengths = graph.getAdjacency()
+        if not weighted:
+            lengths = np.ones(len(indices))
+        return cls(graph.getNodes(), indptr, indices, lengths, maxSources)
+
+    def __len__(self):
+        return len(self._trees)
+
+    def _search(self, source: int):
+        distances = np.full(len(self.names), np.inf)
+        parents = np.full(len(self.names), -1, dtype=np.int64)
+        distances[source] = 0.0
+        parents[source] = source
+        frontier = [(0.0, source)]
+        closed = np.zeros(len(self.names), dtype=bool)
+        while frontier:
+            distance, node = heapq.heappop(frontier)
+            if closed[node]:
+                continue
+            closed[node] = True
+            for k in range(self.indptr[node], self.indptr[node + 1]):
+                neighbor = int(self.indices[k])
+                cost = distance + self.lengths[k]
+                if cost < distances[neighbor]:
+                    distances[neighbor] = cost
+                    parents[neighbor] = node
+                    heapq.heappush(frontier, (cost, neighbor))
+        return distances, parents
+
+    def getTree(self, start: str):
+        """Shortest path tree from start.
+
+        Returns:
+            (np.ndarray, np.ndarray): Length of the shortest path to every position (inf if unreachable)
+                and previous position on it (-1 if unreachable), in ID order. None if start is unknown.
+        """
+        if start not in self.indexes:
+            return None
+        source = self.indexes[start]
+        with self._lock:
+            if source in self._trees:
+                self._trees.move_to_end(source)
+                return self._trees[source]
+        tree = self._search(source)
+        with self._lock:
+            self._trees[source] = tree
+            while len(self._trees) > self.maxSources:
+                self._trees.popitem(last=False)
+        return tree
+
+    def getPath(self, start: str, end: str):
+        if start not in self.indexes or end not in self.indexes:
+            return None
+        distances, parents = self.getTree(start)
+        j = self.indexes[end]
+        if parents[j] < 0:
+            return None
+        path = [end]
+        while j != self.indexes[start]:
+            j = parents[j]
+            path.append(self.names[j])
+        return path[::-1]
+
+    def getDistance(self, start: str, end: str) -> float:
+        if start not in self.indexes or end not in self.indexes:
+            return None
+        distances, parents = self.getTree(start)
+        return float(distances[self.indexes[end]])
+
+
 class SpatialGraph:
-    def __init__(self, directed: bool = True):
+    def __init__(self, directed: bool = True, usePathTable: bool = False):
+        """Navigation graph of named positions (x, y, theta).
+        Positions get integer IDs in order of addition: poses are rows of an (N,3) array and edges are stored
+        as CSR arrays (cf. getAdjacency), names being only used by the string API.
+
+        Args:
+            directed (bool, optional): Edges are one-way. Defaults to True.
+            usePathTable (bool, optional): Look paths up in the path table (cf. getPathTable) instead of searching them. Defaults to False.
+        """
         self.directed = directed
-        self._graph = {}
-        self._nodePositions = {}
+        self._names = []
+        self._ids = {}
+        self._poses = np.zeros((16, 3))
+        # Edges in order of addition, compressed into CSR arrays when read (cf. _updateAdjacency)
+        self._edgeSources = array.array("q")
+        self._edgeTargets = array.array("q")
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int64)
+        self._lengths = np.zeros(0)
+        self._adjacencyOutdated = False
         self.startingPosition = None
         self.entrancePosition = None
+        self.usePathTable = usePathTable
+        # PathTable of each mode (weighted or not), built when needed and dropped when the graph changes
+        self._pathTables = {}
+        self._spatialIndex = None
+
+    ## Compact storage ##
+
+    def _updateAdjacency(self):
+        if not self._adjacencyOutdated:
+            return
+        nbrNodes = len(self._names)
+        sources = np.frombuffer(self._edgeSources, dtype=np.int64)
+        targets = np.frombuffer(self._edgeTargets, dtype=np.int64)
+        # Stable sort: neighbors of a position keep their order of addition
+        order = np.argsort(sources, kind="stable")
+        self._indices = targets[order]
+        self._indptr = np.zeros(nbrNodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=nbrNodes), out=self._indptr[1:])
+        poses = self.getPoses()
+        sortedSources = sources[order]
+        self._lengths = np.hypot(
+            poses[self._indices, 0] - poses[sortedSources, 0],
+            poses[self._indices, 1] - poses[sortedSources, 1],
+        )
+        self._adjacencyOutdated = False
+
+    def getAdjacency(self):
+        """Edges in CSR form: the neighbors of position i are indices[indptr[i]:indptr[i+1]], at distances lengths[indptr[i]:indptr[i+1]].
+
+        Returns:
+            (np.ndarray, np.ndarray, np.ndarray): indptr (N+1), indices and lengths (one per edge, both directions if not directed).
+        """
+        self._updateAdjacency()
+        return self._indptr, self._indices, self._lengths
+
+    def getPoses(self) -> np.ndarray:
+        """(N,3) array of the (x, y, theta) poses, row i being the position of ID i. Not to be modified."""
+        return self._poses[: len(self._names)]
+
+    def getNodeID(self, name: str) -> int:
+        return self._ids.get(name)
+
+    def getNodeName(self, nodeID: int) -> str:
+        return self._names[nodeID]
+
+    def getDistancesTo(self, x: float, y: float) -> np.ndarray:
+        """Euclidean distance (meters) from (x, y) to every position, in ID order."""
+        poses = self.getPoses()
+        return np.hypot(poses[:, 0] - x, poses[:, 1] - y)
+
+    def getSpatialIndex(self) -> SpatialIndex:
+        """Spatial index of the positions, built once for the current positions."""
+        if self._spatialIndex is None:
+            self._spatialIndex = SpatialIndex(self._names, self.getPoses()[:, :2])
+        return self._spatialIndex
+
+    def getNearestPosition(self, x: float, y: float):
+        """Position closest to (x, y).
+
+        Returns:
+            (str, float): Name of the position and its distance, (None, inf) if the graph is empty.
+        """
+        return self.getSpatialIndex().nearest(x, y)
+
+    def getPositionsWithin(self, x: float, y: float, radius: float):
+        """Positions at most radius away from (x, y), as (name, distance), closest first."""
+        return self.getSpatialIndex().withinRadius(x, y, radius)
+
+    ## Paths ##
+
+    def getPathTable(self, weighted: bool = True) -> PathTable:
+        """Shortest paths from the positions looked up, kept until the positions or edges change."""
+        if weighted not in self._pathTables:
+            self._pathTables[weighted] = PathTable.build(self, weighted)
+        return self._pathTables[weighted]
+
+    def getDistance(self, start: str, end: str, weighted: bool = True) -> float:
+        """Length (meters, or number of edges if not weighted) of the shortest path between two positions,
+        inf if end cannot be reached and None for unknown positions."""
+        return self.getPathTable(weighted).getDistance(start, end)
 
-    # function to find the shortest path
-    def findShortestPath(self, start: str, end: str, path=[]):
-        path = path + [start]
-        if start == end:
-            return path
-        shortest = None
-        for node in self._graph[start]:
-            if node not in path:
-                newpath = self.findShortestPath(node, end, path)
-                if newpath:
-                    if not shortest or len(newpath) < len(shortest):
-                        shortest = newpath
-        return shortest
+    def findShortestPath(self, start: str, end: str, weighted: bool = True):
+        """Shortest path between two positions, looked up in the path table if usePathTable, searched with A* otherwise.
+
+        Args:
+            start (str): First position of the path.
+            end (str): Last position of the path.
+            weighted (bool, optional): Shortest in meters (edge lengths, Euclidean heuristic),
+                otherwise fewest edges as in the former search. Defaults to True.
+
+        Returns:
+            [str]: Positions from start to end, None if end cannot be reached.
+        """
+        if not self.isPosition(start) or not self.isPosition(end):
+            return None
+        if self.usePathTable:
+            return self.getPathTable(weighted).getPath(start, end)
+
+        indptr, indices, lengths = self.getAdjacency()
+        startID, endID = self._ids[start], self._ids[end]
+        if weighted:
+            poses = self.getPoses()
+            heuristic = self.getDistancesTo(poses[endID, 0], poses[endID, 1])
+        else:
+            heuristic = np.zeros(len(self._names))
+
+        costs = {startID: 0.0}
+        parents = {startID: None}
+        # Entries (estimate, counter, node), the counter keeps the order of insertion between ties
+        frontier = [(heuristic[startID], 0, startID)]
+        counter = 1
+        closed = set()
+        while frontier:
+            _, _, node = heapq.heappop(frontier)
+            if node == endID:
+                path = []
+                while node is not None:
+                    path.append(self._names[node])
+                    node = parents[node]
+                return path[::-1]
+            if node in closed:
+                continue
+            closed.add(node)
+
+            for k in range(indptr[node], indptr[node + 1]):
+                neighbor = int(indices[k])
+                cost = costs[node] + (lengths[k] if weighted else 1.0)
+                if neighbor not in costs or cost < costs[neighbor]:
+                    costs[neighbor] = cost
+                    parents[neighbor] = node
+                    heapq.heappush(
+                        frontier, (cost + heuristic[neighbor], counter, neighbor)
+                    )
+                    counter += 1
+        return None
+
+    ## Positions ##
 
     def getEntrancePosition(self):
         return self.entrancePosition
@@ -186,7 +636,6 @@ class SpatialGraph:
     def setEntrancePosition(self, name: str):
         self.entrancePosition = name
 
-
     def getStartingPosition(self):
         return self.startingPosition
 
@@ -198,74 +647,128 @@ class SpatialGraph:
             return False
 
     def isPosition(self, name: str) -> bool:
-        return name in self._graph.keys()
+        return name in self._ids
 
     def addPosition(self, name: str, x: float, y: float, theta: float):
         if not self.isPosition(name):
-            self._graph[name] = []
-            self._nodePositions[name] = [x, y, theta]
-            if len(self._graph) == 0:
-                self.startingPosition = name
+            nodeID = len(self._names)
+            if nodeID == len(self._poses):
+                self._poses = np.concatenate((self._poses, np.zeros_like(self._poses)))
+            self._poses[nodeID] = (x, y, theta)
+            self._ids[name] = nodeID
+            self._names.append(name)
+            self._adjacencyOutdated = True
+            self._pathTables.clear()
+            self._spatialIndex = None
             return True
         else:
             return False
 
     def addEdge(self, fromPos: str, toPos: str):
         if self.isPosition(fromPos) and self.isPosition(toPos):
-            self._graph[fromPos].append(toPos)
+            self._edgeSources.append(self._ids[fromPos])
+            self._edgeTargets.append(self._ids[toPos])
             if not self.directed:
-                self._graph[toPos].append(fromPos)
+                self._edgeSources.append(self._ids[toPos])
+                self._edgeTargets.append(self._ids[fromPos])
+            self._adjacencyOutdated = True
+            self._pathTables.clear()
             return True
         else:
             return False
 
     def getCoordinate(self, name: str):
         if self.isPosition(name):
-            return self._nodePositions[name]
+            return self._poses[self._ids[name]].tolist()
         else:
             return None
 
     def getEdges(self):
-        output = []
-        for node in self._nodePositions.keys():
-            posStart = self._nodePositions[node]
-            for edge in self._graph[node]:
-                posGoal = self._nodePositions[edge]
-                output.append(([posStart[0], posGoal[0]], [posStart[1], posGoal[1]]))
-                # plt.plot([posStart[0], posGoal[0]], [posStart[1], posGoal[1]], 'k-')
-        return output
+        indptr, indices, lengths = self.getAdjacency()
+        poses = self.getPoses()
+        sources = np.repeat(np.arange(len(self._names)), np.diff(indptr))
+        return list(
+            zip(
+                np.stack((poses[sources, 0], poses[indices, 0]), axis=1).tolist(),
+                np.stack((poses[sources, 1], poses[indices, 1]), axis=1).tolist(),
+            )
+        )
 
     def getNodes(self):
-        return self._nodePositions.keys()
+        return list(self._names)
+
+    def getNeighbors(self, name: str):
+        if self.isPosition(name):
+            indptr, indices, lengths = self.getAdjacency()
+            nodeID = self._ids[name]
+            return [
+                self._names[i] for i in indices[indptr[nodeID] : indptr[nodeID + 1]]
+            ]
+        else:
+            return []
+
+    def getEdgeLength(self, fromPos: str, toPos: str) -> float:
+        """Euclidean distance (meters) between two positions."""
+        if self.isPosition(fromPos) and self.isPosition(toPos):
+            xFrom, yFrom = self._poses[self._ids[fromPos], :2]
+            xTo, yTo = self._poses[self._ids[toPos], :2]
+            return float(np.hypot(xTo - xFrom, yTo - yFrom))
+        else:
+            return None
+
+    def getEdgeLengths(self) -> dict:
+        """Length (meters) of every edge, in both directions.
+
+        Returns:
+            {(str, str):float}: Length of each (fromPos, toPos) edge.
+        """
+        indptr, indices, lengths = self.getAdjacency()
+        lengthsDict = {}
+        for nodeID, node in enumerate(self._names):
+            for k in range(indptr[nodeID], indptr[nodeID + 1]):
+                edge = self._names[indices[k]]
+                lengthsDict[(node, edge)] = float(lengths[k])
+                lengthsDict[(edge, node)] = float(lengths[k])
+        return lengthsDict
 
     def generateASP(self, url: str):
         fileAsp = open(url, "w")
 
-        vertexStr = "#vertex = {"
-        nbrVertex = len(self._nodePositions)
+        vertexStr = "#vertex = {" + ",".join(self._names) + "}"
         edgeSTR = ""
-
-        for counterNode, node in enumerate(self._nodePositions.keys()):
-            vertexStr += node
-            vertexStr += "}" if counterNode == nbrVertex - 1 else ","
-
-            nbrEdge = len(self._graph[node])
-            for counterEdge, edge in enumerate(self._graph[node]):
-                new_edge = "edge({},{}).".format(node, edge)
-                new_edge_bis = "edge({},{}).".format(edge, node)
-                if (new_edge not in edgeSTR) and (new_edge_bis not in edgeSTR):
-                    edgeSTR += new_edge + "\n"
+        lengthSTR = ""
+
+        written = set()
+        for node in self._names:
+            for edge in self.getNeighbors(node):
+                if (node, edge) not in written and (edge, node) not in written:
+                    written.add((node, edge))
+                    edgeSTR += "edge({},{}).\n".format(node, edge)
+                    # Integer lengths in centimeters, ASP has no real numbers
+                    lengthSTR += "edgelength({},{},{}).\n".format(
+                        node, edge, int(round(100.0 * self.getEdgeLength(node, edge)))
+                    )
 
         fileAsp.write("%% Graph generated by the RoboticVisionSimulator.\n\n")
         fileAsp.write(vertexStr + "\n\n")
         fileAsp.write(edgeSTR)
+        fileAsp.write("\n" + lengthSTR)
         fileAsp.close()
 
         print("ASP graph generated:  " + str(url))
 
 
+def getNearestItem(graph: SpatialGraph, objects: ObjectSet, x: float, y: float) -> str:
+    """Name of the position or object closest to (x, y), positions first between equally close items."""
+    position, positionDist = graph.getNearestPosition(x, y)
+    obj, objDist = objects.getNearestObject(x, y)
+    if obj is not None and objDist < positionDist:
+        return obj
+    return position if position is not None else ""
+
+
 def MyScene() -> SpatialGraph:
-    graph = SpatialGraph(directed=False)
+    graph = SpatialGraph(directed=False, usePathTable=True)
     graph.addPosition("n0_0", -2.0, -2.90, -np.pi/2.)
     graph.addPosition("n0_1", -2.7, -2.1, 3.*np.pi/4.)
     graph.addPosition("n0_2", -2.7, -2.8, -3.*np.pi/4.)
@@ -319,6 +822,7 @@ def MyScene() -> SpatialGraph:
     )
     objects.addObject(
         name="chair1t1",
+        table="table1",
         objType=FurnitureType.Chair,
         x=0.75,
         y=-2.6,
@@ -328,6 +832,7 @@ def MyScene() -> SpatialGraph:
     )
     objects.addObject(
         name="chair2t1",
+        table="table1",
         objType=FurnitureType.Chair,
         x=-0.75,
         y=-2.6,
@@ -346,6 +851,7 @@ def MyScene() -> SpatialGraph:
     )
     objects.addObject(
         name="chair1t2",
+        table="table2",
         objType=FurnitureType.Chair,
         x=0.75,
         y=-0.8,
@@ -355,6 +861,7 @@ def MyScene() -> SpatialGraph:
     )
     objects.addObject(
         name="chair2t2",
+        table="table2",
         objType=FurnitureType.Chair,
         x=-0.75,
         y=-0.8,
@@ -364,6 +871,7 @@ def MyScene() -> SpatialGraph:
     )
     objects.addObject(
         name="chair3t2",
+        table="table2",
         objType=FurnitureType.Chair,
         x=0.75,
         y=0.0,
@@ -373,6 +881,7 @@ def MyScene() -> SpatialGraph:
     )
     objects.addObject(
         name="chair4t2",
+        table="table2",
         objType=FurnitureType.Chair,
         x=-0.75,
         y=0.0,
@@ -391,6 +900,7 @@ def MyScene() -> SpatialGraph:
     )
     objects.addObject(
         name="chair1t3",
+        table="table3",
         objType=FurnitureType.Chair,
         x=0.75,
         y=1.72,
@@ -400,6 +910,7 @@ def MyScene() -> SpatialGraph:
     )
     objects.addObject(
         name="chair2t3",
+        table="table3",
         objType=FurnitureType.Chair,
         x=-0.75,
         y=1.72,
@@ -409,6 +920,7 @@ def MyScene() -> SpatialGraph:
     )
     objects.addObject(
         name="chair3t3",
+        table="table3",
         objType=FurnitureType.Chair,
         x=0.75,
         y=2.6,
@@ -418,6 +930,7 @@ def MyScene() -> SpatialGraph:
     )
     objects.addObject(
         name="chair4t3",
+        table="table3",
         objType=FurnitureType.Chair,
         x=-0.75,
         y=2.6,
@@ -436,6 +949,7 @@ def MyScene() -> SpatialGraph:
     )
     objects.addObject(
         name="chair1t4",
+        table="table4",
         objType=FurnitureType.Chair,
         x=3.25,
         y=-2.6,
@@ -444,6 +958,7 @@ def MyScene() -> SpatialGraph:
     )
     objects.addObject(
         name="chair2t4",
+        table="table4",
         objType=FurnitureType.Chair,
         x=1.75,
         y=-2.6,
@@ -461,6 +976,7 @@ def MyScene() -> SpatialGraph:
     )
     objects.addObject(
         name="chair1t5",
+        table="table5",
         objType=FurnitureType.Chair,
         x=3.25,
         y=-0.8,
@@ -469,6 +985,7 @@ def MyScene() -> SpatialGraph:
     )
     objects.addObject(
         name="chair2t5",
+        table="table5",
         objType=FurnitureType.Chair,
         x=1.75,
         y=-0.8,
@@ -477,6 +994,7 @@ def MyScene() -> SpatialGraph:
     )
     objects.addObject(
         name="chair3t5",
+        table="table5",
         objType=FurnitureType.Chair,
         x=3.25,
         y=0.0,
@@ -485,6 +1003,7 @@ def MyScene() -> SpatialGraph:
     )
     objects.addObject(
         name="chair4t5",
+        table="table5",
         objType=FurnitureType.Chair,
         x=1.75,
         y=0.0,
@@ -497,6 +1016,7 @@ def MyScene() -> SpatialGraph:
     )
     objects.addObject(
         name="chair1t6",
+        table="table6",
         objType=FurnitureType.Chair,
         x=3.25,
         y=1.72,
@@ -505,6 +1025,7 @@ def MyScene() -> SpatialGraph:
     )
     objects.addObject(
         name="chair2t6",
+        table="table6",
         objType=FurnitureType.Chair,
         x=1.75,
         y=1.72,
@@ -513,6 +1034,7 @@ def MyScene() -> SpatialGraph:
     )
     objects.addObject(
         name="chair3t6",
+        table="table6",
         objType=FurnitureType.Chair,
         x=3.25,
         y=2.6,
@@ -521,6 +1043,7 @@ def MyScene() -> SpatialGraph:
     )
     objects.addObject(
         name="chair4t6",
+        table="table6",
         objType=FurnitureType.Chair,
         x=1.75,
         y=2.6,
@@ -651,27 +1174,13 @@ class ClickablePlotWidget(pg.PlotWidget):
 
     def callBillEmit(self):
         if self.objects.isTable(self.lastObjClicked):
-            tableNum = int(self.lastObjClicked[5:])
+            table = self.lastObjClicked
         elif self.objects.isChair(self.lastObjClicked):
-            tableNum = int(self.lastObjClicked.split("t")[1])
-        self.tableCallBill_signal.emit(tableNum)
+            table = self.objects.getTableOfChair(self.lastObjClicked)
+        self.tableCallBill_signal.emit(int(table[5:]))
 
     def getNameItemClicked(self, x: float, y: float):
-        closest = ""
-        minDist = sys.float_info.max
-        for v in self.graph.getNodes():
-            vX, vY, vTheta = self.graph.getCoordinate(v)
-            dist = (x - vX) ** 2 + (y - vY) ** 2
-            if dist < minDist:
-                minDist = dist
-                closest = v
-        for o in self.objects.getObjects():
-            oX, oY, oTheta = self.objects.getCoordinate(o)
-            dist = (x - oX) ** 2 + (y - oY) ** 2
-            if dist < minDist:
-                minDist = dist
-                closest = o
-        return closest
+        return getNearestItem(self.graph, self.objects, x, y)
 
     def setMenuTitle(self, name: str):
         self.menuTitle.setText(name)
@@ -758,21 +1267,7 @@ class GraphPlotWidget(Qtw.QWidget):
 
     @pyqtSlot(float, float)
     def itemClicked(self, x: float, y: float):
-        closest = ""
-        minDist = sys.float_info.max
-        for v in self.graph.getNodes():
-            vX, vY, vTheta = self.graph.getCoordinate(v)
-            dist = (x - vX) ** 2 + (y - vY) ** 2
-            if dist < minDist:
-                minDist = dist
-                closest = v
-        for o in self.objects.getObjects():
-            oX, oY, oTheta = self.objects.getCoordinate(o)
-            dist = (x - oX) ** 2 + (y - oY) ** 2
-            if dist < minDist:
-                minDist = dist
-                closest = o
-        self.positionClicked.emit(closest)
+        self.positionClicked.emit(getNearestItem(self.graph, self.objects, x, y))
 
 
 if __name__ == "__main__":
@@ -94,6 +94,7 @@ class MainWindow(Qtw.QMainWindow):
         print("%d threads available." % maxThread)
 
         self.aspThread = CommunicationAspThread(self.centralWidget.newLog_signal)
+        self.aspThread.setLayout(self.restaurantGraph, self.restaurantObjects)
         self.aspThread.setState(False)
         self.aspThread.start()
 
@@ -150,13 +151,15 @@ class MainWindow(Qtw.QMainWindow):
             dictClients = self.simThread.getAllClients()
             for chairName, clientID in dictClients.items():
                 if self.restaurantObjects.isChair(chairName):
-                    tableNumber = int(chairName.split("t")[-1])
                     initialisation.append(
-                        "isattable(c{}, table{})".format(clientID, tableNumber)
+                        "isattable(c{}, {})".format(
+                            clientID, self.restaurantObjects.getTableOfChair(chairName)
+                        )
                     )
 
             self.aspThread.writeInitSituation(initialisation)
         else:
+            self.simThread.releasePickedClients()
             self.aspThread.resetAll()
         self.aspThread.setState(state)
 
@@ -207,10 +210,10 @@ class MainWindow(Qtw.QMainWindow):
 
     @pyqtSlot(str)
     def removeClient(self, name):
-        if self.restaurantObjects.isChair(name):
-            self.simThread.removeSeatedClient(name)
-        elif self.restaurantGraph.isPosition(name):
-            self.simThread.removeStandingClient(name)
+        if self.restaurantObjects.isChair(name) or self.restaurantGraph.isPosition(
+            name
+        ):
+            self.simThread.clientLeaves(name)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,19 @@
+import os
+import pathlib
+import shutil
+import sys
+
+import pytest
+
+# Modules of the bot import each other from its directory (e.g. "from ASP.SparcSolver import SparcSolver")
+BOT_PATH = pathlib.Path(__file__).parent.parent.absolute() / "commonsense_reasoning_bot"
+sys.path.insert(0, str(BOT_PATH))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+requiresSparc = pytest.mark.skipif(
+    shutil.which("java") is None, reason="SPARC needs a Java runtime"
+)
+requiresClingo = pytest.mark.skipif(
+    shutil.which("java") is None or shutil.which("clingo") is None,
+    reason="Translated programs need a Java runtime and clingo",
+)
@@ -0,0 +1,48 @@
+from ASP.AnswerSet import AnswerSet, Term, parseAnswerSets, parseTerm
+
+SPARC_OUTPUT = """SPARC V2.55
+program translated
+{holds(currentlocation(agent,n7),0), occurs(go_to(agent,n5),0), -occurs(greet(agent,c1),0),
+ holds(currentlocation(agent,n5),1), occurs(greet(agent,c1),1), holds(isgreeted(c1),2),
+ goal(2), goal(3), success}
+{holds(currentlocation(agent,n7),0)}
+"""
+
+
+def test_parse_term():
+    term = parseTerm("isattable(c1, table2)")
+    assert term == Term("isattable", (Term("c1", ()), Term("table2", ())))
+    assert str(term) == "isattable(c1,table2)"
+    assert str(parseTerm("success")) == "success"
+
+
+def test_answer_sets_are_indexed_by_step():
+    answerSets = parseAnswerSets(SPARC_OUTPUT)
+    assert len(answerSets) == 2
+
+    answerSet = answerSets[0]
+    assert answerSet.getOrders() == ["go_to(agent,n5)", "greet(agent,c1)"]
+    assert answerSet.getHolds(1) == ["currentlocation(agent,n5)"]
+    assert answerSet.getHolds(4) == []
+    assert answerSet.getGoalStep() == 2
+    assert [str(atom) for atom in answerSet.negated] == ["occurs(greet(agent,c1),0)"]
+    assert [str(atom) for atom in answerSet.others] == ["success"]
+
+
+def test_inconsistent_output_has_no_answer_set():
+    assert parseAnswerSets("SPARC V2.55\nprogram translated\n") == []
+
+
+def test_from_trajectory_matches_parsed_answer_set():
+    answerSet = AnswerSet.fromTrajectory(
+        [["currentlocation(agent,n7)"], ["currentlocation(agent,n5)"]],
+        [parseTerm("go_to(agent,n5)")],
+        [1],
+    )
+    parsed = parseAnswerSets(
+        "{holds(currentlocation(agent,n7),0), occurs(go_to(agent,n5),0),"
+        " holds(currentlocation(agent,n5),1), goal(1)}"
+    )[0]
+    assert answerSet.getOrders() == parsed.getOrders()
+    assert answerSet.getHolds(1) == parsed.getHolds(1)
+    assert answerSet.getGoalStep() == parsed.getGoalStep()
@@ -0,0 +1,47 @@
+from ASP.CustomerAllocator import CustomerAllocator
+
+
+def test_smallest_released_number_is_reused():
+    customers = CustomerAllocator()
+    assert [customers.allocate(bodyID) for bodyID in (10, 11, 12, 13)] == [1, 2, 3, 4]
+
+    assert customers.release(3) and customers.release(2)
+    assert not customers.release(2)
+    assert customers.getCustomers() == [1, 4]
+
+    assert customers.allocate(20) == 2
+    assert customers.allocate(21) == 3
+    assert customers.allocate(22) == 5
+    assert len(customers) == 5
+
+
+def test_bodies_follow_the_customers():
+    customers = CustomerAllocator()
+    customerID = customers.allocate(10)
+    assert customers.getBodyID(customerID) == 10
+    assert customers.getCustomerID(10) == customerID
+
+    # Picked by Pepper: no body in the scene until the customer is seated
+    customers.bind(customerID, None)
+    assert customerID in customers
+    assert customers.getCustomerID(10) is None
+    customers.bind(customerID, 30)
+    assert customers.getCustomerID(30) == customerID
+
+    customers.release(customerID)
+    assert customerID not in customers
+    assert customers.getCustomerID(30) is None
+    assert customers.allocate() == customerID
+    assert customers.getBodyID(customerID) is None
+
+
+def test_clear_restarts_the_numbering():
+    customers = CustomerAllocator()
+    for bodyID in range(3):
+        customers.allocate(bodyID)
+    customers.release(1)
+    customers.clear()
+
+    assert len(customers) == 0
+    assert customers.allocate(7) == 1
+    assert customers.getCustomerID(0) is None
@@ -0,0 +1,53 @@
+import threading
+
+from ASP.IntakeQueue import GOAL, OBSERVATION, IntakeQueue
+
+
+def test_batch_keeps_the_order_of_arrival():
+    intake = IntakeQueue()
+    assert intake.put(OBSERVATION, "has_entered(c1)") == 1
+    assert intake.put(GOAL, "isattable(c1, T)") == 2
+    assert intake.put(OBSERVATION, "bill_wave(table1)", True) == 3
+    assert intake.put(OBSERVATION, "has_entered(c1)", False) == 4
+    assert intake.hasObservations()
+
+    batch = intake.take()
+    assert len(batch) == 4 and len(intake) == 0
+    assert not intake.hasObservations()
+    assert batch.getSequences() == [1, 2, 3, 4]
+    assert batch.getGoals() == ["isattable(c1, T)"]
+    # The last value submitted for an observation wins
+    assert list(batch.getObservations().items()) == [
+        ("has_entered(c1)", False),
+        ("bill_wave(table1)", True),
+    ]
+    assert batch.getLastSequence() == 4
+    assert intake.take().getLastSequence(4) == 4
+
+
+def test_requeued_batch_is_taken_before_later_intakes():
+    intake = IntakeQueue()
+    intake.put(GOAL, "haspaid(c1)")
+    intake.put(OBSERVATION, "bill_wave(table1)")
+    batch = intake.take()
+    intake.put(GOAL, "isattable(c2, T)")
+
+    intake.requeue(batch)
+    assert intake.take().getSequences() == [1, 2, 3]
+    assert intake.getLastSequence() == 3
+
+
+def test_concurrent_producers_get_distinct_sequences():
+    intake = IntakeQueue()
+
+    def produce():
+        for i in range(200):
+            intake.put(GOAL, "haspaid(c{})".format(i))
+
+    threads = [threading.Thread(target=produce) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert intake.take().getSequences() == list(range(1, 801))
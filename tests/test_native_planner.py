@@ -0,0 +1,83 @@
+from conftest import requiresSparc
+from ASP.AnswerSet import parseTerm
+from ASP.NativePlanner import NativePlanner
+from ASP.PlanningService import FILE_PATH, PlanningService
+from ASP.ProgramBuilder import ProgramASP
+from ASP.RestaurantModel import RestaurantDomain, RestaurantState, replayPlan
+
+
+def getDomain() -> RestaurantDomain:
+    return RestaurantDomain.fromProgram(ProgramASP(FILE_PATH / "ProgramASP.sparc"))
+
+
+def test_plan_has_the_minimal_number_of_steps():
+    domain = getDomain()
+    state = RestaurantState.fromFluents(
+        domain, ["currentlocation(agent,n4)", "currentlocation(w1,n7)", "iswaiting(c1)"]
+    )
+    states, actions = NativePlanner(domain).plan(
+        state, [parseTerm("isattable(c1, T)")], 15
+    )
+
+    orders = [str(action) for action in actions]
+    assert orders[:3] == ["go_to(agent,n5)", "pick(agent,c1)", "go_to(agent,n6)"]
+    assert orders[3].startswith("seat(agent,c1,")
+    assert replayPlan(state, orders)[-1].satisfies(parseTerm("isattable(c1, T)"))
+    assert len(states) == 5
+
+
+def test_no_plan_within_max_steps():
+    domain = getDomain()
+    state = RestaurantState.fromFluents(
+        domain, ["currentlocation(agent,n1)", "currentlocation(w1,n7)", "iswaiting(c1)"]
+    )
+    planner = NativePlanner(domain)
+    assert planner.plan(state, [parseTerm("isattable(c1, T)")], 5) is None
+    assert planner.plan(state, [parseTerm("isattable(c1, T)")], 7) is not None
+
+
+def test_plan_program_reads_the_dynamic_sections():
+    program = ProgramASP(FILE_PATH / "ProgramASP.sparc")
+    for name in program.SECTIONS:
+        program.clearSection(name)
+    program.addToSection(
+        "init",
+        ["holds(currentlocation(agent,n4),0).", "holds(currentlocation(w1,n7),0)."],
+    )
+    program.addToSection("obs", ["obs(has_entered(c1),true,0)."])
+    program.addToSection("goal", ["goal(I):- holds(isattable(c1, T),I)."])
+
+    answerSet = NativePlanner(getDomain()).planProgram(program, 15)
+    assert len(answerSet.getOrders()) == 4
+    assert answerSet.getGoalStep() == 4
+    assert "isattable(c1,table1)" in answerSet.getHolds(4) or (
+        "isattable(c1,table2)" in answerSet.getHolds(4)
+    )
+
+
+@requiresSparc
+def test_native_and_sparc_plans_have_the_same_length():
+    messages = []
+    service = PlanningService(
+        lambda message, log_type: messages.append((log_type, message)),
+        planner="crosscheck",
+        planCacheSize=0,
+        planCheck=False,
+        debounceDelay=0.0,
+    )
+    service.writeInitSituation(
+        [
+            "currentlocation(agent, n4)",
+            "currentlocation(w1, n1)",
+            "isattable(c1, table2)",
+        ]
+    )
+    service.submit_goal("isattable(c2, T)")
+    service.submit_goal("haspaid(c1)")
+    service.submit_observation("has_entered(c2)", True)
+    service.submit_observation("bill_wave(table2)", True)
+    service.update()
+    service.solver.close()
+
+    assert len(service.stackOrders) > 0
+    assert not any(log_type == "error" for log_type, message in messages), messages
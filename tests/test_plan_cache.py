@@ -0,0 +1,41 @@
+from ASP.PlanCache import PlanCache
+from ASP.PlanningService import FILE_PATH
+from ASP.ProgramBuilder import ProgramASP
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PlanCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.get("b") is None
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_zero_size_disables_the_cache():
+    cache = PlanCache(0)
+    cache.put("a", 1)
+    assert len(cache) == 0
+    assert cache.get("a") is None
+
+
+def test_fingerprint_ignores_rule_order_and_whitespace():
+    program = ProgramASP(FILE_PATH / "ProgramASP.sparc")
+    program.addToSection(
+        "obs", ["obs(has_entered(c1),true,0).", "obs(group(c1,c2),true,0)."]
+    )
+    other = ProgramASP(FILE_PATH / "ProgramASP.sparc")
+    other.addToSection(
+        "obs", ["obs(group(c1, c2), true, 0).", "obs(has_entered(c1), true, 0)."]
+    )
+
+    assert program.fingerprint(5) == other.fingerprint(5)
+    assert program.fingerprint(5) != program.fingerprint(6)
+    assert program.problemFingerprint() == other.problemFingerprint()
+
+    other.addToSection("goal", ["goal(I):- holds(isattable(c1, T),I)."])
+    assert program.fingerprint(5) != other.fingerprint(5)
@@ -0,0 +1,211 @@
+import os
+import queue
+import re
+
+from ASP.PlanningService import PlanningService
+from ASP.SparcSolver import SolveTimeout, SparcSolver
+
+
+class StubSolver:
+    """Records the horizons given to the parallel search, horizons from satisfiableFrom on have a plan."""
+
+    def __init__(self, satisfiableFrom: int):
+        self.satisfiableFrom = satisfiableFrom
+        self.horizons = None
+
+    def findMinimalHorizon(
+        self, renderProgram, horizons, isSatisfiable, results=None, timeout=None
+    ):
+        self.horizons = list(horizons)
+        for n in sorted(self.horizons):
+            results[n] = (
+                "{holds(currentlocation(agent,n7),0)}"
+                if n >= self.satisfiableFrom
+                else ""
+            )
+        best = min(n for n in self.horizons if n >= self.satisfiableFrom)
+        return best, results[best]
+
+
+def test_parallel_horizons_use_one_worker_per_core():
+    service = PlanningService(parallelHorizons=True)
+    assert len(service.solver.workers) == (os.cpu_count() or 1)
+    service.solver.close()
+
+    service = PlanningService()
+    assert len(service.solver.workers) == 1
+    service.solver.close()
+
+
+def test_parallel_horizons_start_around_the_estimate():
+    solver = StubSolver(satisfiableFrom=4)
+    service = PlanningService(solver=solver, parallelHorizons=True, planCacheSize=0)
+    service.program.addToSection("goal", ["goal(I):- holds(isattable(c1, T),I)."])
+    service.horizonEstimate = 5
+
+    service.get_minimial_plan_parallel()
+    assert solver.horizons[:5] == [5, 4, 6, 3, 7]
+    assert sorted(solver.horizons) == list(range(0, 16))
+    assert service.program.nstep == 4
+
+    # The known satisfiable horizon bounds the next search of the same problem
+    service.horizonEstimate = 1
+    service.get_minimial_plan_parallel()
+    assert solver.horizons == [4]
+
+
+def test_plan_kept_by_the_plan_check_is_published():
+    messages = []
+    service = PlanningService(
+        lambda message, log_type: messages.append(message),
+        planner="native",
+        planCacheSize=0,
+        debounceDelay=0.0,
+    )
+    service.writeInitSituation(
+        ["currentlocation(agent, n4)", "currentlocation(w1, n7)"]
+    )
+    service.submit_goal("isattable(c1, T)")
+    service.submit_observation("has_entered(c1)", True)
+    service.update()
+    plan = service.getCurrentPlan()
+    assert plan.version == 1
+    assert plan.orders[:2] == ["go_to(agent,n5)", "pick(agent,c1)"]
+
+    # Does not affect the current plan, which is published again as covering it
+    sequence = service.submit_observation("bill_wave(table2)", True)
+    service.update()
+    replanned = service.getCurrentPlan()
+    assert "Current plan still valid, solver not called." in messages
+    assert replanned.version == 2
+    assert replanned.orders == plan.orders
+    assert replanned.covers(sequence)
+
+
+def test_horizon_estimate_counts_the_new_goals_only():
+    service = PlanningService(planner="native", planCacheSize=0, debounceDelay=0.0)
+    service.writeInitSituation(
+        ["currentlocation(agent, n4)", "currentlocation(w1, n7)"]
+    )
+    service.submit_goal("isattable(c1, T)")
+    service.submit_observation("has_entered(c1)", True)
+    service.update()
+    assert len(service.stackOrders) == 4
+
+    # The new initial situation is the goal step of the plan: its orders are already done
+    service.submit_goal("isattable(c2, T)")
+    service.submit_observation("has_entered(c2)", True)
+    service.update()
+    assert service.horizonEstimate == 1
+    assert len(service.stackOrders) == 4
+
+
+class FailingSolver:
+    """Solver whose Java runtime cannot be started."""
+
+    def __init__(self):
+        self.cancellations = 0
+
+    def isWarm(self) -> bool:
+        return False
+
+    def solve(self, program: str, timeout: float = None) -> str:
+        raise OSError("java: command not found")
+
+    def cancel(self):
+        self.cancellations += 1
+
+
+def test_serve_goes_on_after_a_failed_update():
+    errors = queue.Queue()
+    service = PlanningService(
+        lambda message, log_type: log_type == "error" and errors.put(message),
+        solver=FailingSolver(),
+        planCacheSize=0,
+        planCheck=False,
+        debounceDelay=0.0,
+    )
+    service.writeInitSituation(
+        ["currentlocation(agent, n4)", "currentlocation(w1, n7)"]
+    )
+    service.setState(True)
+    service.start()
+
+    for customer in ("c1", "c2"):
+        service.submit_goal("isattable({}, T)".format(customer))
+        service.submit_observation("has_entered({})".format(customer), True)
+        assert "OSError: java: command not found" in errors.get(timeout=5.0)
+    assert service._serviceThread.is_alive()
+
+
+def test_observations_cancel_the_running_solve():
+    service = PlanningService(solver=FailingSolver())
+    service.submit_observation("has_entered(c1)", True)
+    assert service.solver.cancellations == 0
+
+    service._solving = True
+    service.submit_observation("has_entered(c2)", True)
+    assert service.solver.cancellations == 1
+
+    service.cancelObsolete = False
+    service.submit_observation("has_entered(c3)", True)
+    assert service.solver.cancellations == 1
+
+
+class HorizonSolver:
+    """Answers with a plan from horizon satisfiableFrom on, recording the horizons and timeouts it is given."""
+
+    def __init__(self, satisfiableFrom: int, timeoutAt: int = None):
+        self.satisfiableFrom = satisfiableFrom
+        self.timeoutAt = timeoutAt
+        self.calls = []
+
+    def isWarm(self) -> bool:
+        return True
+
+    def solve(self, program: str, timeout: float = None) -> str:
+        n = int(re.search(r"#const nstep = (\d+)\.", program).group(1))
+        self.calls.append((n, timeout))
+        if n == self.timeoutAt:
+            raise SolveTimeout()
+        if n < self.satisfiableFrom:
+            return "SPARC V2.56\nprogram translated\n"
+        return "{{occurs(go_to(agent,n5),0), goal({})}}".format(n)
+
+
+def getHorizonService(solver) -> PlanningService:
+    service = PlanningService(solver=solver, planCacheSize=0, solveDeadline=5.0)
+    service.program.addToSection("goal", ["goal(I):- holds(isattable(c1, T),I)."])
+    return service
+
+
+def test_remembered_horizon_is_solved_within_the_deadline():
+    solver = HorizonSolver(satisfiableFrom=3)
+    service = getHorizonService(solver)
+    key = service.program.problemFingerprint()
+    service.horizonBounds.put(key, (2, 3))
+    service.horizonEstimate = 3
+
+    answerSet = service.findMinimalPlan()
+    assert answerSet.getGoalStep() == 3
+    assert [n for n, timeout in solver.calls] == [3]
+    assert 0.0 < solver.calls[0][1] <= 5.0
+
+
+def test_remembered_horizon_without_plan_falls_back_to_the_search():
+    solver = HorizonSolver(satisfiableFrom=5)
+    service = getHorizonService(solver)
+    key = service.program.problemFingerprint()
+    service.horizonBounds.put(key, (2, 3))
+
+    answerSet = service.findMinimalPlan()
+    assert answerSet.getGoalStep() == 5
+    assert [n for n, timeout in solver.calls] == [3, 4, 5]
+    assert service.horizonBounds.get(key) == (4, 5)
+
+
+def test_remembered_horizon_timeout_gives_no_plan():
+    solver = HorizonSolver(satisfiableFrom=3, timeoutAt=3)
+    service = getHorizonService(solver)
+    service.horizonBounds.put(service.program.problemFingerprint(), (2, 3))
+    assert service.findMinimalPlan() is None
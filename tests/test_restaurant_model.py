@@ -0,0 +1,102 @@
+import pytest
+
+from conftest import requiresSparc
+from ASP.AnswerSet import parseAnswerSets
+from ASP.PlanningService import FILE_PATH
+from ASP.ProgramBuilder import ProgramASP
+from ASP.RestaurantModel import RestaurantDomain, RestaurantState, replayPlan
+from ASP.SparcSolver import SparcSolver
+
+# Hand-written histories on the layout of the template: (initial situation, orders, executable)
+HISTORIES = [
+    (
+        ["currentlocation(agent,n4)", "currentlocation(w1,n7)", "iswaiting(c1)"],
+        [
+            "go_to(agent,n5)",
+            "pick(agent,c1)",
+            "go_to(agent,n6)",
+            "seat(agent,c1,table1)",
+        ],
+        True,
+    ),
+    (
+        ["currentlocation(agent,n4)", "currentlocation(w1,n1)", "iswaiting(c1)"],
+        ["pick(agent,c1)"],
+        False,
+    ),
+    (
+        ["currentlocation(agent,n4)", "currentlocation(w1,n7)"],
+        ["go_to(agent,n7)"],
+        False,
+    ),
+    (
+        ["currentlocation(agent,n4)", "currentlocation(w1,n1)"],
+        ["go_to(agent,n6)"],
+        False,
+    ),
+    (
+        [
+            "currentlocation(agent,n5)",
+            "currentlocation(w1,n1)",
+            "iswaiting(c1)",
+            "aretogether(c1,c2)",
+            "aretogether(c1,c3)",
+            "iswaiting(c2)",
+            "iswaiting(c3)",
+        ],
+        ["pick(agent,c1)", "go_to(agent,n6)", "seat(agent,c1,table1)"],
+        False,
+    ),
+    (
+        [
+            "currentlocation(agent,n4)",
+            "currentlocation(w1,n1)",
+            "isattable(c1,table2)",
+            "wantsbill(table2)",
+        ],
+        ["go_to(agent,n7)", "give_bill(agent,table2)"],
+        True,
+    ),
+    (
+        ["currentlocation(agent,n6)", "currentlocation(w1,n1)", "wantsbill(table1)"],
+        ["give_bill(agent,table1)"],
+        False,
+    ),
+]
+
+
+@pytest.fixture(scope="module")
+def solver():
+    solver = SparcSolver()
+    yield solver
+    solver.close()
+
+
+def renderHistory(initSituation: list, orders: list) -> str:
+    """ProgramASP.sparc with the orders given as occurs facts and the goal reached right after them."""
+    program = ProgramASP(FILE_PATH / "ProgramASP.sparc")
+    for name in program.SECTIONS:
+        program.clearSection(name)
+    program.addToSection("init", ["holds({},0).".format(f) for f in initSituation])
+    program.addToSection(
+        "goal",
+        ["occurs({},{}).".format(order, i) for i, order in enumerate(orders)]
+        + ["goal({}).".format(len(orders))],
+    )
+    program.nstep = len(orders)
+    return program.render()
+
+
+@requiresSparc
+@pytest.mark.parametrize("initSituation, orders, executable", HISTORIES)
+def test_executability_matches_sparc(solver, initSituation, orders, executable):
+    program = ProgramASP(FILE_PATH / "ProgramASP.sparc")
+    domain = RestaurantDomain.fromProgram(program)
+    states = replayPlan(RestaurantState.fromFluents(domain, initSituation), orders)
+    assert (states is not None) == executable
+
+    answerSets = parseAnswerSets(solver.solve(renderHistory(initSituation, orders)))
+    assert (len(answerSets) > 0) == executable
+    if executable:
+        # SPARC holds reflexive groups and occupancies of every customer and table as well
+        assert set(states[-1].getFluents()) <= set(answerSets[0].getHolds(len(orders)))
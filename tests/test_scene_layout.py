@@ -0,0 +1,107 @@
+from conftest import requiresSparc
+from ASP.PlanningService import PlanningService
+from ASP.SceneLayout import SceneLayout
+from SpatialGraph import FurnitureType, ObjectSet, SpatialGraph
+
+SECTIONS = {
+    "init": [
+        "holds(currentlocation(agent, n1), 0).",
+        "holds(currentlocation(w1, n2), 0).",
+    ],
+    "obs": ["obs(has_entered(c1), true, 0)."],
+    "goal": ["goal(I):- holds(isattable(c1, T),I)."],
+}
+
+
+def generateDetour():
+    """Entrance n1 linked to the table node n4 through n2, or through the detour n5, n6."""
+    graph = SpatialGraph(directed=False)
+    for node, x, y in [
+        ("n1", 0.0, 0.0),
+        ("n2", 2.0, 0.0),
+        ("n4", 4.0, 0.0),
+        ("n5", 1.0, -2.0),
+        ("n6", 3.0, -2.0),
+    ]:
+        graph.addPosition(node, x, y, 0.0)
+    for n1, n2 in [
+        ("n1", "n2"),
+        ("n2", "n4"),
+        ("n1", "n5"),
+        ("n5", "n6"),
+        ("n6", "n4"),
+    ]:
+        graph.addEdge(n1, n2)
+    graph.setStartingPosition("n1")
+    graph.setEntrancePosition("n1")
+
+    objects = ObjectSet()
+    objects.addObject(name="table1", objType=FurnitureType.Table, x=4.0, y=1.0)
+    for c, x in [(1, 3.5), (2, 4.5)]:
+        objects.addObject(
+            name="chair{}t1".format(c),
+            table="table1",
+            objType=FurnitureType.Chair,
+            x=x,
+            y=1.5,
+        )
+    return graph, objects
+
+
+def test_pruned_nodes_go_around_waiters():
+    layout = SceneLayout(*generateDetour())
+    customers, tables, nodes = layout.getRelevantElements(SECTIONS, prune=True)
+    assert customers == ["c1"]
+    assert tables == ["table1"]
+    assert set(nodes) == {"n1", "n2", "n4", "n5", "n6"}
+
+    sections = dict(SECTIONS, init=["holds(currentlocation(agent, n1), 0)."])
+    customers, tables, nodes = layout.getRelevantElements(sections, prune=True)
+    assert set(nodes) == {"n1", "n2", "n4"}
+
+
+def test_pruning_is_opt_in():
+    layout = SceneLayout(*generateDetour())
+    assert layout.getRelevantElements(SECTIONS)[2] == layout.nodes
+    service = PlanningService()
+    service.setLayout(*generateDetour())
+    assert not service.program.prune
+    service.solver.close()
+
+
+@requiresSparc
+def test_full_layout_solved_when_pruned_one_has_no_plan(monkeypatch):
+    messages = []
+    service = PlanningService(
+        lambda message, log_type: messages.append(message),
+        planCacheSize=0,
+        planCheck=False,
+        debounceDelay=0.0,
+        solveDeadline=None,
+    )
+    service.setLayout(*generateDetour(), prune=True)
+    # Pruning without the detour: the waiter blocks the only path left
+    getShortestPath = service.program.layout.getShortestPath
+    monkeypatch.setattr(
+        service.program.layout,
+        "getShortestPath",
+        lambda start, end, blocked=(): getShortestPath(start, end),
+    )
+
+    service.writeInitSituation(
+        ["currentlocation(agent, n1)", "currentlocation(w1, n2)"]
+    )
+    service.submit_goal("isattable(c1, T)")
+    service.submit_observation("has_entered(c1)", True)
+    service.update()
+    service.solver.close()
+
+    assert "No plan on the pruned layout, solving on the full layout." in messages
+    assert service.stackOrders == [
+        "pick(agent,c1)",
+        "go_to(agent,n5)",
+        "go_to(agent,n6)",
+        "go_to(agent,n4)",
+        "seat(agent,c1,table1)",
+    ]
+    assert service.program.prune
@@ -0,0 +1,33 @@
+from conftest import requiresSparc
+from ASP.PlanningService import MAX_HORIZON
+from Benchmark import reportWindows, runSoak
+
+
+def checkWindows(windows: list):
+    # Steps are re-based at every replan: nothing grows with the length of the shift.
+    # Latency is only reported (cf. reportWindows), wall-clock times are too noisy to assert on.
+    assert all(w["nstep"] <= MAX_HORIZON for w in windows)
+    assert all(0 < w["horizon"] <= MAX_HORIZON for w in windows)
+    assert max(w["planLength"] for w in windows) <= 2 * min(
+        w["planLength"] for w in windows
+    )
+    # Departed customers are forgotten and every update drains the intake queue
+    assert windows[-1]["programSize"] <= windows[0]["programSize"]
+    assert all(w["queueLength"] == 0 for w in windows)
+
+
+def test_native_soak_is_bounded():
+    windows = reportWindows(
+        runSoak(600, planner="native", solveDeadline=None), window=100
+    )
+    assert len(windows) == 6
+    checkWindows(windows)
+
+
+@requiresSparc
+def test_sparc_soak_is_bounded():
+    windows = reportWindows(runSoak(30, planner="sparc", solveDeadline=None), window=10)
+    assert len(windows) == 3
+    # The horizon search leaves the step limit at the minimal horizon
+    assert all(w["nstep"] == w["horizon"] for w in windows)
+    checkWindows(windows)
@@ -0,0 +1,125 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from conftest import requiresSparc
+from ASP.ProgramBuilder import ProgramASP
+from ASP.SparcSolver import SolveCancelled, SolveTimeout, SparcSolver
+
+# Pigeonhole problem: clingo needs about half a minute to prove it inconsistent
+HARD_PROGRAM = """sorts
+#pigeon = 1..11.
+#hole = 1..10.
+predicates
+in(#pigeon, #hole).
+placed(#pigeon).
+rules
+in(P, H) | -in(P, H).
+placed(P) :- in(P, H).
+:- not placed(P).
+:- in(P1, H), in(P2, H), P1 != P2.
+"""
+
+
+def getAtoms(output: str) -> set:
+    return set(output[output.index("{") + 1 : output.rindex("}")].split(", "))
+
+
+@pytest.fixture
+def program() -> str:
+    return ProgramASP().render(3)
+
+
+@requiresSparc
+def test_one_worker_answers_consecutive_solves(program):
+    messages = []
+    solver = SparcSolver(logFunction=lambda message, log_type: messages.append(message))
+    worker = solver.workers[0]
+    try:
+        first = solver.solve(program)
+        pid = worker._process.pid
+        assert solver.isWarm()
+        second = solver.solve(program)
+
+        assert "{" in first
+        assert getAtoms(first) == getAtoms(second)
+        assert worker._process.pid == pid
+        assert worker.nbrSolves == 2
+        assert worker.failure is None and messages == []
+    finally:
+        solver.close()
+
+
+@requiresSparc
+def test_cancelled_solve_keeps_the_worker(program):
+    solver = SparcSolver()
+    worker = solver.workers[0]
+    try:
+        solver.solve(program)
+        pid = worker._process.pid
+
+        threading.Timer(0.5, solver.cancel).start()
+        start = time.time()
+        with pytest.raises(SolveCancelled):
+            solver.solve(HARD_PROGRAM)
+        with pytest.raises(SolveTimeout):
+            solver.solve(HARD_PROGRAM, timeout=0.5)
+        assert time.time() - start < 5.0
+
+        assert "{" in solver.solve(program)
+        assert worker._process.pid == pid
+        assert solver.nbrCancellations == 1 and solver.nbrTimeouts == 1
+    finally:
+        solver.close()
+
+
+def test_failed_worker_is_not_launched_again(program):
+    messages = []
+    # The JVM dies before answering, and so do the one-shot launches
+    solver = SparcSolver(
+        javaPath="false",
+        logFunction=lambda message, log_type: messages.append((message, log_type)),
+    )
+    worker = solver.workers[0]
+    try:
+        assert solver.solve(program) == ""
+        assert worker.failure is not None
+        assert solver.solve(program) == ""
+        assert worker._process is None
+        assert not solver.isWarm()
+        assert len(messages) == 1 and messages[0][1] == "error"
+    finally:
+        solver.close()
+
+
+class SleepingSolver(SparcSolver):
+    """One-shot launches of a Python process standing for SPARC: horizons from 3 on have a plan,
+    the ones above 3 only answer after a minute."""
+
+    SCRIPT = (
+        "import sys, time\n"
+        "n = int(open(sys.argv[1]).read())\n"
+        "time.sleep(60 if n > 3 else 0.2)\n"
+        "print('{goal(3)}' if n >= 3 else 'INCONSISTENT')\n"
+    )
+
+    def getOneShotCommand(self, programPath) -> list:
+        return [sys.executable, "-c", self.SCRIPT, str(programPath)]
+
+
+def test_longer_one_shot_horizons_are_aborted():
+    solver = SleepingSolver(poolSize=4, persistent=False)
+    try:
+        start = time.time()
+        results = {}
+        best = solver.findMinimalHorizon(
+            str, [3, 4, 5, 6], lambda output: "{" in output, results
+        )
+        assert best == (3, "{goal(3)}\n")
+        assert time.time() - start < 10.0
+        assert list(results) == [3]
+        assert solver._running == {}
+    finally:
+        solver.close()
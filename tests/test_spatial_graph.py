@@ -0,0 +1,204 @@
+import itertools
+import math
+import random
+
+import numpy as np
+import pytest
+
+from SpatialGraph import (
+    Chair,
+    FurnitureType,
+    ObjectSet,
+    SpatialGraph,
+    SpatialIndex,
+    Table,
+)
+
+
+def generateRandomGraph(seed: int, nbrNodes: int = 9, nbrEdges: int = 12):
+    """Undirected graph of random positions and edges, possibly disconnected."""
+    rng = random.Random(seed)
+    graph = SpatialGraph(directed=False)
+    for i in range(nbrNodes):
+        graph.addPosition("n{}".format(i), rng.uniform(0, 10), rng.uniform(0, 10), 0.0)
+    pairs = list(itertools.combinations(graph.getNodes(), 2))
+    for n1, n2 in rng.sample(pairs, nbrEdges):
+        graph.addEdge(n1, n2)
+    return graph
+
+
+def getPathLength(graph: SpatialGraph, path: list, weighted: bool) -> float:
+    length = 0.0
+    for n1, n2 in zip(path, path[1:]):
+        assert n2 in graph.getNeighbors(n1)
+        length += (
+            math.dist(graph.getCoordinate(n1)[:2], graph.getCoordinate(n2)[:2])
+            if weighted
+            else 1.0
+        )
+    return length
+
+
+def bruteForceDistance(graph: SpatialGraph, start: str, end: str, weighted: bool):
+    """Length of the shortest of all the simple paths from start to end, inf if there is none."""
+    best = math.inf
+    stack = [[start]]
+    while stack:
+        path = stack.pop()
+        if path[-1] == end:
+            best = min(best, getPathLength(graph, path, weighted))
+            continue
+        for neighbor in graph.getNeighbors(path[-1]):
+            if neighbor not in path:
+                stack.append(path + [neighbor])
+    return best
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("weighted", [True, False])
+def test_a_star_finds_the_shortest_path(seed, weighted):
+    graph = generateRandomGraph(seed)
+    for start, end in itertools.product(graph.getNodes(), repeat=2):
+        expected = bruteForceDistance(graph, start, end, weighted)
+        path = graph.findShortestPath(start, end, weighted)
+        if expected == math.inf:
+            assert path is None, (start, end)
+        else:
+            assert path[0] == start and path[-1] == end
+            assert getPathLength(graph, path, weighted) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("weighted", [True, False])
+def test_path_table_finds_the_shortest_paths(seed, weighted):
+    graph = generateRandomGraph(seed)
+    table = graph.getPathTable(weighted)
+    for start, end in itertools.product(graph.getNodes(), repeat=2):
+        expected = bruteForceDistance(graph, start, end, weighted)
+        assert graph.getDistance(start, end, weighted) == pytest.approx(expected)
+        path = table.getPath(start, end)
+        if expected == math.inf:
+            assert path is None, (start, end)
+        else:
+            assert path[0] == start and path[-1] == end
+            assert getPathLength(graph, path, weighted) == pytest.approx(expected)
+    assert graph.getDistance("n0", "n42") is None
+
+
+def test_path_table_keeps_the_recently_used_sources():
+    graph = generateRandomGraph(0)
+    table = graph.getPathTable()
+    table.maxSources = 3
+    for node in ["n0", "n1", "n2", "n0", "n3"]:
+        table.getDistance(node, "n4")
+    assert len(table) == 3
+    assert set(table._trees) == {graph.getNodeID(n) for n in ["n2", "n0", "n3"]}
+
+    # Trees are dropped when the graph changes
+    graph.addPosition("n9", 0.0, 0.0, 0.0)
+    graph.addEdge("n9", "n0")
+    assert graph.getPathTable() is not table
+    assert graph.getDistance("n9", "n0", weighted=False) == 1.0
+
+
+@pytest.mark.parametrize("cellSize", [None, 0.3, 4.0])
+def test_spatial_index_matches_a_full_scan(cellSize):
+    rng = np.random.default_rng(0)
+    points = rng.uniform(0, 10, (60, 2))
+    # Duplicate points: the first added one is the nearest
+    points[30] = points[10]
+    names = ["p{}".format(i) for i in range(len(points))]
+    index = SpatialIndex(names, points, cellSize)
+
+    for x, y in rng.uniform(-5, 15, (100, 2)):
+        distances = np.hypot(points[:, 0] - x, points[:, 1] - y)
+        name, distance = index.nearest(x, y)
+        assert name == names[int(np.argmin(distances))]
+        assert distance == pytest.approx(distances.min())
+
+        radius = rng.uniform(0, 4)
+        expected = [
+            (names[i], distances[i])
+            for i in np.argsort(distances, kind="stable")
+            if distances[i] <= radius
+        ]
+        found = index.withinRadius(x, y, radius)
+        assert [n for n, d in found] == [n for n, d in expected]
+        assert [d for n, d in found] == pytest.approx([d for n, d in expected])
+
+
+def test_empty_spatial_index():
+    index = SpatialIndex([], np.zeros((0, 2)))
+    assert index.nearest(1.0, 2.0) == (None, float("inf"))
+    assert index.withinRadius(1.0, 2.0, 5.0) == []
+
+
+def generateTables():
+    objects = ObjectSet()
+    # A chair can be added before its table, and named after another one
+    objects.addObject(name="chair1t1", objType=FurnitureType.Chair, x=0.5, y=1.5)
+    objects.addObject(name="table1", objType=FurnitureType.Table, x=1.0, y=1.0)
+    objects.addObject(name="chair2t1", objType=FurnitureType.Chair, x=1.5, y=1.5)
+    objects.addObject(name="table2", objType=FurnitureType.Table, x=5.0, y=1.0)
+    for c in range(20):
+        objects.addObject(
+            name="seat{}".format(c),
+            table="table2",
+            objType=FurnitureType.Chair,
+            x=5.0 + 0.1 * c,
+            y=1.5,
+        )
+    objects.addObject(name="plant", x=3.0, y=3.0, heigth=1.2, width=0.4)
+    return objects
+
+
+def test_object_set_links_tables_and_chairs():
+    objects = generateTables()
+    assert objects.isTable("table1") and objects.isChair("seat3")
+    assert not objects.isChair("table1") and not objects.isChair("plant")
+    assert objects.getObjects(Table) == ["table1", "table2"]
+    assert len(objects.getObjects(Chair)) == 22
+    assert objects.getObjects(FurnitureType.Null) == ["plant"]
+    assert len(objects.getObjects()) == 25
+    assert objects.getCoordinate("seat19") == pytest.approx([6.9, 1.5, 0.0])
+    assert objects.getSize("plant") == (1.2, 0.4)
+    assert objects.getCoordinate("sofa") is None
+
+    assert objects.getChairsOfTable("table1") == ["chair1t1", "chair2t1"]
+    assert objects.getTableOfChair("seat0") == "table2"
+    assert objects.getCapacity("table1") == 2
+    assert objects.getCapacity("table2") == 20
+    assert objects.getCapacity("table3") == 0
+
+
+def test_object_set_counts_free_seats():
+    objects = generateTables()
+    assert objects.setChairClientID(4, "seat1")
+    assert objects.setChairClientID(5, "seat1")
+    assert objects.setChairClientID(6, "chair2t1")
+    assert not objects.setChairClientID(7, "table1")
+    assert objects.getChairClientID("seat1") == 5
+    assert objects.isOccupied("chair2t1") and not objects.isOccupied("seat0")
+    assert objects.getNbrFreeSeats("table1") == 1
+    assert objects.getNbrFreeSeats("table2") == 19
+    assert objects.getFreeChairs("table1") == ["chair1t1"]
+
+    objects.setChairClientID(None, "seat1")
+    objects.setChairClientID(None, "seat1")
+    assert objects.getChairClientID("seat1") is None
+    assert objects.getNbrFreeSeats("table2") == 20
+    assert objects.getFreeChairs("table2")[:2] == ["seat0", "seat1"]
+
+
+def test_object_set_spatial_queries():
+    objects = generateTables()
+    assert objects.getNearestObject(5.0, 1.0, Chair) == ("seat0", pytest.approx(0.5))
+    assert objects.getNearestObject(3.1, 3.0)[0] == "plant"
+    assert [n for n, d in objects.getObjectsWithin(1.0, 1.0, 1.0)] == [
+        "table1",
+        "chair1t1",
+        "chair2t1",
+    ]
+    # The index follows the objects added
+    objects.addObject(name="table3", objType=FurnitureType.Table, x=3.0, y=2.9)
+    assert objects.getNearestObject(3.0, 3.0, Table)[0] == "table3"
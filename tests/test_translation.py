@@ -0,0 +1,189 @@
+import pytest
+
+from conftest import requiresClingo
+from ASP.AnswerSet import parseAnswerSets
+from ASP.PlanningService import PlanningService
+from ASP.ProgramBuilder import ProgramASP
+from ASP.SceneLayout import SceneLayout
+from ASP.SparcSolver import SparcSolver, TranslationError, setTranslationHorizon
+from Benchmark import generateRestaurant
+
+
+def getProgram(nbrTables: int = 4) -> ProgramASP:
+    program = ProgramASP()
+    program.clearAll()
+    program.setLayout(SceneLayout(*generateRestaurant(nbrTables)))
+    program.addToSection(
+        "init",
+        [
+            "holds(currentlocation(agent, n1), 0).",
+            "holds(isattable(c1, table1), 0).",
+            "holds(isattable(c2, table1), 0).",
+            "holds(aretogether(c1, c2), 0).",
+        ],
+    )
+    return program
+
+
+def test_static_part_does_not_depend_on_the_dynamic_sections():
+    program = getProgram()
+    static = program.renderStatic()
+    assert "#const nstep = 0." in static
+    assert "#customer = {{{}}}.".format(", ".join(program.getCustomerPool())) in static
+
+    program.addToSection(
+        "obs", ["obs(has_entered(c3), true, 0).", "obs(bill_wave(table1), true, 0)."]
+    )
+    program.addToSection("goal", ["goal(I):- holds(isattable(c3, T),I)."])
+    program.nstep = 7
+    assert program.renderStatic() == static
+
+    # A customer beyond the pool makes it grow
+    program.addToSection("obs", ["obs(has_entered(c9), true, 0)."])
+    assert program.getCustomerPool()[-1] == "c16"
+    assert program.renderStatic() != static
+
+
+def test_translation_horizon():
+    translation = (
+        "#const nstep=0.\nstep(0).\nsuccess:-goal(I_G),I_G<=nstep,step(I_G).\n"
+    )
+    assert setTranslationHorizon(translation, 5) == (
+        "#const nstep=5.\nstep(0..5).\nsuccess:-goal(I_G),I_G<=nstep,step(I_G).\n"
+    )
+
+
+@pytest.fixture(scope="module")
+def solver():
+    solver = SparcSolver()
+    yield solver
+    solver.close()
+
+
+@requiresClingo
+def test_translated_program_has_the_same_plans_as_sparc(solver):
+    program = getProgram()
+    problems = [
+        (
+            [
+                "obs(has_entered(c3), true, 0).",
+                "obs(has_entered(c4), true, 0).",
+                "obs(group(c3, c4), true, 0).",
+            ],
+            ["goal(I):- holds(isattable(c3, T),I)."],
+        ),
+        (["obs(bill_wave(table1), true, 0)."], ["goal(I):- holds(haspaid(c1),I)."]),
+    ]
+    for observations, goals in problems:
+        program.clearSection("obs")
+        program.clearSection("goal")
+        program.addToSection("obs", observations)
+        program.addToSection("goal", goals)
+        minimal = None
+        for n in range(0, 6):
+            expected = parseAnswerSets(solver.solve(program.render(n)))
+            translated = parseAnswerSets(
+                solver.solveTranslated(
+                    program.renderStatic(),
+                    program.renderDynamic(),
+                    nstep=n,
+                    constants=program.getDynamicConstants(),
+                )
+            )
+            assert len(translated) == len(expected), (goals, n)
+            if expected and minimal is None:
+                minimal = n
+                assert (
+                    len(translated[0].getOrders()) == len(expected[0].getOrders()) == n
+                )
+                assert translated[0].getGoalStep() == expected[0].getGoalStep() == n
+                if translated[0].getOrders() == expected[0].getOrders():
+                    # The translated sorts hold the whole pool of customers as well
+                    assert set(expected[0].getHolds(n)) <= set(
+                        translated[0].getHolds(n)
+                    )
+        assert minimal is not None
+
+    # Translated once for every problem and horizon
+    assert len(solver.translations) == 1
+
+
+@requiresClingo
+def test_constants_outside_the_sorts_are_rejected(solver):
+    program = getProgram()
+    program.addToSection("obs", ["obs(has_entered(c3), true, 0)."])
+    program.addToSection("goal", ["goal(I):- holds(isattable(c3, T),I)."])
+    with pytest.raises(TranslationError):
+        solver.solveTranslated(
+            program.renderStatic(),
+            program.renderDynamic(),
+            nstep=4,
+            constants=program.getDynamicConstants() + ["n42"],
+        )
+
+
+@requiresClingo
+def test_service_plans_on_the_translated_program(solver):
+    plans = {}
+    for translateStatic in (False, True):
+        service = PlanningService(
+            solver=solver,
+            translateStatic=translateStatic,
+            planCacheSize=0,
+            planCheck=False,
+            debounceDelay=0.0,
+        )
+        service.setLayout(*generateRestaurant(4))
+        service.writeInitSituation(["currentlocation(agent, n1)"])
+        service.submit_goal("isattable(c1, T)")
+        service.submit_observation("has_entered(c1)", True)
+        service.update()
+        plans[translateStatic] = list(service.stackOrders)
+
+    assert len(plans[True]) == len(plans[False]) > 0
+
+
+@requiresClingo
+def test_undeclared_predicates_are_rejected(solver):
+    program = getProgram()
+    program.addToSection("goal", ["goal(I):- holds(haspaid(c1),I)."])
+    with pytest.raises(TranslationError, match="renamed_happened"):
+        solver.solveTranslated(
+            program.renderStatic(),
+            program.renderDynamic(),
+            nstep=4,
+            predicates=list(program.OPTIMIZATION_PREDICATES) + ["renamed_happened"],
+        )
+
+
+@requiresClingo
+def test_optimal_plan_has_the_minimal_horizon(solver):
+    problems = [
+        (["has_entered(c1)"], ["isattable(c1, T)"]),
+        (["has_entered(c1)", "has_entered(c2)"], ["isattable(c2, T)"]),
+        (["bill_wave(table2)"], ["haspaid(c5)"]),
+    ]
+    for observations, goals in problems:
+        lengths = {}
+        for optimalPlan in (False, True):
+            service = PlanningService(
+                solver=solver,
+                optimalPlan=optimalPlan,
+                planCacheSize=0,
+                planCheck=False,
+                debounceDelay=0.0,
+            )
+            service.setLayout(*generateRestaurant(4))
+            service.writeInitSituation(
+                [
+                    "currentlocation(agent, n1)",
+                    "isattable(c5, table2)",
+                ]
+            )
+            for goal in goals:
+                service.submit_goal(goal)
+            for observation in observations:
+                service.submit_observation(observation, True)
+            service.update()
+            lengths[optimalPlan] = len(service.stackOrders)
+        assert lengths[True] == lengths[False] > 0, (observations, lengths)
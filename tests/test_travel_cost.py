@@ -0,0 +1,87 @@
+import math
+
+import pytest
+
+from conftest import requiresClingo
+from ASP.PlanningService import PlanningService
+from ASP.TravelCost import TravelCostModel
+from SpatialGraph import FurnitureType, ObjectSet, SpatialGraph
+
+# Entrance n1 linked to the table node n4 by two long edges through n2,
+# or by three short edges through n5 and n6
+POSITIONS = {
+    "n1": (0.0, 0.0),
+    "n2": (1.0, 10.0),
+    "n4": (2.0, 0.0),
+    "n5": (0.5, -1.0),
+    "n6": (1.5, -1.0),
+}
+EDGES = [("n1", "n2"), ("n2", "n4"), ("n1", "n5"), ("n5", "n6"), ("n6", "n4")]
+SHORT_WALK = ["pick(agent,c1)", "go_to(agent,n5)", "go_to(agent,n6)", "go_to(agent,n4)"]
+FEW_STEPS = ["pick(agent,c1)", "go_to(agent,n2)", "go_to(agent,n4)"]
+
+
+def generateLongEdges():
+    graph = SpatialGraph(directed=False)
+    for node, (x, y) in POSITIONS.items():
+        graph.addPosition(node, x, y, 0.0)
+    for n1, n2 in EDGES:
+        graph.addEdge(n1, n2)
+    graph.setStartingPosition("n1")
+    graph.setEntrancePosition("n1")
+
+    objects = ObjectSet()
+    objects.addObject(name="table1", objType=FurnitureType.Table, x=2.0, y=1.0)
+    for c, x in [(1, 1.5), (2, 2.5)]:
+        objects.addObject(
+            name="chair{}t1".format(c),
+            table="table1",
+            objType=FurnitureType.Chair,
+            x=x,
+            y=1.5,
+        )
+    return graph, objects
+
+
+def test_plan_duration():
+    costs = TravelCostModel(speed=0.5, actionDuration=1.0)
+    costs.setLengths(
+        {(n1, n2): math.dist(POSITIONS[n1], POSITIONS[n2]) for n1, n2 in EDGES}
+    )
+    orders = SHORT_WALK + ["seat(agent,c1,table1)"]
+    assert costs.getDistance(orders, "n1") == pytest.approx(1.0 + 2 * math.sqrt(1.25))
+    assert costs.getDuration(orders, "n1") == pytest.approx(
+        (1.0 + 2 * math.sqrt(1.25)) / 0.5 + 5 * 1.0
+    )
+
+    # Traversals reported twice as fast as the default speed
+    assert costs.addTraversal("n5", "n6", 1.0)
+    assert not costs.addTraversal("n5", "n9", 1.0)
+    assert costs.getSpeed() == pytest.approx(1.0)
+
+
+@requiresClingo
+def test_travel_cost_plan_is_the_fastest():
+    # Hand-computed durations at 0.5 m/s and 1 s per action:
+    # through n2, 2 * sqrt(101) m and 4 actions: 44.2 s
+    # through n5 and n6, 1 + 2 * sqrt(1.25) m and 5 actions: 11.5 s
+    plans = {}
+    for travelCost in (False, True):
+        service = PlanningService(
+            travelCost=travelCost,
+            planCacheSize=0,
+            planCheck=False,
+            debounceDelay=0.0,
+        )
+        try:
+            service.setLayout(*generateLongEdges())
+            service.writeInitSituation(["currentlocation(agent, n1)"])
+            service.submit_goal("isattable(c1, T)")
+            service.submit_observation("has_entered(c1)", True)
+            service.update()
+            plans[travelCost] = list(service.stackOrders)
+        finally:
+            service.solver.close()
+
+    assert plans[False] == FEW_STEPS + ["seat(agent,c1,table1)"]
+    assert plans[True] == SHORT_WALK + ["seat(agent,c1,table1)"]